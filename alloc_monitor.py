@@ -0,0 +1,133 @@
+import gc
+import json
+import tracemalloc
+
+import pygame
+
+from game_log import get_logger
+
+log = get_logger("alloc")
+
+# Optional allocation and object-count instrumentation.
+# Does nothing until started with --instrument FILE; it then records to
+# FILE, one JSON object per line, for offline analysis:
+# - "allocations": every sample_frames frames, the memory allocated per
+#   frame by source line (net of what was freed again, from tracemalloc
+#   snapshots) and the transient peak a frame reaches above where it started,
+# - "counts": live instances per class, sprite group sizes and other probes
+#   (boss bullets in flight, player drones), at every wave transition and
+#   with the allocation samples,
+# - "leak": a count that grew at every one of the last leak_waves waves.
+# Objects frozen after loading are not seen by gc.get_objects() and so are
+# not counted. Surfaces are not tracked by the collector; they are counted
+# through the objects that refer to them.
+class AllocationMonitor:
+    leak_waves = 5  # Consecutive waves of growth before a count is reported as a leak
+
+    def __init__(self, classes, groups, probes=None, sample_frames=300, top=20):
+        self.classes = classes  # Name -> class, counted with isinstance
+        self.groups = groups  # Name -> sprite group (anything with len())
+        self.probes = probes or {}  # Name -> function returning a count
+        self.sample_frames = sample_frames
+        self.top = top  # Source lines per allocation sample
+        self.file = None
+        self.frame = 0
+        self.wave_counts = []  # Counts at each wave transition, oldest first
+        self.leaks = set()  # Names already reported
+        self.frame_start = 0
+        self.peak_total = 0  # Sum of transient peaks since the last sample
+        self.snapshot = None
+        self.snapshot_frame = 0
+
+    def start(self, path):
+        self.file = open(path, "w")
+        tracemalloc.start()
+        self.snapshot = self.take_snapshot()
+        log.info("Allocation monitor writing to %s", path)
+
+    def stop(self):
+        if self.file is not None:
+            tracemalloc.stop()
+            self.file.close()
+            self.file = None
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def take_snapshot(self):
+        # Leave out the monitor's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def begin_frame(self):
+        if self.file is None:
+            return
+        tracemalloc.reset_peak()
+        self.frame_start = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        if self.file is None:
+            return
+        self.frame += 1
+        self.peak_total += tracemalloc.get_traced_memory()[1] - self.frame_start
+        if self.frame - self.snapshot_frame >= self.sample_frames:
+            self.sample_allocations()
+
+    def sample_allocations(self):
+        frames = self.frame - self.snapshot_frame
+        snapshot = self.take_snapshot()
+        lines = []
+        for stat in snapshot.compare_to(self.snapshot, "lineno")[:self.top]:
+            where = stat.traceback[0]
+            lines.append({"line": f"{where.filename}:{where.lineno}",
+                          "bytes_per_frame": stat.size_diff / frames,
+                          "blocks_per_frame": stat.count_diff / frames})
+        current, peak = tracemalloc.get_traced_memory()
+        self.write({"kind": "allocations", "frame": self.frame, "frames": frames,
+                    "traced_bytes": current, "peak_bytes_per_frame": self.peak_total / frames,
+                    "lines": lines})
+        self.write({"kind": "counts", "frame": self.frame, "counts": self.counts()})
+        self.snapshot = snapshot
+        self.snapshot_frame = self.frame
+        self.peak_total = 0
+
+    def counts(self):
+        """Live instances per class and surface, then group sizes and probes."""
+        counts = dict.fromkeys(self.classes, 0)
+        surfaces = set()
+        for obj in gc.get_objects():
+            for name, cls in self.classes.items():
+                if isinstance(obj, cls):
+                    counts[name] += 1
+            for referent in gc.get_referents(obj):
+                if isinstance(referent, pygame.Surface):
+                    surfaces.add(id(referent))
+        counts["Surface"] = len(surfaces)
+        for name, group in self.groups.items():
+            counts["group:" + name] = len(group)
+        for name, probe in self.probes.items():
+            counts[name] = probe()
+        return counts
+
+    def wave(self, label):
+        # Called at every wave transition, after the pause collection
+        if self.file is None:
+            return
+        counts = self.counts()
+        self.write({"kind": "counts", "frame": self.frame, "wave": label, "counts": counts})
+        self.wave_counts.append(counts)
+        del self.wave_counts[:-(self.leak_waves + 1)]
+        if len(self.wave_counts) > self.leak_waves:
+            self.check_leaks(label)
+        self.file.flush()
+
+    def check_leaks(self, label):
+        for name in self.wave_counts[-1]:
+            history = [counts.get(name, 0) for counts in self.wave_counts]
+            growing = all(later > earlier for earlier, later in zip(history, history[1:]))
+            if growing and name not in self.leaks:
+                self.leaks.add(name)
+                self.write({"kind": "leak", "frame": self.frame, "wave": label, "name": name, "history": history})
+                log.warning("Possible leak: %s grew at each of the last %d waves (%s)", name, self.leak_waves, history)
@@ -0,0 +1,75 @@
+import csv
+import json
+import struct
+import sys
+
+import frame_metrics
+
+# Summary of a per-frame metrics recording (python space_shooter.py --metrics FILE).
+# Usage: python analyze_metrics.py FILE
+# Prints frame time percentiles per sector, with the mean time of each
+# phase, mean sprite counts and collisions per frame, and garbage
+# collections, so recordings from two builds can be compared side by side.
+
+def read_records(path):
+    """Rows of a recording as dicts, from either the binary or the CSV format."""
+    with open(path, "rb") as file:
+        if file.readline().decode().strip() == frame_metrics.MAGIC:
+            header = json.loads(file.readline())
+            fields = header["fields"]
+            return [dict(zip(fields, values)) for values in struct.iter_unpack(header["format"], file.read())]
+    with open(path, newline="") as file:
+        return [{name: float(value) for name, value in row.items()} for row in csv.DictReader(file)]
+
+def sector_label(record):
+    flags = int(record["flags"])
+    label = f"sector {int(record['sector'])}"
+    if flags & frame_metrics.HORDE:
+        label += " horde"
+    elif flags & frame_metrics.ENDLESS:
+        label += " endless"
+    return label
+
+def percentile(values, fraction):
+    # values must be sorted
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def summarize(records):
+    sectors = {}
+    for record in records:
+        sectors.setdefault(sector_label(record), []).append(record)
+    phases = [name for name in records[0] if name.endswith("_ms") and name not in ("time_ms", "frame_ms", "gc_ms")]
+    counts = [name for name in records[0]
+              if name in ("enemies", "bullets", "enemy_bullets", "bosses", "powerups", "bullet_hits", "player_hits")]
+    print(f"{len(records)} frames")
+    print(f"{'':<18}{'frames':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  ms per frame")
+    for label, rows in sectors.items():
+        times = sorted(row["frame_ms"] for row in rows)
+        print(f"{label:<18}{len(rows):7d}" + "".join(f"{percentile(times, p):8.2f}" for p in (0.5, 0.95, 0.99))
+              + f"{times[-1]:8.2f}")
+    print()
+    print("Mean phase times, ms per frame")
+    print(f"{'':<18}" + "".join(f"{name[:-3]:>10}" for name in phases))
+    for label, rows in sectors.items():
+        print(f"{label:<18}" + "".join(f"{sum(row[name] for row in rows) / len(rows):10.2f}" for name in phases))
+    print()
+    print("Mean counts per frame, garbage collections")
+    print(f"{'':<18}" + "".join(f"{name:>14}" for name in counts) + f"{'gc':>8}{'gc ms':>8}{'gc max':>8}")
+    for label, rows in sectors.items():
+        collections = sum(row["gc_collections"] for row in rows)
+        print(f"{label:<18}" + "".join(f"{sum(row[name] for row in rows) / len(rows):14.1f}" for name in counts)
+              + f"{collections:8.0f}{sum(row['gc_ms'] for row in rows):8.1f}{max(row['gc_ms'] for row in rows):8.2f}")
+
+def main(argv):
+    if len(argv) != 1:
+        print("Usage: python analyze_metrics.py FILE")
+        return 1
+    records = read_records(argv[0])
+    if not records:
+        print("No frames recorded")
+        return 1
+    summarize(records)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,51 @@
+# Pre-rendered animation frames for procedurally animated sprites.
+# A looping animation is drawn once from a draw function and stored as a list
+# of frames, so sprites only advance an index each update instead of
+# allocating and redrawing a new surface every frame.
+_animations = {}
+_shared_surfaces = {}
+
+def build_animation(name, draw_frame, steps):
+    """Return the frame list for an animation, drawing it on first use.
+
+    draw_frame is called once per distinct step value; repeated steps reuse
+    the same surface, so long loops with few distinct poses stay cheap.
+    """
+    frames = _animations.get(name)
+    if frames is None:
+        rendered = {}
+        frames = []
+        for step in steps:
+            if step not in rendered:
+                rendered[step] = draw_frame(step)
+            frames.append(rendered[step])
+        _animations[name] = frames
+    return frames
+
+def shared_surface(name, render):
+    """Return a surface shared by every sprite that asks for it by name."""
+    surface = _shared_surfaces.get(name)
+    if surface is None:
+        surface = render()
+        _shared_surfaces[name] = surface
+    return surface
+
+def clear_animation_cache():
+    # Drop everything, e.g. after the display mode changes
+    _animations.clear()
+    _shared_surfaces.clear()
+
+# Cursor over a cached frame list
+class FrameAnimation:
+    def __init__(self, frames, start=0):
+        self.frames = frames
+        self.index = start % len(frames)
+
+    @property
+    def frame(self):
+        return self.frames[self.index]
+
+    def advance(self, steps=1):
+        # Move to the next frame, looping back to the start
+        self.index = (self.index + steps) % len(self.frames)
+        return self.frames[self.index]
@@ -1,6 +1,12 @@
 import pygame
 import random
 import math
+from definitions import get_definitions
+from patterns import compile_pattern, PatternTemplate
+from tracking import BulletTracker
+from game_log import get_logger
+
+log = get_logger("barrier_goliath")
 
 # Barrier class for the Barrier Goliath's protective shields
 class Barrier(pygame.sprite.Sprite):
@@ -14,7 +20,7 @@ class Barrier(pygame.sprite.Sprite):
         self.enemies = enemies
         # Required properties for hit function to work properly
         self.score_value = 50
-        self.bullets = []  # Track bullets
+        self.bullets = BulletTracker()  # Track bullets
         
     def hit(self, damage):
         self.health -= damage
@@ -25,7 +31,9 @@ class Barrier(pygame.sprite.Sprite):
 
 # Barrier Goliath Mini-Boss class
 class BarrierGoliath(pygame.sprite.Sprite):
-    def __init__(self, WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet):
+    core_template = PatternTemplate(compile_pattern(range(-45, 46, 15)), (0, 0, 128), 10, 20, 6)  # dark blue
+    
+    def __init__(self, WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, spawn_volley):
         pygame.sprite.Sprite.__init__(self)
         
         # Store references to game objects
@@ -37,7 +45,7 @@ class BarrierGoliath(pygame.sprite.Sprite):
         self.enemy_bullets = enemy_bullets
         self.powerups = powerups
         self.PowerUp = PowerUp
-        self.EnemySpreadBullet = EnemySpreadBullet
+        self.spawn_volley = spawn_volley
         
         # Visual setup
         self.width = 120
@@ -50,24 +58,20 @@ class BarrierGoliath(pygame.sprite.Sprite):
         self.rect.centerx = random.randint(self.width // 2, WIDTH - self.width // 2)
         self.rect.top = -self.height
         
-        # Health and difficulty settings
-        difficulty_multipliers = {
-            "easy": 0.8,
-            "normal": 1.0, 
-            "hard": 1.5
-        }
+        # Health and difficulty settings from the compiled stat table
+        stats = get_definitions().barrier_goliath[game_state.difficulty]
         
-        self.max_health = 350 * difficulty_multipliers[game_state.difficulty]
+        self.max_health = stats.max_health
         self.health = self.max_health
         
         # Movement and attack patterns
-        self.speedx = 1 * difficulty_multipliers[game_state.difficulty]
-        self.speedy = 1 * difficulty_multipliers[game_state.difficulty]
-        self.shoot_delay = 1500 // difficulty_multipliers[game_state.difficulty]
+        self.speedx = stats.speedx
+        self.speedy = stats.speedy
+        self.shoot_delay = stats.shoot_delay
         self.last_shot = pygame.time.get_ticks()
         
         # Track bullets
-        self.bullets = []
+        self.bullets = BulletTracker()
         
         # Initial movement pattern (0-horizontal, 1-diagonal)
         self.pattern = 0
@@ -76,19 +80,19 @@ class BarrierGoliath(pygame.sprite.Sprite):
         
         # Shield system
         self.has_shield = True
-        self.shield_health = 150 * difficulty_multipliers[game_state.difficulty]
+        self.shield_health = stats.shield_health
         self.max_shield_health = self.shield_health
-        self.shield_regen_rate = 0.2 * difficulty_multipliers[game_state.difficulty]
+        self.shield_regen_rate = stats.shield_regen_rate
         
         # Barrier system
         self.barriers = []
         self.spawn_barriers()
         
         # Score value
-        self.score_value = 1000
+        self.score_value = stats.score_value
     
     def spawn_barriers(self):
-        # Spawn 3 barrier objects around the mini-boss
+        # Create 3 barrier objects around the mini-boss (added to play by activate)
         barrier_positions = [
             (self.rect.centerx - 70, self.rect.centery), 
             (self.rect.centerx + 70, self.rect.centery),
@@ -98,16 +102,24 @@ class BarrierGoliath(pygame.sprite.Sprite):
         for pos in barrier_positions:
             barrier = Barrier(pos[0], pos[1], self.all_sprites, self.enemies)
             self.barriers.append(barrier)
-            self.all_sprites.add(barrier)
-            self.enemies.add(barrier)
     
-    def update(self):
+    def activate(self):
+        # Bring a mini-boss built ahead of time into play with its barriers
         now = pygame.time.get_ticks()
-        
+        self.last_shot = now
+        self.last_pattern_change = now
+        for sprite in [self] + self.barriers:
+            self.all_sprites.add(sprite)
+            self.enemies.add(sprite)
+    
+    def think(self, now):
         # Check if it's time to change pattern
         if now - self.last_pattern_change > self.pattern_duration:
             self.pattern = (self.pattern + 1) % 2
             self.last_pattern_change = now
+    
+    def update(self):
+        now = pygame.time.get_ticks()
         
         # Move based on current pattern
         if self.pattern == 0:  # Horizontal movement
@@ -151,42 +163,27 @@ class BarrierGoliath(pygame.sprite.Sprite):
             if barrier.alive():
                 barrier.rect.center = barrier_positions[i]
     
+    def barrier_pattern(self, living):
+        # A spread of bullets from each living barrier, compiled once per set of survivors
+        angles = []
+        offsets = []
+        for barrier in living:
+            offset = (barrier.rect.centerx - self.rect.centerx, barrier.rect.bottom - self.rect.centery)
+            for angle in range(-30, 31, 30):
+                angles.append(angle)
+                offsets.append(offset)
+        return compile_pattern(angles, offsets)
+    
     def shoot(self):
         # Shoot from each living barrier
-        for barrier in self.barriers:
-            if barrier.alive():
-                # Create a spread of bullets from each barrier
-                for angle in range(-30, 31, 30):
-                    bullet = self.EnemySpreadBullet(
-                        barrier.rect.centerx,   # x
-                        barrier.rect.bottom,    # y
-                        angle,                  # angle
-                        self,                   # owner
-                        (173, 216, 230),        # color (light blue)
-                        8,                      # size
-                        15,                     # damage
-                        6                       # speed
-                    )
-                    self.all_sprites.add(bullet)
-                    self.enemy_bullets.add(bullet)
-                    self.bullets.append(bullet)
-        
-        # If no barriers left, shoot directly from the mini-boss
-        if all(not barrier.alive() for barrier in self.barriers):
-            for angle in range(-45, 46, 15):
-                bullet = self.EnemySpreadBullet(
-                    self.rect.centerx,          # x
-                    self.rect.bottom,           # y
-                    angle,                      # angle
-                    self,                       # owner
-                    (0, 0, 128),                # color (dark blue)
-                    10,                         # size
-                    20,                         # damage
-                    6                           # speed
-                )
-                self.all_sprites.add(bullet)
-                self.enemy_bullets.add(bullet)
-                self.bullets.append(bullet)
+        living = [barrier for barrier in self.barriers if barrier.alive()]
+        if living:
+            # Offsets put each spread on its barrier
+            template = PatternTemplate(self.barrier_pattern(living), (173, 216, 230), 8, 15, 6)  # light blue
+            self.spawn_volley("enemy", self.rect.center, template, self)
+        else:
+            # If no barriers left, shoot directly from the mini-boss
+            self.spawn_volley("enemy", (self.rect.centerx, self.rect.bottom), self.core_template, self)
     
     def hit(self, damage):
         # Check shield first
@@ -203,16 +200,12 @@ class BarrierGoliath(pygame.sprite.Sprite):
         # Check if destroyed
         if self.health <= 0:
             # Clear any bullets this enemy fired
-            for bullet in self.bullets[:]:
-                bullet.kill()
-            self.bullets.clear()
+            self.bullets.despawn()
             
             # Ensure all bullets from barrier minions are also cleared
             for barrier in self.barriers:
                 if hasattr(barrier, 'bullets'):
-                    for bullet in barrier.bullets[:]:
-                        bullet.kill()
-                    barrier.bullets.clear()
+                    barrier.bullets.despawn()
             
             # Also remove barriers
             for barrier in self.barriers:
@@ -230,13 +223,13 @@ class BarrierGoliath(pygame.sprite.Sprite):
             main_module = sys.modules['__main__']
             if hasattr(main_module, 'spawn_shop_portal'):
                 main_module.spawn_shop_portal(self.rect.centerx, self.rect.centery)
-                print("Mini-boss defeated! Called spawn_shop_portal function")
+                log.info("Mini-boss defeated! Called spawn_shop_portal function")
             else:
-                print("ERROR: spawn_shop_portal function not found in main module")
+                log.error("spawn_shop_portal function not found in main module")
             
             # Reset boss_fight flag directly as a backup
             self.game_state.boss_fight = False
-            print("Mini-boss defeated! Set boss_fight to False")
+            log.debug("Mini-boss defeated! Set boss_fight to False")
             
             # Remove the mini-boss from the game
             self.kill()
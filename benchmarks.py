@@ -0,0 +1,687 @@
+import gc
+import io
+import math
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+# Microbenchmarks for the game's hot paths.
+# Runs headless: python benchmarks.py [benchmark ...]
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import space_shooter as game
+import frame_metrics
+import swarm
+
+ENEMY_TYPES = ["basic", "elite", "cloaked_ambusher", "splitter_drone",
+               "shield_bearer", "energy_sapper", "blade_spinner"]
+
+def clear_world():
+    for group in (game.all_sprites, game.bullets, game.enemy_bullets, game.enemies,
+                  game.powerups, game.bosses, game.shop_portals):
+        group.empty()
+
+def run_gameplay_frames(fill, frames, warmup=0, shoot_every=None, timer=None, begin_frame=None, end_frame=None):
+    """Run full gameplay frames (simulate and render) on a cleared world and return the frame times in seconds.
+
+    fill() tops the world up before each frame. The player soaks up every
+    hit and the wave is held, so every frame is a gameplay frame of the same
+    fight. The first warmup frames aren't measured; timer (a PhaseTimer) is
+    reset once they are over, and begin_frame/end_frame run around every
+    measured frame."""
+    screen = game.screens["playing"]
+    player = game.player
+    clear_world()
+    player.drone_list = []
+    game.wave_director.reset()
+    game.all_sprites.add(player)
+    game.game_state.boss_fight = False
+    player.hit = lambda damage: False
+    game.wave_director.wave_cleared = lambda: None
+    times = []
+    try:
+        with redirect_stdout(io.StringIO()):
+            for frame in range(warmup + frames):
+                measured = frame >= warmup
+                if frame == warmup and timer is not None:
+                    timer.reset()
+                fill()
+                if shoot_every and frame % shoot_every == 0:
+                    player.last_shot = -player.shoot_delay
+                    player.shoot()
+                start = time.perf_counter()
+                if measured and begin_frame is not None:
+                    begin_frame()
+                screen.simulate()
+                screen.render(game.gameplay_surface)
+                if measured:
+                    if end_frame is not None:
+                        end_frame()
+                    times.append(time.perf_counter() - start)
+    finally:
+        del player.hit
+        del game.wave_director.wave_cleared
+    return times
+
+def percentile(times, fraction):
+    # Of sorted frame times, in milliseconds
+    return times[min(len(times) - 1, int(len(times) * fraction))] * 1000
+
+def bench_enemy_update(count=200, frames=120):
+    """Average cost of one Enemy.update() call per archetype, in microseconds."""
+    print(f"Enemy.update() cost ({count} enemies x {frames} frames)")
+    total_time = 0
+    total_calls = 0
+    for enemy_type in ENEMY_TYPES:
+        clear_world()
+        group = [game.Enemy(enemy_type) for _ in range(count)]
+        for i, enemy in enumerate(group):
+            # Spread them over the upper half of the play area
+            enemy.rect.y = (i * 7) % (game.HEIGHT // 2)
+        elapsed = 0
+        for frame in range(frames):
+            start = time.perf_counter()
+            for enemy in group:
+                enemy.update()
+            elapsed += time.perf_counter() - start
+            # Bullets fired this frame are not part of the measurement
+            game.all_sprites.empty()
+            game.enemy_bullets.empty()
+        calls = count * frames
+        total_time += elapsed
+        total_calls += calls
+        print(f"  {enemy_type:<18}{elapsed / calls * 1e6:8.2f} us")
+    print(f"  {'all':<18}{total_time / total_calls * 1e6:8.2f} us")
+    clear_world()
+
+def bench_enemy_spawn(count=2000):
+    """Enemies spawned per millisecond, constructing vs cloning a prototype."""
+    print(f"Enemy spawning ({count} per archetype)")
+    game.enemy_prototypes.clear()
+    for label, spawn in (("Enemy()", game.Enemy), ("prototype", game.enemy_prototypes.spawn)):
+        start = time.perf_counter()
+        for enemy_type in ENEMY_TYPES:
+            for _ in range(count):
+                spawn(enemy_type)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<18}{count * len(ENEMY_TYPES) / (elapsed * 1000):8.1f} enemies/ms")
+
+def bench_wave_transition(rounds=300):
+    """Cost of the frame that clears a wave, building the next one then vs ahead of time.
+
+    The heap is frozen first, as the game does after loading, and the full
+    collection each transition makes is timed on its own."""
+    print(f"Wave transition frame ({rounds} transitions)")
+    policy = game.gc_policy
+    collections = []
+    real_collect = policy.collect
+    policy.collect = lambda reason: collections.append(real_collect(reason) / 1000)
+    policy.freeze()
+    try:
+        for label, prepare in (("built on clear", False), ("prepared", True)):
+            times = []
+            collections.clear()
+            with redirect_stdout(io.StringIO()):
+                for i in range(rounds):
+                    clear_world()
+                    game.wave_director.reset()
+                    # Cycle through the sectors and waves, including boss waves
+                    game.game_state.sector = i % 6 + 1
+                    game.game_state.wave = i % 5 + 1
+                    game.game_state.wave_enemies = 15
+                    game.game_state.boss_fight = False
+                    if prepare:
+                        game.wave_director.prepare()
+                    start = time.perf_counter()
+                    game.wave_director.update()
+                    times.append(time.perf_counter() - start)
+            # Without the collection, which is the same either way
+            work = [elapsed - collected for elapsed, collected in zip(times, collections)]
+            print(f"  {label:<18}mean {sum(work) / len(work) * 1e6:8.1f} us   max {max(work) * 1e6:8.1f} us"
+                  f"   + collection mean {sum(collections) / len(collections) * 1e6:7.1f} us"
+                  f"   max {max(collections) * 1e6:7.1f} us")
+    finally:
+        del policy.collect
+        gc.unfreeze()
+    clear_world()
+
+def bench_lod(count=15, frames=90, rounds=20):
+    """Frame cost of a freshly spawned wave with and without level of detail."""
+    print(f"Fresh wave of {count} over {frames} frames")
+    for label, lod in (("all full AI", False), ("level of detail", True)):
+        elapsed = 0
+        full = cheap = 0
+        for r in range(rounds):
+            clear_world()
+            scheduler = game.LodScheduler(game.lod_scheduler.view)
+            for i in range(count):
+                enemy = game.enemy_prototypes.spawn(ENEMY_TYPES[i % len(ENEMY_TYPES)])
+                enemy.rect.bottom = -20 - (i * 9) % 130
+                game.all_sprites.add(enemy)
+                game.enemies.add(enemy)
+            for frame in range(frames):
+                start = time.perf_counter()
+                if lod:
+                    game.enemy_swarm.update(game.pygame.time.get_ticks())
+                    scheduler.update(game.enemies)
+                else:
+                    game.enemies.update()
+                elapsed += time.perf_counter() - start
+                full += scheduler.full_updates
+                cheap += scheduler.cheap_updates
+        per_frame = frames * rounds
+        counts = f"   full {full / per_frame:5.1f}  cheap {cheap / per_frame:5.1f} per frame" if lod else ""
+        print(f"  {label:<18}{elapsed / per_frame * 1e6:8.1f} us/frame{counts}")
+    clear_world()
+
+def bench_ai(frames=300, budget_us=100):
+    """Per-frame cost of AI decisions for crowds of enemies, all at once vs time-sliced."""
+    print(f"AI decisions over {frames} frames (budget {budget_us} us)")
+    for count in (20, 100, 400):
+        clear_world()
+        for i in range(count):
+            enemy = game.enemy_prototypes.spawn(ENEMY_TYPES[i % len(ENEMY_TYPES)])
+            enemy.lod_active = True
+            enemy.rect.y = (i * 7) % (game.HEIGHT // 2)
+            game.enemies.add(enemy)
+        for label, budget in (("every frame", 1e9), ("time-sliced", budget_us)):
+            scheduler = game.AiScheduler(budget)
+            times = []
+            thinks = 0
+            with redirect_stdout(io.StringIO()):
+                for frame in range(frames):
+                    scheduler.update((game.enemies, game.bosses))
+                    times.append(scheduler.elapsed_us)
+                    thinks += scheduler.thinks
+            times.sort()
+            p99 = times[int(len(times) * 0.99)]
+            print(f"  {count:4d} {label:<13}mean {sum(times) / frames:7.1f} us   p99 {p99:7.1f} us"
+                  f"   {thinks / frames:6.1f} decisions/frame")
+    clear_world()
+
+def bench_volley(volleys=3000):
+    """Cost of firing a 7-bullet boss spread, one bullet at a time vs as a batched volley."""
+    print(f"Boss spread volley ({volleys} volleys)")
+    clear_world()
+    boss = game.Boss(1)
+    template = game.Boss.spread_template
+    x, y = boss.rect.centerx, boss.rect.bottom
+    start = time.perf_counter()
+    for _ in range(volleys):
+        for angle in template.pattern.angles:
+            bullet = game.EnemySpreadBullet(x, y, angle, boss, game.PURPLE, 8, 15, 6)
+            game.enemy_bullets.add(bullet)
+            boss.bullets.track((bullet,))
+    single = time.perf_counter() - start
+    clear_world()
+    boss.bullets.despawn()
+    start = time.perf_counter()
+    for _ in range(volleys):
+        game.spawn_volley("enemy", (x, y), template, boss)
+    batched = time.perf_counter() - start
+    print(f"  {'per bullet':<18}{single / volleys * 1e6:8.2f} us/volley")
+    print(f"  {'spawn_volley':<18}{batched / volleys * 1e6:8.2f} us/volley")
+    clear_world()
+
+def bench_boss_bullets(minutes=5, fps=60, bound=200):
+    """Simulate a long boss fight and check the boss's tracked-bullet count stays bounded.
+
+    Returns False if the count drifts from the bullets in play, passes bound,
+    or isn't back to 0 once the boss dies."""
+    print(f"Boss bullet tracking over a {minutes} minute fight")
+    clear_world()
+    frame = 0
+    failures = []
+    real_ticks = game.pygame.time.get_ticks
+    # Run the fight on simulated time so it doesn't take five real minutes
+    game.pygame.time.get_ticks = lambda: frame * 1000 // fps
+    try:
+        boss = game.Boss(6)
+        game.wave_director.activate(boss, 0)
+        peak = 0
+        start = time.perf_counter()
+        for frame in range(minutes * 60 * fps):
+            # Keep the player moving so every pattern gets used
+            game.player.rect.centerx = game.WIDTH // 2 + int(game.WIDTH * 0.4 * math.sin(frame / 200))
+            game.ai_scheduler.update((game.enemies, game.bosses))
+            game.bosses.update()
+            game.enemies.update()
+            game.enemy_bullets.update()
+            game.enemy_bullets.spritecollide(game.player, True)
+            peak = max(peak, len(boss.bullets))
+            if (frame + 1) % (60 * fps) == 0:
+                minute = (frame + 1) // (60 * fps)
+                alive = sum(1 for bullet in game.enemy_bullets if boss.bullets.owns(bullet))
+                print(f"  minute {minute}: tracked {len(boss.bullets):4d}   in play {alive:4d}   peak {peak:4d}")
+                if len(boss.bullets) != alive:
+                    failures.append(f"minute {minute}: {len(boss.bullets)} tracked but {alive} in play")
+        elapsed = time.perf_counter() - start
+        if peak > bound:
+            failures.append(f"peak of {peak} tracked bullets is over {bound}")
+        boss.hit(boss.health)
+        game.enemy_bullets.update()
+        left = sum(1 for bullet in game.enemy_bullets if bullet.tracker is boss.bullets)
+        print(f"  after the boss dies: tracked {len(boss.bullets)}   left in play {left}   ({elapsed:.1f} s simulated run)")
+        if len(boss.bullets) or left:
+            failures.append(f"after the boss dies: {len(boss.bullets)} tracked, {left} left in play")
+    finally:
+        game.pygame.time.get_ticks = real_ticks
+        clear_world()
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    return not failures
+
+def bench_cull(frames=600):
+    """Per-frame cost of off-screen culling: full sweep every frame vs watched groups on a cadence."""
+    print(f"Off-screen culling ({frames} frames)")
+    clear_world()
+    game.all_sprites.add(game.player)
+    for i in range(40):
+        enemy = game.enemy_prototypes.spawn(ENEMY_TYPES[i % len(ENEMY_TYPES)])
+        enemy.rect.y = (i * 13) % (game.HEIGHT // 2)
+        game.all_sprites.add(enemy)
+        game.enemies.add(enemy)
+    for i in range(400):
+        bullet = game.Bullet(i * 7 % game.WIDTH, i * 11 % game.HEIGHT)
+        game.all_sprites.add(bullet)
+        game.bullets.add(bullet)
+
+    def full_sweep():
+        # What ran every frame before: every sprite, hasattr and four bounds tests
+        for sprite in game.all_sprites:
+            if hasattr(sprite, 'rect'):
+                if (sprite.rect.top > game.HEIGHT + 100 or sprite.rect.bottom < -100 or
+                        sprite.rect.right < -100 or sprite.rect.left > game.WIDTH + 100):
+                    sprite.kill()
+
+    every_frame = game.SpriteCuller(interval=1)
+    culler = game.SpriteCuller()
+    for group, bounds in game.sprite_culler.watched:
+        every_frame.watch(group, bounds)
+        culler.watch(group, bounds)
+    for label, cull in (("full sweep", full_sweep), ("watched groups", every_frame.update),
+                        (f"every {culler.interval} frames", culler.update)):
+        start = time.perf_counter()
+        for frame in range(frames):
+            cull()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<18}{elapsed / frames * 1e6:8.2f} us/frame   ({len(game.all_sprites)} sprites)")
+    clear_world()
+
+class SpriteBullet(game.pygame.sprite.Sprite):
+    # What an enemy bullet used to be: a full sprite with its own rect,
+    # updated and drawn through groups
+    def __init__(self, x, y, image):
+        super().__init__()
+        self.image = image
+        self.rect = self.image.get_rect()
+        self.rect.centerx = x
+        self.rect.top = y
+        self.speedx = 0
+        self.speedy = 0
+        self.damage = 5
+
+    def update(self):
+        self.rect.x += self.speedx
+        self.rect.y += self.speedy
+        if self.rect.top > game.HEIGHT or self.rect.bottom < 0:
+            self.kill()
+
+def bench_projectiles(count=2000, frames=300):
+    """Memory and per-frame cost per enemy bullet, sprites in groups vs slotted projectiles in a batch."""
+    print(f"Enemy bullets ({count} in play, {frames} frames)")
+    import tracemalloc
+    clear_world()
+    image = game.shared_surface("enemy_bullet", lambda: game.draw_bullet(game.RED, 5, 15))
+    surface = game.pygame.Surface((game.WIDTH, game.HEIGHT))
+
+    def sprites():
+        group, drawn = game.pygame.sprite.Group(), game.pygame.sprite.Group()
+        for i in range(count):
+            bullet = SpriteBullet(i * 7 % game.WIDTH, i * 11 % game.HEIGHT, image)
+            group.add(bullet)
+            drawn.add(bullet)
+        return group, drawn.update, lambda: group.draw(surface)
+
+    def projectiles():
+        batch = game.ProjectileBatch(game.WIDTH, game.HEIGHT)
+        for i in range(count):
+            bullet = game.EnemyBullet(i * 7 % game.WIDTH, i * 11 % game.HEIGHT)
+            # Standing still keeps the population the same for every frame
+            bullet.speedy = 0
+            batch.add(bullet)
+        return batch, batch.update, lambda: batch.draw(surface)
+
+    for label, build in (("sprites", sprites), ("projectiles", projectiles)):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        world, update, draw = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        start = time.perf_counter()
+        for frame in range(frames):
+            update()
+        updated = time.perf_counter() - start
+        start = time.perf_counter()
+        for frame in range(frames):
+            draw()
+        drawn = time.perf_counter() - start
+        per_bullet = count * frames
+        print(f"  {label:<14}{size / count:7.0f} bytes   update {updated / per_bullet * 1e9:6.0f} ns"
+              f"   draw {drawn / per_bullet * 1e9:6.0f} ns  per bullet")
+        del world
+    clear_world()
+
+def bench_swarm(frames=120):
+    """Per-frame cost of moving basic and elite enemies as sprites vs as an array-backed swarm."""
+    print(f"Basic and elite enemies ({frames} frames)")
+
+    def crowd(count):
+        enemies = []
+        for i in range(count):
+            enemy = game.enemy_prototypes.spawn(("basic", "elite")[i % 2])
+            # Hovering in view, so the crowd stays the same size
+            enemy.speed = 0
+            enemy.lod_active = True
+            enemy.rect.y = (i * 7) % (game.HEIGHT // 2)
+            enemies.append(enemy)
+        return enemies
+
+    def sprites(count):
+        scheduler = game.LodScheduler(game.lod_scheduler.view)
+        group = game.pygame.sprite.Group(crowd(count))
+        return lambda now: scheduler.update(group)
+
+    def swarmed(numpy_rows):
+        def build(count):
+            enemy_swarm = swarm.EnemySwarm(game.WIDTH, game.HEIGHT, numpy_rows=numpy_rows)
+            for enemy in crowd(count):
+                enemy_swarm.add(enemy)
+            return enemy_swarm.update
+        return build
+
+    runs = [("sprites", sprites), ("swarm lists", swarmed(None))]
+    if swarm.numpy is not None:
+        runs.append(("swarm arrays", swarmed(0)))
+    for count in (20, 100, 1000, 5000):
+        results = []
+        for label, build in runs:
+            clear_world()
+            update = build(count)
+            elapsed = 0
+            for frame in range(frames):
+                now = game.pygame.time.get_ticks()
+                start = time.perf_counter()
+                update(now)
+                elapsed += time.perf_counter() - start
+                # Bullets fired are not part of the measurement
+                game.enemy_bullets.empty()
+            results.append(f"{label} {elapsed / frames * 1e3:6.2f} ms")
+        print(f"  {count:5d}   " + "   ".join(results))
+    clear_world()
+
+def bench_horde(frames=180, counts=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000)):
+    """Largest horde that still runs at 60 FPS: full gameplay frames with more and more enemies on screen."""
+    budget = 1000 / game.FPS
+    print(f"Horde capacity ({frames} frames each, budget {budget:.1f} ms at p95)")
+    sustained = 0
+    state = game.game_state
+    saved = (state.sector, state.wave_enemies, state.state)
+    try:
+        state.endless_mode = True
+        state.horde_mode = True
+        state.sector = 7
+        for count in counts:
+            state.wave_enemies = count
+            plan = game.wave_director.plan_horde(count)
+
+            def top_up():
+                # Replace the enemies shot down, hovering in view so the crowd stays the same size
+                while len(game.enemies) < count:
+                    enemy = game.wave_director.spawn_horde(plan[len(game.enemies) % count])
+                    enemy.speed = 0
+                    enemy.rect.y = int(len(game.enemies) * 7919 % (game.HEIGHT // 2))
+                    game.all_sprites.add(enemy)
+                    game.enemies.add(enemy)
+
+            # The first frames are where the crowd enters view
+            times = sorted(run_gameplay_frames(top_up, frames, warmup=30, shoot_every=12))
+            p95 = percentile(times, 0.95)
+            mean = sum(times) / len(times) * 1000
+            print(f"  {count:5d} enemies   mean {mean:6.2f} ms   p95 {p95:6.2f} ms"
+                  f"   ({len(game.enemy_bullets)} enemy bullets, swarm {game.enemy_swarm.backend()})")
+            if p95 > budget:
+                break
+            sustained = count
+        print(f"  sustained at 60 FPS: {sustained} enemies")
+    finally:
+        del state.endless_mode
+        del state.horde_mode
+        state.sector, state.wave_enemies, state.state = saved
+        game.wave_director.reset()
+        clear_world()
+
+# Phases of a gameplay frame, timed by wrapping the functions that run them
+SIM_PHASES = ("ai", "swarm", "sprites", "bullets", "cull", "collide", "waves")
+PHASES = SIM_PHASES + ("sim other", "draw", "hud")
+
+def phase_times(totals, frames, simulate, render):
+    # Milliseconds per frame; whatever the wrapped phases don't account
+    # for is the rest of the frame
+    phases = {phase: totals[phase] / frames * 1000 for phase in SIM_PHASES + ("draw",)}
+    phases["sim other"] = simulate / frames * 1000 - sum(phases[phase] for phase in SIM_PHASES)
+    phases["hud"] = render / frames * 1000 - phases["draw"]
+    return phases
+
+def add_hovering_enemy(i):
+    # A wave-mix enemy that stays in view instead of flying through
+    enemy = game.enemy_prototypes.spawn(game.wave_director.pick_type(random.random()))
+    enemy.speed = 0
+    enemy.rect.x = random.randint(0, game.WIDTH - enemy.rect.width)
+    enemy.rect.y = int(i * 7919 % (game.HEIGHT // 2))
+    game.all_sprites.add(enemy)
+    game.enemies.add(enemy)
+
+def capacity_filler(category, count, base_enemies):
+    """Returns a function that tops the wave up to base_enemies and the category up to count before each frame."""
+    player = game.player
+    enemy_count = base_enemies + count if category == "enemies" else base_enemies
+    if category == "enemy_bullets":
+        def fill_category():
+            for i in range(count - len(game.enemy_bullets)):
+                bullet = game.EnemySpreadBullet(random.randint(0, game.WIDTH), random.randint(0, game.HEIGHT // 2),
+                                                random.uniform(20, 160))
+                game.enemy_bullets.add(bullet)
+    elif category == "drones":
+        player.max_drones = count
+        def fill_category():
+            while len(player.drone_list) < count:
+                player.add_drone()
+    elif category == "homing":
+        homing = []
+        def fill_category():
+            homing[:] = [bullet for bullet in homing if bullet.alive()]
+            while len(homing) < count:
+                bullet = game.HomingBullet(random.randint(0, game.WIDTH), random.randint(game.HEIGHT // 2, game.HEIGHT))
+                homing.append(bullet)
+                game.all_sprites.add(bullet)
+                game.bullets.add(bullet)
+    else:
+        fill_category = None
+
+    def fill():
+        # The normal wave stays in play, so drones and homing bullets have targets
+        while len(game.enemies) < enemy_count:
+            add_hovering_enemy(len(game.enemies))
+        if fill_category is not None:
+            fill_category()
+    return fill
+
+def bench_capacity(frames=90, warmup=30, growth=1.5, limit=100000):
+    """Breaking point per entity category: how many can be added to a normal wave before p95 exceeds the frame budget."""
+    budget = 1000 / game.FPS
+    state = game.game_state
+    saved = (state.sector, state.wave, state.wave_enemies, state.state, game.player.max_drones)
+    timer = frame_metrics.PhaseTimer()
+    starts = {"enemies": 20, "enemy_bullets": 100, "drones": 4, "homing": 20}
+    state.sector, state.wave = 3, 2
+    state.wave_enemies = min(15, 5 + state.sector)
+    print(f"Capacity probe (sector {state.sector} with {state.wave_enemies} enemies, "
+          f"{frames} frames per step, budget {budget:.1f} ms at p95)")
+    breaks = {}
+    try:
+        for owner, name, phase in game.FRAME_PHASES:
+            timer.wrap(owner, name, phase)
+        for category, count in starts.items():
+            sustained = 0
+            while True:
+                random.seed(count)
+                fill = capacity_filler(category, count, state.wave_enemies)
+                # Five shots a second, drones included
+                times = sorted(run_gameplay_frames(fill, frames, warmup, shoot_every=12, timer=timer))
+                p95 = percentile(times, 0.95)
+                print(f"  {category:<14}{count:7d}   p95 {p95:6.2f} ms")
+                if p95 > budget or count >= limit:
+                    totals = timer.totals
+                    # Hitting the limit within budget is no breaking point
+                    breaks[category] = (count, sustained, p95, p95 > budget,
+                                        phase_times(totals, frames, totals["simulate"], totals["render"]))
+                    break
+                sustained = count
+                count = int(count * growth) + 1
+    finally:
+        timer.remove()
+        game.player.drone_list = []
+        state.sector, state.wave, state.wave_enemies, state.state, game.player.max_drones = saved
+        game.wave_director.reset()
+        clear_world()
+    print("  Breaking points")
+    for category, (count, sustained, p95, broke, phases) in breaks.items():
+        if broke:
+            print(f"    {category:<14}breaks at {count:6d}   sustained {sustained:6d}")
+        else:
+            print(f"    {category:<14}limit reached at {count:6d}, no break (p95 {p95:.2f} ms)")
+    print("  Phase times at the breaking point (or the limit), ms per frame")
+    print("    " + " " * 14 + "".join(f"{phase:>10}" for phase in PHASES))
+    for category, (count, sustained, p95, broke, phases) in breaks.items():
+        print(f"    {category:<14}" + "".join(f"{phases[phase]:10.2f}" for phase in PHASES))
+        if broke:
+            slowest = max(PHASES, key=phases.get)
+            print(f"    {'':<14}saturates first: {slowest}")
+
+def bench_gc(count=1000, frames=600):
+    """Collections during a busy fight with the interpreter's default thresholds vs the game's GC policy."""
+    policy = game.gc_policy
+    print(f"Garbage collection over {frames} frames with {count} enemies")
+    state = game.game_state
+    saved = (state.sector, state.wave_enemies, state.state, policy.play_thresholds)
+
+    def fill():
+        while len(game.enemies) < count:
+            add_hovering_enemy(len(game.enemies))
+
+    try:
+        state.sector = 7
+        for label, thresholds, freeze in (("default", policy.default_thresholds, False),
+                                          ("policy", saved[3], True)):
+            random.seed(1)
+            if freeze:
+                policy.freeze()
+            policy.play_thresholds = thresholds
+            policy.play()
+            policy.reset_stats()
+            run_gameplay_frames(fill, frames, shoot_every=12,
+                                begin_frame=policy.begin_frame, end_frame=lambda: policy.end_frame(0))
+            stats = policy.stats()
+            policy.reset_stats()
+            policy.pause("benchmark")
+            gc.unfreeze()
+            gen0, gen1, gen2 = stats["collections"]
+            print(f"  {label:<8} {gen0:4d}/{gen1:3d}/{gen2:2d} collections (gen 0/1/2)   {stats['gc_ms']:7.2f} ms total"
+                  f"   worst {stats['worst_ms']:5.2f} ms   {stats['spikes_with_gc']}/{stats['spikes']} slow frames"
+                  f" had one (r={stats['correlation']:.2f})")
+    finally:
+        state.sector, state.wave_enemies, state.state, policy.play_thresholds = saved
+        game.wave_director.reset()
+        clear_world()
+
+def bench_sampler(count=500, frames=300):
+    """Frame cost of a busy fight with and without the spike sampler running."""
+    print(f"Spike sampler overhead ({count} enemies, {frames} frames)")
+    sampler = game.SpikeSampler(budget_ms=1e9)  # Nothing is slow enough to be written out
+
+    def fill():
+        while len(game.enemies) < count:
+            add_hovering_enemy(len(game.enemies))
+
+    try:
+        for label, sampled in (("off", False), ("on", True)):
+            random.seed(1)
+            if sampled:
+                sampler.start(os.devnull)
+            # The first frames are where the crowd enters view
+            times = sorted(run_gameplay_frames(fill, frames, warmup=60,
+                                               begin_frame=sampler.begin_frame, end_frame=sampler.end_frame))
+            samples = len(sampler.samples)
+            sampler.stop()
+            print(f"  sampler {label:<4} mean {sum(times) / frames * 1000:6.2f} ms"
+                  f"   p95 {percentile(times, 0.95):6.2f} ms   {samples} samples")
+    finally:
+        sampler.stop()
+        game.wave_director.reset()
+        clear_world()
+
+def bench_logging(calls=20000):
+    """Cost on the game thread of a per-frame message: print() (to /dev/null, the cheapest stdout there is) vs the game log."""
+    print(f"Per-frame message cost ({calls} calls)")
+    log = game.log
+    with open(os.devnull, "w") as devnull:
+        start = time.perf_counter()
+        for i in range(calls):
+            print(f"Wave cleared - Sector {i}, Wave {i}", file=devnull, flush=True)
+        results = [("print", time.perf_counter() - start)]
+    start = time.perf_counter()
+    for i in range(calls):
+        log.info("Wave cleared - Sector %d, Wave %d", i, i)
+    results.append(("log, silent", time.perf_counter() - start))
+    game.game_log.configure("info", os.devnull)
+    try:
+        start = time.perf_counter()
+        for i in range(calls):
+            log.info("Wave cleared - Sector %d, Wave %d", i, i)
+        results.append(("log, writing", time.perf_counter() - start))
+    finally:
+        game.game_log.shutdown()
+    for label, elapsed in results:
+        print(f"  {label:<14}{elapsed / calls * 1e6:7.2f} us/call")
+
+BENCHMARKS = {
+    "enemy_update": bench_enemy_update,
+    "enemy_spawn": bench_enemy_spawn,
+    "wave_transition": bench_wave_transition,
+    "lod": bench_lod,
+    "ai": bench_ai,
+    "volley": bench_volley,
+    "boss_bullets": bench_boss_bullets,
+    "cull": bench_cull,
+    "projectiles": bench_projectiles,
+    "swarm": bench_swarm,
+    "horde": bench_horde,
+    "capacity": bench_capacity,
+    "gc": bench_gc,
+    "sampler": bench_sampler,
+    "logging": bench_logging,
+}
+
+def main(names):
+    # Benchmarks that check something return False when the check fails
+    failed = [name for name in names or BENCHMARKS if BENCHMARKS[name]() is False]
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
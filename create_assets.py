@@ -3,6 +3,10 @@ import os
 import math
 import random
 
+import game_log
+
+log = game_log.get_logger("assets")
+
 # Initialize pygame
 pygame.init()
 
@@ -519,106 +523,110 @@ def generate_assets():
     # Player ship
     player_ship = create_player_ship()
     pygame.image.save(player_ship, "assets/images/player_ship.png")
-    print("Created player_ship.png")
+    log.info("Created player_ship.png")
     
     # Drone
     drone = create_drone()
     pygame.image.save(drone, "assets/images/drone.png")
-    print("Created drone.png")
+    log.info("Created drone.png")
     
     # Shield bearer enemy
     shield_bearer = create_shield_bearer()
     pygame.image.save(shield_bearer, "assets/images/shield_bearer.png")
-    print("Created shield_bearer.png")
+    log.info("Created shield_bearer.png")
     
     # Energy sapper enemy
     energy_sapper = create_energy_sapper()
     pygame.image.save(energy_sapper, "assets/images/energy_sapper.png")
-    print("Created energy_sapper.png")
+    log.info("Created energy_sapper.png")
     
     # Blade spinner enemy
     blade_spinner = create_blade_spinner()
     pygame.image.save(blade_spinner, "assets/images/blade_spinner.png")
-    print("Created blade_spinner.png")
+    log.info("Created blade_spinner.png")
     
     # Boss assets
     # Sector 1 boss
     edge_guardian = create_edge_guardian()
     pygame.image.save(edge_guardian, "assets/images/boss_1.png")
-    print("Created boss_1.png (Edge Guardian)")
+    log.info("Created boss_1.png (Edge Guardian)")
     
     # Sector 2 boss
     asteroid_titan = create_asteroid_titan()
     pygame.image.save(asteroid_titan, "assets/images/boss_2.png")
-    print("Created boss_2.png (Asteroid Titan)")
+    log.info("Created boss_2.png (Asteroid Titan)")
     
     # Sector 3 boss
     rhovax_dreadnought = create_rhovax_dreadnought()
     pygame.image.save(rhovax_dreadnought, "assets/images/boss_3.png")
-    print("Created boss_3.png (Rhovax Dreadnought)")
+    log.info("Created boss_3.png (Rhovax Dreadnought)")
     
     # Sector 4 boss
     shipyard_sentinel = create_shipyard_sentinel()
     pygame.image.save(shipyard_sentinel, "assets/images/boss_4.png")
-    print("Created boss_4.png (Shipyard Sentinel)")
+    log.info("Created boss_4.png (Shipyard Sentinel)")
     
     # Sector 5 boss
     storm_lord = create_storm_lord()
     pygame.image.save(storm_lord, "assets/images/boss_5.png")
-    print("Created boss_5.png (Storm Lord)")
+    log.info("Created boss_5.png (Storm Lord)")
     
     # Sector 6 boss (final boss)
     dominion_mothership = create_dominion_mothership()
     pygame.image.save(dominion_mothership, "assets/images/boss_6.png")
-    print("Created boss_6.png (Dominion Mothership)")
+    log.info("Created boss_6.png (Dominion Mothership)")
     
     # Bullet assets
     normal_bullet = create_normal_bullet()
     pygame.image.save(normal_bullet, "assets/images/bullet.png")
-    print("Created bullet.png")
+    log.info("Created bullet.png")
     
     spread_bullet = create_spread_bullet()
     pygame.image.save(spread_bullet, "assets/images/spread_bullet.png")
-    print("Created spread_bullet.png")
+    log.info("Created spread_bullet.png")
     
     bouncing_bullet = create_bouncing_bullet()
     pygame.image.save(bouncing_bullet, "assets/images/bouncing_bullet.png")
-    print("Created bouncing_bullet.png")
+    log.info("Created bouncing_bullet.png")
     
     homing_bullet = create_homing_bullet()
     pygame.image.save(homing_bullet, "assets/images/homing_bullet.png")
-    print("Created homing_bullet.png")
+    log.info("Created homing_bullet.png")
     
     enemy_bullet = create_enemy_bullet()
     pygame.image.save(enemy_bullet, "assets/images/enemy_bullet.png")
-    print("Created enemy_bullet.png")
+    log.info("Created enemy_bullet.png")
     
     enemy_spread_bullet = create_enemy_spread_bullet()
     pygame.image.save(enemy_spread_bullet, "assets/images/enemy_spread_bullet.png")
-    print("Created enemy_spread_bullet.png")
+    log.info("Created enemy_spread_bullet.png")
     
     # Power-up assets
     health_powerup = create_health_powerup()
     pygame.image.save(health_powerup, "assets/images/health_powerup.png")
-    print("Created health_powerup.png")
+    log.info("Created health_powerup.png")
     
     shield_powerup = create_shield_powerup()
     pygame.image.save(shield_powerup, "assets/images/shield_powerup.png")
-    print("Created shield_powerup.png")
+    log.info("Created shield_powerup.png")
     
     weapon_powerup = create_weapon_powerup()
     pygame.image.save(weapon_powerup, "assets/images/weapon_powerup.png")
-    print("Created weapon_powerup.png")
+    log.info("Created weapon_powerup.png")
     
     drone_powerup = create_drone_powerup()
     pygame.image.save(drone_powerup, "assets/images/drone_powerup.png")
-    print("Created drone_powerup.png")
+    log.info("Created drone_powerup.png")
     
     # Create placeholder sound effects
     create_laser_sound()
-    print("Created laser.wav")
+    log.info("Created laser.wav")
     
-    print("All assets generated successfully!")
+    log.info("All assets generated successfully!")
 
+if __name__ == "__main__":
+    # Run on its own: show what was created
+    game_log.configure("info")
 generate_assets()
 pygame.quit()
+game_log.shutdown()
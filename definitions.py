@@ -0,0 +1,154 @@
+import json
+import os
+from collections import namedtuple
+from types import MappingProxyType
+
+# Enemy, boss and mini-boss balance lives in definitions.json.
+# The file is parsed and validated once and compiled into read-only stat
+# tables per difficulty, so spawning only has to look up a row.
+
+DIFFICULTIES = ("easy", "normal", "hard")
+DEFINITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "definitions.json")
+SHAPES = ("polygon", "circle", "rect", "ellipse", "star")
+
+# Placeholder art drawn when an image file can't be loaded
+Fallback = namedtuple("Fallback", "size shapes")
+Shape = namedtuple("Shape", "kind color geometry")
+
+EnemyStats = namedtuple("EnemyStats", "image fallback health min_speed max_speed sector_speed shoot_delay score_value")
+BossStats = namedtuple("BossStats", "name images fallback max_health shoot_delay base_speed speed_per_sector speed_multiplier score_per_sector")
+GoliathStats = namedtuple("GoliathStats", "max_health speedx speedy shoot_delay shield_health shield_regen_rate score_value")
+Definitions = namedtuple("Definitions", "enemies bosses barrier_goliath")
+
+def require(data, key, where, kind=None):
+    if not isinstance(data, dict) or key not in data:
+        raise ValueError(f"{where}: missing '{key}'")
+    value = data[key]
+    if kind is not None and (not isinstance(value, kind) or isinstance(value, bool)):
+        raise ValueError(f"{where}.{key}: expected {kind.__name__ if isinstance(kind, type) else 'number'}, got {value!r}")
+    return value
+
+def number(data, key, where, positive=True):
+    value = require(data, key, where, (int, float))
+    if positive and value <= 0:
+        raise ValueError(f"{where}.{key}: must be positive, got {value!r}")
+    return value
+
+def per_difficulty(data, key, where):
+    table = require(data, key, where, dict)
+    if set(table) != set(DIFFICULTIES):
+        raise ValueError(f"{where}.{key}: expected entries for {', '.join(DIFFICULTIES)}")
+    return {difficulty: number(table, difficulty, f"{where}.{key}") for difficulty in DIFFICULTIES}
+
+def point(value, where):
+    if not isinstance(value, list) or len(value) != 2 or not all(isinstance(v, (int, float)) for v in value):
+        raise ValueError(f"{where}: expected [x, y], got {value!r}")
+    return tuple(value)
+
+def parse_fallback(data, where):
+    fallback = require(data, "fallback", where, dict)
+    where = f"{where}.fallback"
+    size = point(require(fallback, "size", where), f"{where}.size")
+    shapes = []
+    for i, shape in enumerate(require(fallback, "shapes", where, list)):
+        at = f"{where}.shapes[{i}]"
+        kind = require(shape, "shape", at, str)
+        if kind not in SHAPES:
+            raise ValueError(f"{at}.shape: unknown shape {kind!r}")
+        color = require(shape, "color", at, list)
+        if len(color) != 3 or not all(isinstance(c, int) and 0 <= c <= 255 for c in color):
+            raise ValueError(f"{at}.color: expected [r, g, b], got {color!r}")
+        if kind == "polygon":
+            geometry = tuple(point(p, f"{at}.points") for p in require(shape, "points", at, list))
+        elif kind == "circle":
+            geometry = (point(require(shape, "center", at), f"{at}.center"), number(shape, "radius", at))
+        elif kind == "star":
+            geometry = (point(require(shape, "center", at), f"{at}.center"), require(shape, "points", at, int),
+                        number(shape, "outer", at), number(shape, "inner", at))
+        else:
+            rect = require(shape, "rect", at, list)
+            if len(rect) != 4:
+                raise ValueError(f"{at}.rect: expected [x, y, w, h], got {rect!r}")
+            geometry = tuple(rect)
+        shapes.append(Shape(kind, tuple(color), geometry))
+    return Fallback(size, tuple(shapes))
+
+def compile_enemies(data):
+    speed = require(data, "enemy_speed", "definitions", dict)
+    min_speed = number(speed, "min", "enemy_speed")
+    max_speed = number(speed, "max", "enemy_speed")
+    per_sector = number(speed, "per_sector", "enemy_speed", positive=False)
+    speed_mult = per_difficulty(speed, "difficulty_multiplier", "enemy_speed")
+
+    tables = {difficulty: {} for difficulty in DIFFICULTIES}
+    for enemy_type, enemy in require(data, "enemies", "definitions", dict).items():
+        where = f"enemies.{enemy_type}"
+        image = require(enemy, "image", where, str)
+        fallback = parse_fallback(enemy, where)
+        health = per_difficulty(enemy, "health", where)
+        scale = number(enemy, "speed_scale", where)
+        shoot_delay = require(enemy, "shoot_delay", where, int)
+        score = require(enemy, "score", where, int)
+        for difficulty in DIFFICULTIES:
+            mult = speed_mult[difficulty] * scale
+            tables[difficulty][enemy_type] = EnemyStats(
+                image, fallback, health[difficulty],
+                min_speed * mult, max_speed * mult, per_sector * mult,
+                shoot_delay, score)
+    return MappingProxyType({d: MappingProxyType(t) for d, t in tables.items()})
+
+def compile_bosses(data):
+    bosses = require(data, "bosses", "definitions", dict)
+    mults = per_difficulty(bosses, "difficulty_multiplier", "bosses")
+    images = tuple(require(bosses, "images", "bosses", list))
+    base_speed = number(bosses, "base_speed", "bosses")
+    speed_per_sector = number(bosses, "speed_per_sector", "bosses", positive=False)
+    score_per_sector = require(bosses, "score_per_sector", "bosses", int)
+    sectors = require(bosses, "sectors", "bosses", list)
+    if not sectors:
+        raise ValueError("bosses.sectors: at least one boss is required")
+
+    tables = {}
+    for difficulty in DIFFICULTIES:
+        mult = mults[difficulty]
+        rows = []
+        for i, boss in enumerate(sectors):
+            where = f"bosses.sectors[{i}]"
+            rows.append(BossStats(
+                require(boss, "name", where, str), images, parse_fallback(boss, where),
+                int(number(boss, "health", where) * mult),
+                int(number(boss, "shoot_delay", where) / mult),  # Shorter delay = faster shooting on higher difficulties
+                base_speed, speed_per_sector, mult, score_per_sector))
+        tables[difficulty] = tuple(rows)
+    return MappingProxyType(tables)
+
+def compile_barrier_goliath(data):
+    goliath = require(data, "barrier_goliath", "definitions", dict)
+    where = "barrier_goliath"
+    mults = per_difficulty(goliath, "difficulty_multiplier", where)
+    health = number(goliath, "health", where)
+    speed = number(goliath, "speed", where)
+    shoot_delay = number(goliath, "shoot_delay", where)
+    shield = number(goliath, "shield_health", where)
+    regen = number(goliath, "shield_regen_rate", where)
+    score = require(goliath, "score", where, int)
+    return MappingProxyType({
+        difficulty: GoliathStats(health * mult, speed * mult, speed * mult, shoot_delay // mult,
+                                 shield * mult, regen * mult, score)
+        for difficulty, mult in mults.items()
+    })
+
+def load_definitions(path=DEFINITIONS_FILE):
+    """Parse and validate a definitions file into per-difficulty stat tables."""
+    with open(path) as f:
+        data = json.load(f)
+    return Definitions(compile_enemies(data), compile_bosses(data), compile_barrier_goliath(data))
+
+_definitions = None
+
+def get_definitions():
+    # Loaded on first use and shared by every module afterwards
+    global _definitions
+    if _definitions is None:
+        _definitions = load_definitions()
+    return _definitions
@@ -0,0 +1,76 @@
+import pygame
+
+# Registry of pre-baked overlay surfaces for per-frame visual effects.
+# Each effect registers a bake function that builds its surfaces (one per fade
+# level) for a given sprite size. Surfaces are baked once per size and blitted
+# from cache afterwards, so drawing an effect does not allocate anything.
+class EffectRegistry:
+    def __init__(self):
+        self.bakers = {}
+        self.cache = {}
+        self.stats_hooks = []
+        self.total_allocations = 0
+        self.frame_allocations = 0
+        self.frame_blits = 0
+        self.last_frame = {"allocations": 0, "blits": 0}
+
+    def register(self, name, bake):
+        # bake(size) must return a list of surfaces
+        self.bakers[name] = bake
+
+    def frames(self, name, size):
+        key = (name, tuple(size))
+        frames = self.cache.get(key)
+        if frames is None:
+            frames = self.bakers[name](tuple(size))
+            self.cache[key] = frames
+            self.frame_allocations += len(frames)
+            self.total_allocations += len(frames)
+        return frames
+
+    def blit(self, surface, image, center):
+        # Blit a baked surface centered on the given point
+        rect = image.get_rect(center=center)
+        surface.blit(image, rect)
+        self.frame_blits += 1
+
+    def draw(self, surface, name, size, center, level=0):
+        self.blit(surface, self.frames(name, size)[level], center)
+
+    def add_stats_hook(self, hook):
+        # hook(stats) is called at the end of every frame that drew an effect
+        self.stats_hooks.append(hook)
+
+    def end_frame(self):
+        self.last_frame = {"allocations": self.frame_allocations, "blits": self.frame_blits}
+        if self.frame_blits:
+            for hook in self.stats_hooks:
+                hook(self.last_frame)
+        self.frame_allocations = 0
+        self.frame_blits = 0
+        return self.last_frame
+
+    def stats(self):
+        return {
+            "effects": len(self.bakers),
+            "cached_sizes": len(self.cache),
+            "total_allocations": self.total_allocations,
+            "last_frame": self.last_frame,
+        }
+
+# Common bake functions
+def bake_fades(size, color, alphas):
+    """Solid overlays of the given size, one per alpha level."""
+    surfaces = []
+    for alpha in alphas:
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        surface.fill((color[0], color[1], color[2], alpha))
+        surfaces.append(surface)
+    return surfaces
+
+def bake_ring(radius, color, width):
+    """A single ring outline centered on its own surface."""
+    size = radius * 2 + 2
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (size // 2, size // 2), radius, width)
+    return [surface]
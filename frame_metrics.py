@@ -0,0 +1,175 @@
+import csv
+import gc
+import io
+import json
+import struct
+import time
+
+from game_log import get_logger
+
+log = get_logger("metrics")
+
+# Timing and counting of game functions.
+# wrap() replaces a function or method with one that adds the time spent in
+# it to a phase total and/or a measure of its result (e.g. len) to a
+# counter; remove() puts everything back. Instance methods are wrapped by
+# shadowing them on the instance, module functions by replacing them.
+class PhaseTimer:
+    def __init__(self):
+        self.totals = {}
+        self.counters = {}
+        self.patches = []
+
+    def wrap(self, owner, name, phase=None, counter=None, measure=len):
+        original = getattr(owner, name)
+        totals = self.totals
+        counters = self.counters
+        if phase is not None:
+            totals.setdefault(phase, 0.0)
+        if counter is not None:
+            counters.setdefault(counter, 0)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                if phase is not None:
+                    totals[phase] += time.perf_counter() - start
+            if counter is not None:
+                counters[counter] += measure(result)
+            return result
+        self.patches.append((owner, name, original if name in vars(owner) else None))
+        setattr(owner, name, timed)
+
+    def remove(self):
+        for owner, name, original in reversed(self.patches):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.patches = []
+
+    def reset(self):
+        for phase in self.totals:
+            self.totals[phase] = 0.0
+        for counter in self.counters:
+            self.counters[counter] = 0
+
+# Per-frame metrics recorder.
+# Started with --metrics FILE, it records one row per gameplay frame: frame
+# time, the time in each phase, sprite counts per group, collision hits,
+# sector and wave, and garbage collections. Rows are packed into a memory
+# buffer and written out in large chunks, so recording doesn't add disk
+# I/O to individual frames.
+#
+# A FILE ending in .csv gets a header row and one CSV row per frame.
+# Anything else is binary: a text line "xbacab-metrics 1", a JSON line with
+# the field names and struct format, then fixed-size little-endian records.
+# analyze_metrics.py reads both.
+MAGIC = "xbacab-metrics 1"
+
+# Flags packed into each record
+BOSS_FIGHT = 1
+ENDLESS = 2
+HORDE = 4
+
+class FrameMetrics:
+    flush_bytes = 256 * 1024  # Buffered before each write
+
+    def __init__(self, phases, hits, groups, state):
+        self.phases = phases  # (owner, name, phase) timed each frame
+        self.hits = hits  # (owner, name, counter, measure) counted each frame
+        self.groups = groups  # Name -> group (anything with len())
+        self.state = state  # Returns (sector, wave, flags)
+        self.file = None
+        self.timer = PhaseTimer()
+        self.frame = 0
+        self.frame_start = None
+        self.started = 0
+        self.gc_started = None
+        self.gc_count = 0
+        self.gc_ms = 0.0
+
+    def fields(self):
+        return (["frame", "time_ms", "frame_ms"] + [phase + "_ms" for phase in self.timer.totals] +
+                list(self.groups) + list(self.timer.counters) + ["sector", "wave", "flags", "gc_collections", "gc_ms"])
+
+    def start(self, path):
+        for owner, name, phase in self.phases:
+            self.timer.wrap(owner, name, phase=phase)
+        for owner, name, counter, measure in self.hits:
+            self.timer.wrap(owner, name, counter=counter, measure=measure)
+        fields = self.fields()
+        self.csv = path.endswith(".csv")
+        if self.csv:
+            self.file = open(path, "w", newline="")
+            self.buffer = io.StringIO()
+            self.writer = csv.writer(self.buffer)
+            self.writer.writerow(fields)
+        else:
+            # Times and the garbage collection time are floats, everything else counts
+            floats = {"frame_ms", "gc_ms"} | {phase + "_ms" for phase in self.timer.totals}
+            self.format = "<" + "".join("f" if field in floats else "I" for field in fields)
+            self.file = open(path, "wb")
+            self.buffer = bytearray()
+            self.file.write(f"{MAGIC}\n".encode())
+            self.file.write((json.dumps({"fields": fields, "format": self.format}) + "\n").encode())
+        self.started = time.perf_counter()
+        gc.callbacks.append(self.on_gc)
+        log.info("Recording frame metrics to %s", path)
+
+    def stop(self):
+        if self.file is None:
+            return
+        gc.callbacks.remove(self.on_gc)
+        self.timer.remove()
+        self.flush()
+        self.file.close()
+        self.file = None
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        elif self.gc_started is not None:
+            self.gc_count += 1
+            self.gc_ms += (time.perf_counter() - self.gc_started) * 1000
+            self.gc_started = None
+
+    def begin_frame(self):
+        if self.file is None:
+            return
+        self.timer.reset()
+        self.gc_count = 0
+        self.gc_ms = 0.0
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.file is None or self.frame_start is None:
+            return
+        end = time.perf_counter()
+        self.frame += 1
+        row = [self.frame, int((end - self.started) * 1000), (end - self.frame_start) * 1000]
+        row.extend(total * 1000 for total in self.timer.totals.values())
+        row.extend(len(group) for group in self.groups.values())
+        row.extend(self.timer.counters.values())
+        row.extend(self.state())
+        row.append(self.gc_count)
+        row.append(self.gc_ms)
+        self.frame_start = None
+        if self.csv:
+            self.writer.writerow([round(value, 3) if isinstance(value, float) else value for value in row])
+            if self.buffer.tell() >= self.flush_bytes:
+                self.flush()
+        else:
+            self.buffer += struct.pack(self.format, *row)
+            if len(self.buffer) >= self.flush_bytes:
+                self.flush()
+
+    def flush(self):
+        if self.csv:
+            self.file.write(self.buffer.getvalue())
+            self.buffer.seek(0)
+            self.buffer.truncate()
+        else:
+            self.file.write(self.buffer)
+            self.buffer.clear()
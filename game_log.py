@@ -0,0 +1,99 @@
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Game logging
+# Every module logs through a child of the "xbacab" logger. It is silent
+# until configure() is called (--log LEVEL): below CRITICAL every call
+# returns straight away, so logging on the frame path costs next to nothing.
+#
+# Once configured, the game thread never writes to the console itself. It
+# puts records on a bounded queue and a background QueueListener formats and
+# writes them; when the queue is full the record is dropped (and counted)
+# instead of stalling the frame. Messages are rate limited per format
+# string, so a message logged every frame can't flood the queue either.
+LOGGER_NAME = "xbacab"
+
+def get_logger(name=None):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+# Silent by default, and never handed to the root logger's handlers
+_root = get_logger()
+_root.addHandler(logging.NullHandler())
+_root.setLevel(logging.CRITICAL + 1)
+_root.propagate = False
+
+class RateLimitFilter(logging.Filter):
+    """At most burst records per message per interval seconds."""
+    def __init__(self, interval=5.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.windows = {}  # (logger, format string) -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        window = self.windows.get(key)
+        if window is None or record.created - window[0] >= self.interval:
+            suppressed = window[2] if window else 0
+            self.windows[key] = [record.created, 1, 0]
+            if suppressed:
+                record.msg = f"{record.msg} ({suppressed} more suppressed)"
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+class DroppingQueueHandler(QueueHandler):
+    # Hands records to the writer thread without ever blocking the game
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting is left to the writer thread; only tracebacks have to be
+        # rendered here, while the exception is still around
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_handler = None
+_listener = None
+
+def configure(level="info", path=None, queue_size=1024):
+    """Start writing game log messages of level and above to path, or stdout."""
+    global _handler, _listener
+    shutdown()
+    target = logging.FileHandler(path) if path else logging.StreamHandler(sys.stdout)
+    target.setFormatter(logging.Formatter("%(relativeCreated)9.0f %(levelname)-7s %(name)s: %(message)s"))
+    _handler = DroppingQueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(RateLimitFilter())
+    _listener = QueueListener(_handler.queue, target)
+    _listener.start()
+    _root.addHandler(_handler)
+    _root.setLevel(level.upper() if isinstance(level, str) else level)
+
+def shutdown():
+    # Flush what's queued and go back to silent
+    global _handler, _listener
+    if _listener is None:
+        return
+    _root.removeHandler(_handler)
+    _root.setLevel(logging.CRITICAL + 1)
+    _listener.stop()
+    target = _listener.handlers[0]
+    if _handler.dropped:
+        target.handle(logging.makeLogRecord({"name": LOGGER_NAME, "levelno": logging.WARNING, "levelname": "WARNING",
+                                             "msg": f"{_handler.dropped} log messages dropped, queue was full"}))
+    target.close()
+    _handler = None
+    _listener = None
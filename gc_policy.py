@@ -0,0 +1,142 @@
+import gc
+import time
+
+from game_log import get_logger
+
+log = get_logger("gc")
+
+# Garbage collection fitted to the game loop.
+# Bullets, text surfaces and temporary lists are allocated every frame, and
+# CPython's cycle collector runs whenever enough of them pile up - in the
+# middle of a fight as often as anywhere else. The policy:
+# - freezes everything alive after loading (images, prototypes, definitions,
+#   screens) so collections never walk it again,
+# - raises the collection thresholds while playing, so automatic collections
+#   are rare and only ever the young generations,
+# - collects fully at natural pauses: wave transitions, the shop and menus.
+# Every collection is timed through gc.callbacks, and while playing the
+# policy reports how long they took and how many slow frames had one.
+class GcPolicy:
+    report_interval = 5000  # Milliseconds between reports while playing
+
+    def __init__(self, budget_ms=1000 / 60, play_thresholds=(20000, 50, 1000)):
+        self.budget_ms = budget_ms  # Frames slower than this count as spikes
+        self.play_thresholds = play_thresholds  # None disables automatic collection in play
+        self.default_thresholds = gc.get_threshold()
+        self.playing = False
+        self.started = None  # When the running collection started
+        self.planned = False  # True during collections at pauses
+        self.frame_start = None
+        self.frame_gc_ms = 0  # Collection time in the current frame
+        self.last_report = 0
+        self.reset_stats()
+        gc.callbacks.append(self.on_gc)
+
+    def reset_stats(self):
+        self.collections = [0, 0, 0]  # Per generation
+        self.gc_ms = 0
+        self.worst_ms = 0
+        self.frame_times = []  # (frame ms, collection ms) per frame
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            elapsed = (time.perf_counter() - self.started) * 1000
+            self.started = None
+            if self.planned or not self.playing:
+                return  # Only unplanned collections during play are of interest
+            self.collections[info["generation"]] += 1
+            self.gc_ms += elapsed
+            self.worst_ms = max(self.worst_ms, elapsed)
+            self.frame_gc_ms += elapsed
+
+    def freeze(self):
+        """Move everything alive now out of reach of the collector, once loading is done."""
+        gc.collect()
+        gc.freeze()
+        log.info("GC: froze %d objects after load", gc.get_freeze_count())
+
+    def play(self):
+        # Gameplay (re)starts: collections only when they can't be avoided
+        self.playing = True
+        self.frame_start = None
+        if self.play_thresholds is None:
+            gc.disable()
+        else:
+            gc.set_threshold(*self.play_thresholds)
+
+    def pause(self, reason):
+        """Back to normal collection and clear the backlog while nothing is moving."""
+        if self.playing:
+            self.report()
+        self.playing = False
+        self.frame_start = None
+        gc.set_threshold(*self.default_thresholds)
+        gc.enable()
+        self.collect(reason)
+
+    def collect(self, reason):
+        # Full collection at a pause in the action, e.g. between waves
+        # Planned collections are kept out of the play stats
+        self.planned = True
+        start = time.perf_counter()
+        try:
+            found = gc.collect()
+        finally:
+            self.planned = False
+        elapsed = (time.perf_counter() - start) * 1000
+        log.debug("GC at %s: %.1f ms, %d unreachable objects", reason, elapsed, found)
+        return elapsed
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        self.frame_gc_ms = 0
+
+    def end_frame(self, now):
+        if self.frame_start is None:
+            return
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.frame_times.append((frame_ms, self.frame_gc_ms))
+        self.frame_start = None
+        if now - self.last_report > self.report_interval:
+            self.report()
+            self.last_report = now
+
+    def correlation(self):
+        """Pearson correlation between frame time and collection time per frame."""
+        count = len(self.frame_times)
+        if count < 2:
+            return 0.0
+        mean_frame = sum(frame for frame, pause in self.frame_times) / count
+        mean_pause = sum(pause for frame, pause in self.frame_times) / count
+        covariance = var_frame = var_pause = 0.0
+        for frame, pause in self.frame_times:
+            covariance += (frame - mean_frame) * (pause - mean_pause)
+            var_frame += (frame - mean_frame) ** 2
+            var_pause += (pause - mean_pause) ** 2
+        if not var_frame or not var_pause:
+            return 0.0
+        return covariance / (var_frame * var_pause) ** 0.5
+
+    def stats(self):
+        spikes = [(frame, pause) for frame, pause in self.frame_times if frame > self.budget_ms]
+        return {
+            "collections": list(self.collections),
+            "gc_ms": self.gc_ms,
+            "worst_ms": self.worst_ms,
+            "frames": len(self.frame_times),
+            "spikes": len(spikes),
+            "spikes_with_gc": sum(1 for frame, pause in spikes if pause > 0),
+            "correlation": self.correlation(),
+        }
+
+    def report(self):
+        # Only worth a line if something was collected during play
+        if sum(self.collections):
+            stats = self.stats()
+            gen0, gen1, gen2 = stats["collections"]
+            log.info("GC in play: %d/%d/%d collections (gen 0/1/2), %.1f ms total, worst %.1f ms; "
+                     "%d of %d slow frames had a collection (r=%.2f)", gen0, gen1, gen2, stats["gc_ms"],
+                     stats["worst_ms"], stats["spikes_with_gc"], stats["spikes"], stats["correlation"])
+        self.reset_stats()
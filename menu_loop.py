@@ -0,0 +1,75 @@
+import pygame
+from pygame.locals import NOEVENT, MOUSEMOTION
+
+# Event-driven redraw control for idle menus.
+# Instead of spinning at the game frame rate, a menu blocks on
+# pygame.event.wait() and only redraws when input arrives, the hovered
+# button changes or an animation tick is due.
+class IdleMenu:
+    def __init__(self, offset=(0, 0), timeout=500, animation_ms=None):
+        self.offset = offset  # Screen position of the surface the buttons are drawn on
+        self.timeout = timeout  # Longest time to block before waking up
+        self.animation_ms = animation_ms  # Redraw interval for animated menus (None = static)
+        self.hover_rects = []
+        self.hover = None
+        self.dirty = True
+        self.last_redraw = 0
+        self.redraws = 0
+        self.wakeups = 0
+
+    def invalidate(self):
+        # Force a redraw, e.g. after returning from a nested menu
+        self.dirty = True
+
+    def wait(self):
+        """Block until there is input or a tick is due, and return pending events."""
+        if self.dirty:
+            return pygame.event.get()
+
+        timeout = self.timeout
+        if self.animation_ms is not None:
+            timeout = min(timeout, max(1, self.animation_ms - (pygame.time.get_ticks() - self.last_redraw)))
+        event = pygame.event.wait(timeout)
+        self.wakeups += 1
+        if event.type == NOEVENT:
+            events = []
+        else:
+            events = [event] + pygame.event.get()
+
+        for event in events:
+            if event.type == MOUSEMOTION:
+                # Only redraw on motion if it moves onto or off a button
+                if self.hovered(event.pos) != self.hover:
+                    self.dirty = True
+            else:
+                self.dirty = True
+
+        if self.animation_ms is not None and pygame.time.get_ticks() - self.last_redraw >= self.animation_ms:
+            self.dirty = True
+        return events
+
+    def hovered(self, mouse_pos):
+        x = mouse_pos[0] - self.offset[0]
+        y = mouse_pos[1] - self.offset[1]
+        for i, rect in enumerate(self.hover_rects):
+            if rect.collidepoint(x, y):
+                return i
+        return None
+
+    def start_redraw(self):
+        """Return True, and clear the request, if the menu must be redrawn now.
+
+        Invalidations made while the menu is being drawn (for example a click
+        that changes a selection) are kept and trigger another redraw.
+        """
+        if not self.dirty:
+            return False
+        self.dirty = False
+        self.last_redraw = pygame.time.get_ticks()
+        self.redraws += 1
+        return True
+
+    def finish_render(self, button_rects):
+        # Remember where the buttons were drawn so hover changes can be detected
+        self.hover_rects = list(button_rects)
+        self.hover = self.hovered(pygame.mouse.get_pos())
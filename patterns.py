@@ -0,0 +1,82 @@
+import math
+import random
+from collections import namedtuple
+
+# Precompiled bullet patterns
+# Shooters fire the same fixed sets of angles volley after volley. A pattern
+# is compiled once into unit velocity vectors and spawn offsets, so a volley
+# only scales and copies them. Angles that change from shot to shot (aiming,
+# momentum) or frame to frame (spiral bullets) go through a sin/cos lookup
+# table instead of calling into math.
+#
+# Angles follow the enemy bullet convention: 0 degrees points straight down,
+# so a vector is (sin(angle), cos(angle)).
+
+LUT_SIZE = 4096  # Entries per full turn, about 0.09 degrees apart
+LUT_MASK = LUT_SIZE - 1
+_SIN = tuple(math.sin(i * 2 * math.pi / LUT_SIZE) for i in range(LUT_SIZE))
+_COS = tuple(math.cos(i * 2 * math.pi / LUT_SIZE) for i in range(LUT_SIZE))
+_PER_RADIAN = LUT_SIZE / (2 * math.pi)
+_PER_DEGREE = LUT_SIZE / 360
+
+BulletPattern = namedtuple("BulletPattern", "angles vectors offsets")
+
+_patterns = {}
+
+def sin_cos(radians):
+    """Table lookup of (sin, cos) for an angle in radians."""
+    i = int(radians * _PER_RADIAN + 0.5) & LUT_MASK
+    return _SIN[i], _COS[i]
+
+def direction(degrees):
+    """Unit velocity vector for an angle in degrees."""
+    i = int(degrees * _PER_DEGREE + 0.5) & LUT_MASK
+    return _SIN[i], _COS[i]
+
+def rotate(vectors, degrees):
+    # Turn a whole set of vectors by one angle
+    s, c = direction(degrees)
+    return [(x * c + y * s, y * c - x * s) for x, y in vectors]
+
+def compile_pattern(angles, offsets=None):
+    """Compile angles (and optional spawn offsets) into a shared pattern."""
+    angles = tuple(angles)
+    offsets = tuple(offsets) if offsets else ((0, 0),) * len(angles)
+    if len(offsets) != len(angles):
+        raise ValueError(f"pattern has {len(angles)} angles but {len(offsets)} offsets")
+    key = (angles, offsets)
+    pattern = _patterns.get(key)
+    if pattern is None:
+        vectors = tuple((math.sin(math.radians(a)), math.cos(math.radians(a))) for a in angles)
+        pattern = BulletPattern(angles, vectors, offsets)
+        _patterns[key] = pattern
+    return pattern
+
+# Volley templates
+# spawn_volley() builds a whole volley from a template and an origin.
+# A PatternTemplate fires a compiled pattern of spread bullets; _replace()
+# gives a copy with the speed or rotation of one particular shot.
+PatternTemplate = namedtuple("PatternTemplate", "pattern color size damage speed rotation", defaults=(0,))
+
+class ShotTemplate(namedtuple("ShotTemplate", "make shots owned chance", defaults=(False, 1.0))):
+    # shots holds (dx, dy, args) for each bullet, made with make(x, y, *args),
+    # or make(x, y, owner, *args) for owned bullets. With a chance below 1,
+    # each shot only fires that often.
+    __slots__ = ()
+
+    def build(self, x, y, owner=None):
+        make = self.make
+        chance = self.chance
+        volley = []
+        for dx, dy, args in self.shots:
+            if chance < 1 and random.random() >= chance:
+                continue
+            if self.owned:
+                volley.append(make(x + dx, y + dy, owner, *args))
+            else:
+                volley.append(make(x + dx, y + dy, *args))
+        return volley
+
+def single_shot(make, owned=False, chance=1.0):
+    # Template for one bullet fired from the origin
+    return ShotTemplate(make, ((0, 0, ()),), owned, chance)
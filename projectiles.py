@@ -0,0 +1,121 @@
+import pygame
+
+# Lightweight projectiles
+# Bullets are the most numerous things in play. A Projectile has fixed
+# __slots__ and float position and velocity instead of a Sprite's __dict__,
+# Rect and group bookkeeping, and lives in a ProjectileBatch that moves,
+# culls, collides and draws all of them in single passes. Killing one only
+# flags it; the batch drops dead projectiles on its next update.
+class Projectile:
+    __slots__ = ("x", "y", "speedx", "speedy", "width", "height", "image", "damage",
+                 "dead", "spiral", "tracker", "generation")
+
+    def place(self, image, centerx, top):
+        # The hitbox is the size of the first image, as with a sprite's rect
+        self.image = image
+        self.width, self.height = image.get_size()
+        self.x = centerx - self.width // 2
+        self.y = top
+        self.dead = False
+        self.spiral = False  # Spiral projectiles move themselves in advance()
+        self.tracker = None
+        self.generation = 0
+
+    @property
+    def rect(self):
+        # For code that still wants a sprite-like rect
+        return pygame.Rect(int(self.x), int(self.y), self.width, self.height)
+
+    @property
+    def centerx(self):
+        return self.x + self.width / 2
+
+    @property
+    def centery(self):
+        return self.y + self.height / 2
+
+    def alive(self):
+        return not self.dead
+
+    def retired(self):
+        # True once the owner has despawned this bullet's generation
+        return self.tracker is not None and self.generation != self.tracker.generation
+
+    def kill(self):
+        if not self.dead:
+            self.dead = True
+            if self.tracker is not None:
+                self.tracker.release(self)
+
+class ProjectileBatch:
+    def __init__(self, width, height, on_cull=None):
+        self.items = []
+        self.width = width
+        self.height = height
+        self.on_cull = on_cull  # Called with each projectile that leaves the screen
+
+    def add(self, *projectiles):
+        self.items.extend(projectiles)
+
+    def extend(self, projectiles):
+        self.items.extend(projectiles)
+
+    def sprites(self):
+        return [p for p in self.items if not p.dead]
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    def __len__(self):
+        # Counted in place; the frame metrics ask every frame
+        return sum(1 for p in self.items if not p.dead)
+
+    def empty(self):
+        for p in self.items:
+            p.dead = True
+        self.items = []
+
+    def update(self):
+        width = self.width
+        height = self.height
+        on_cull = self.on_cull
+        live = []
+        append = live.append
+        for p in self.items:
+            if p.dead:
+                continue
+            # Despawned along with the enemy that fired it
+            tracker = p.tracker
+            if tracker is not None and p.generation != tracker.generation:
+                p.dead = True
+                continue
+            if p.spiral:
+                p.advance()
+            else:
+                p.x += p.speedx
+                p.y += p.speedy
+            # Kill if it moves off the screen
+            if p.y > height or p.y + p.height < 0 or p.x + p.width < 0 or p.x > width:
+                if on_cull is not None:
+                    on_cull(p)
+                else:
+                    p.kill()
+                continue
+            append(p)
+        self.items = live
+
+    def draw(self, surface):
+        # blits() takes any iterable; a generator saves building a list of every blit each frame
+        surface.blits(((p.image, (p.x, p.y)) for p in self.items if not p.dead), False)
+
+    def spritecollide(self, sprite, dokill):
+        """Projectiles overlapping sprite.rect, like pygame.sprite.spritecollide."""
+        rect = sprite.rect
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        hits = [p for p in self.items
+                if p.x < right and p.x + p.width > left and p.y < bottom and p.y + p.height > top
+                and not p.dead and not p.retired()]
+        if dokill:
+            for p in hits:
+                p.kill()
+        return hits
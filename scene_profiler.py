@@ -0,0 +1,65 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+
+from game_log import get_logger
+
+log = get_logger("profile")
+
+# cProfile split into segments.
+# The game is profiled from start to finish, but each scene, and within
+# gameplay each sector and wave, gets a profile of its own: whenever the
+# segment label changes, the profile so far is written to
+# <directory>/<n>_<label>.pstats along with a text summary of the top
+# functions by cumulative time (<n>_<label>.txt), and a new one starts.
+class SegmentProfiler:
+    top = 30  # Functions in each text summary
+
+    def __init__(self):
+        self.directory = None
+        self.profile = None
+        self.label = None
+        self.index = 0
+        self.frames = 0
+        self.started = 0
+
+    def start(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        log.info("Profiling to %s", directory)
+
+    def segment(self, label):
+        """Called before every frame; starts a new segment when the label changes."""
+        if label != self.label:
+            self.finish()
+            self.label = label
+            self.frames = 0
+            self.started = time.perf_counter()
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.frames += 1
+
+    def finish(self):
+        # Write out the running segment, if there is one
+        if self.profile is None:
+            return
+        self.profile.disable()
+        elapsed = time.perf_counter() - self.started
+        self.index += 1
+        name = f"{self.index:03d}_" + re.sub(r"[^A-Za-z0-9]+", "_", self.label).strip("_")
+        path = os.path.join(self.directory, name)
+        self.profile.dump_stats(path + ".pstats")
+        summary = io.StringIO()
+        summary.write(f"{self.label}: {self.frames} frames in {elapsed:.2f} s\n")
+        pstats.Stats(self.profile, stream=summary).sort_stats("cumulative").print_stats(self.top)
+        with open(path + ".txt", "w") as file:
+            file.write(summary.getvalue())
+        log.info("Profile of %s (%d frames, %.1f s) written to %s.pstats", self.label, self.frames, elapsed, path)
+        self.profile = None
+
+    def stop(self):
+        self.finish()
+        self.label = None
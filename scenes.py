@@ -0,0 +1,122 @@
+import pygame
+from pygame.locals import QUIT
+
+# Base class for a screen of the game (menu, gameplay, shop, ...).
+# The scene stack calls enter/exit when a scene becomes or stops being the
+# active screen, resume when a scene pushed on top of it is popped, and
+# handle_event/update/render once per frame while it is on top.
+class Scene:
+    name = "scene"
+    frame_rate = 60  # None for idle scenes that block on input instead
+
+    def __init__(self):
+        self.stack = None
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def poll_events(self):
+        # Idle scenes override this to block until there is input
+        return pygame.event.get()
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        pass
+
+    def needs_render(self):
+        return True
+
+    def render(self, surface):
+        pass
+
+    def rendered(self):
+        # Called after the frame has been shown on screen
+        pass
+
+# Stack of active scenes driving a single main loop.
+# Every scene draws into the same render target, which is blitted to the
+# screen at a fixed offset, so switching screens never allocates surfaces.
+class SceneStack:
+    def __init__(self, screen, surface, offset, clock):
+        self.screen = screen
+        self.surface = surface  # Shared render target for every scene
+        self.offset = offset
+        self.clock = clock
+        self.scenes = []
+        self.running = True
+        self.frames = 0
+
+    @property
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def push(self, scene):
+        scene.stack = self
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.scenes.pop()
+        scene.exit()
+        if self.scenes:
+            self.scenes[-1].resume()
+        return scene
+
+    def replace(self, scene):
+        # Swap the top scene without resuming the one underneath
+        old = self.scenes.pop()
+        old.exit()
+        self.push(scene)
+
+    def quit(self):
+        self.running = False
+
+    def step(self, events=None):
+        """Run one frame of the top scene.
+
+        Automated drivers can pass their own events instead of polling the
+        event queue, so every screen is exercised through the same path.
+        """
+        scene = self.top
+        if scene is None:
+            self.running = False
+            return
+        if events is None:
+            if scene.frame_rate:
+                self.clock.tick(scene.frame_rate)
+            events = scene.poll_events()
+
+        for event in events:
+            if event.type == QUIT:
+                self.running = False
+                return
+            scene.handle_event(event)
+            if self.top is not scene:
+                # The event switched screens; the new scene starts next frame
+                return
+
+        scene.update()
+        if self.top is not scene or not scene.needs_render():
+            return
+
+        scene.render(self.surface)
+        self.screen.fill((0, 0, 0))
+        self.screen.blit(self.surface, self.offset)
+        pygame.display.flip()
+        self.frames += 1
+        scene.rendered()
+
+    def run(self, before_step=None):
+        # before_step(scene), if given, is called with the top scene before every frame
+        while self.running and self.scenes:
+            if before_step is not None:
+                before_step(self.top)
+            self.step()
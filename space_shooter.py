@@ -1,12 +1,32 @@
 import pygame
 import sys
+import argparse
 import random
 import math
+import time
+from collections import Counter, deque, namedtuple
 from pygame.locals import *
 import os
 from barrier_goliath import BarrierGoliath
+from animation import build_animation, shared_surface, FrameAnimation
+from effects import EffectRegistry, bake_fades, bake_ring
+from menu_loop import IdleMenu
+from scenes import Scene, SceneStack
+from definitions import get_definitions
+from patterns import compile_pattern, direction, rotate, sin_cos, PatternTemplate, ShotTemplate, single_shot
+from tracking import BulletTracker
+from projectiles import Projectile, ProjectileBatch
+from swarm import EnemySwarm, SplitGroup, SwarmGroup, TargetIndex
+from gc_policy import GcPolicy
+from alloc_monitor import AllocationMonitor
+from spike_sampler import SpikeSampler
+from scene_profiler import SegmentProfiler
+from frame_metrics import FrameMetrics, BOSS_FIGHT, ENDLESS, HORDE
+import game_log
 import create_assets
 
+log = game_log.get_logger("game")
+
 # Set SDL audio driver to a fallback before initializing
 #os.environ['SDL_AUDIODRIVER'] = 'dummy'  # This uses a dummy audio driver
 
@@ -19,7 +39,7 @@ try:
     shoot_sound = pygame.mixer.Sound("assets/sounds/laser.wav")
     shoot_sound.set_volume(0.3)  # Set to 30% volume to avoid being too loud
 except:
-    print("Warning: Could not load sound files")
+    log.warning("Could not load sound files")
     shoot_sound = None
 
 # Get the user's screen info for proper fullscreen
@@ -67,6 +87,56 @@ def load_image(name, scale=1):
         pygame.draw.line(surf, RED, (50, 0), (0, 50), 3)
         return surf
 
+# Pre-baked overlays for per-frame effects, built once per player sprite size
+effects = EffectRegistry()
+effects.register("dash_trail", lambda size: bake_fades(size, (0, 255, 255), [150 - (i * 30) for i in range(5)]))
+effects.register("shield", lambda size: bake_ring(40, BLUE, 2))
+
+# Enemy and boss stats, compiled once from definitions.json
+definitions = get_definitions()
+
+def draw_fallback(fallback):
+    # Draw the placeholder art described in a definition
+    image = pygame.Surface(fallback.size, pygame.SRCALPHA)
+    for shape in fallback.shapes:
+        if shape.kind == "polygon":
+            pygame.draw.polygon(image, shape.color, shape.geometry)
+        elif shape.kind == "circle":
+            pygame.draw.circle(image, shape.color, *shape.geometry)
+        elif shape.kind == "rect":
+            pygame.draw.rect(image, shape.color, shape.geometry)
+        elif shape.kind == "ellipse":
+            pygame.draw.ellipse(image, shape.color, shape.geometry)
+        elif shape.kind == "star":
+            (cx, cy), points, outer, inner = shape.geometry
+            vertices = []
+            for i in range(points):
+                angle = 2 * math.pi * i / points
+                vertices.append((cx + outer * math.cos(angle), cy + outer * math.sin(angle)))
+                angle += math.pi / points
+                vertices.append((cx + inner * math.cos(angle), cy + inner * math.sin(angle)))
+            pygame.draw.polygon(image, shape.color, vertices)
+    return image
+
+def definition_image(paths, fallback):
+    # Load a sprite image once and share it between every sprite using it
+    def render():
+        for path in paths:
+            try:
+                image = load_image(path)
+                break
+            except:
+                pass
+        else:
+            # Fallback if image loading fails
+            image = draw_fallback(fallback)
+        # Run-length encode the transparent areas: a shared image is blitted
+        # once per sprite every frame (hundreds of times in horde waves) and
+        # RLE blits skip the empty pixels instead of blending them
+        image.set_alpha(255, pygame.RLEACCEL)
+        return image
+    return shared_surface("|".join(paths), render)
+
 # Create resource folders
 if not os.path.exists("assets"):
     os.makedirs("assets")
@@ -82,6 +152,11 @@ class Player(pygame.sprite.Sprite):
             self.image = pygame.Surface((50, 40), pygame.SRCALPHA)
             pygame.draw.polygon(self.image, BLUE, [(0, 40), (25, 0), (50, 40)])
         self.rect = self.image.get_rect()
+        self.volley_templates = {}  # Built on first use per weapon type and level
+        self.reset()
+        
+    def reset(self):
+        # Restore starting position and stats in place so a new run reuses this sprite
         # Position player within the original game coordinates (no offset)
         self.rect.centerx = WIDTH // 2
         self.rect.bottom = HEIGHT - 20
@@ -229,67 +304,53 @@ class Player(pygame.sprite.Sprite):
         self.last_shot = now
         
         # Now handle the actual shooting based on weapon type
+        spawn_volley("player", (self.rect.centerx, self.rect.top), self.volley_template())
+        
+        # Drones also shoot - let their own logic handle it
+        for drone in self.drone_list:
+            drone.shoot()
+            
+    def volley_template(self):
+        key = (self.weapon_type, self.weapon_level)
+        template = self.volley_templates.get(key)
+        if template is None:
+            template = self.build_volley_template()
+            self.volley_templates[key] = template
+        return template
+        
+    def build_volley_template(self):
+        # Shot offsets are relative to the nose of the ship
+        left = self.rect.left - self.rect.centerx
+        right = self.rect.right - self.rect.centerx
         if self.weapon_type == "normal":
-            bullet = Bullet(self.rect.centerx, self.rect.top)
-            all_sprites.add(bullet)
-            bullets.add(bullet)
+            shots = [(0, 0, ())]
             
             # Add additional bullets based on weapon level
             if self.weapon_level >= 2:
-                bullet1 = Bullet(self.rect.left + 10, self.rect.top + 10)
-                bullet2 = Bullet(self.rect.right - 10, self.rect.top + 10)
-                all_sprites.add(bullet1, bullet2)
-                bullets.add(bullet1, bullet2)
-                
+                shots += [(left + 10, 10, ()), (right - 10, 10, ())]
             if self.weapon_level >= 3:
-                bullet3 = Bullet(self.rect.left + 5, self.rect.top + 20)
-                bullet4 = Bullet(self.rect.right - 5, self.rect.top + 20)
-                all_sprites.add(bullet3, bullet4)
-                bullets.add(bullet3, bullet4)
-                
-            # Drones also shoot normal bullets - let their own logic handle it
-            for drone in self.drone_list:
-                drone.shoot()
-                
+                shots += [(left + 5, 20, ()), (right - 5, 20, ())]
+            return ShotTemplate(Bullet, tuple(shots))
+            
         elif self.weapon_type == "spread":
-            for angle in range(-30, 31, 30):
-                bullet = SpreadBullet(self.rect.centerx, self.rect.top, angle)
-                all_sprites.add(bullet)
-                bullets.add(bullet)
-                
-            # Drones also shoot spread bullets - let their own logic handle it
-            for drone in self.drone_list:
-                drone.shoot()
-                
+            return ShotTemplate(SpreadBullet, tuple((0, 0, (angle,)) for angle in range(-30, 31, 30)))
+            
         elif self.weapon_type == "bouncing":
             # Create a bouncing bullet that targets enemies
-            bullet = BouncingBullet(self.rect.centerx, self.rect.top)
-            all_sprites.add(bullet)
-            bullets.add(bullet)
+            return single_shot(BouncingBullet)
             
-            # Drones also shoot bouncing bullets
-            for drone in self.drone_list:
-                drone.shoot()
-                
-        elif self.weapon_type == "homing":
+        else:  # homing
             # Number of homing missiles based on weapon level
             num_missiles = self.weapon_level
-            
-            # Create homing missiles with slight angle variations
+            shots = []
             for i in range(num_missiles):
                 # Slight offset to left/right for multiple missiles
                 if num_missiles > 1:
                     offset_x = self.rect.width * (i/(num_missiles-1) - 0.5)  # Spread across ship width
                 else:
                     offset_x = 0
-                    
-                bullet = HomingBullet(self.rect.centerx + offset_x, self.rect.top)
-                all_sprites.add(bullet)
-                bullets.add(bullet)
-                
-            # Drones also shoot homing bullets
-            for drone in self.drone_list:
-                drone.shoot()
+                shots.append((offset_x, 0, ()))
+            return ShotTemplate(HomingBullet, tuple(shots))
 
     def hyper_dash(self):
         now = pygame.time.get_ticks()
@@ -362,32 +423,10 @@ class Drone(pygame.sprite.Sprite):
             self.rect.centery = self.player.rect.centery - int(math.cos(rad_angle) * radius)
 
     def shoot(self):
-        # First check player's current weapon type
-        if self.player.weapon_type == "normal":
-            if(random.random() < 0.7):
-                bullet = Bullet(self.rect.centerx, self.rect.top)
-                all_sprites.add(bullet)
-                bullets.add(bullet)
-                
-        elif self.player.weapon_type == "spread":
-           for angle in range(-15, 16, 15):
-                if(random.random() < 0.3):
-                    bullet = SpreadBullet(self.rect.centerx, self.rect.top, angle)
-                    all_sprites.add(bullet)
-                    bullets.add(bullet)
-                    
-        elif self.player.weapon_type == "bouncing":
-            if(random.random() < 0.5):
-                # Always fire bouncing bullets when player has bouncing weapon type
-                bullet = BouncingBullet(self.rect.centerx, self.rect.top)
-                all_sprites.add(bullet)
-                bullets.add(bullet)
-                
-        elif self.player.weapon_type == "homing":
-            if(random.random() < 0.2):  # 40% chance to fire
-                bullet = HomingBullet(self.rect.centerx, self.rect.top)
-                all_sprites.add(bullet)
-                bullets.add(bullet)
+        # Drones fire the player's weapon type, each shot only some of the time
+        template = DRONE_TEMPLATES.get(self.player.weapon_type)
+        if template:
+            spawn_volley("player", (self.rect.centerx, self.rect.top), template)
 
 # Bullet class
 class Bullet(pygame.sprite.Sprite):
@@ -415,7 +454,7 @@ class Bullet(pygame.sprite.Sprite):
         self.rect.y += self.speedy
         # Kill if it moves off the top of the screen
         if self.rect.bottom < 0:
-            self.kill()
+            sprite_culler.cull(self)
 
 class BouncingBullet(pygame.sprite.Sprite):
     def __init__(self, x, y):
@@ -451,27 +490,10 @@ class BouncingBullet(pygame.sprite.Sprite):
         self.damage = 8  # Slightly less damage than regular bullets (which do 10)
         
     def target_enemy(self):
-        # Get a list of all enemies and bosses
-        all_targets = list(enemies) + list(bosses)
-        
-        if not all_targets:
-            # No enemies found, will use default movement
-            return
-            
-        # Find the closest enemy
-        closest_enemy = None
-        closest_distance = float('inf')
+        # Find the closest enemy or boss
+        closest_enemy = target_index.nearest(self.rect.centerx, self.rect.centery)
         
-        for enemy in all_targets:
-            # Calculate distance to this enemy
-            dx = enemy.rect.centerx - self.rect.centerx
-            dy = enemy.rect.centery - self.rect.centery
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_enemy = enemy
-                
+        # No enemies found, will use default movement
         if closest_enemy:
             # Calculate direction to the closest enemy
             dx = closest_enemy.rect.centerx - self.rect.centerx
@@ -510,7 +532,9 @@ class BouncingBullet(pygame.sprite.Sprite):
             self.retarget_after_bounce()
             
         # Kill if it moves off the bottom of the screen or exceeds max bounces
-        if self.rect.top > HEIGHT or self.bounces >= self.max_bounces:
+        if self.rect.top > HEIGHT:
+            sprite_culler.cull(self)
+        elif self.bounces >= self.max_bounces:
             self.kill()
     
     def retarget_after_bounce(self):
@@ -570,27 +594,8 @@ class HomingBullet(pygame.sprite.Sprite):
         self.find_target()
         
     def find_target(self):
-        # Get all potential targets (enemies and bosses)
-        all_targets = list(enemies) + list(bosses)
-        
-        # If no targets, maintain current direction
-        if not all_targets:
-            return None
-            
-        # Find closest target
-        closest_target = None
-        closest_distance = float('inf')
-        
-        for target in all_targets:
-            dx = target.rect.centerx - self.rect.centerx
-            dy = target.rect.centery - self.rect.centery
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_target = target
-                
-        return closest_target
+        # Closest enemy or boss; None keeps the current direction
+        return target_index.nearest(self.rect.centerx, self.rect.centery)
     
     def update(self):
         # Increment lifetime
@@ -631,7 +636,7 @@ class HomingBullet(pygame.sprite.Sprite):
         # Kill if it moves off the screen
         if (self.rect.right < 0 or self.rect.left > WIDTH or 
             self.rect.bottom < 0 or self.rect.top > HEIGHT):
-            self.kill()
+            sprite_culler.cull(self)
 
 # Spread bullet class
 class SpreadBullet(pygame.sprite.Sprite):
@@ -662,7 +667,7 @@ class SpreadBullet(pygame.sprite.Sprite):
         self.rect.x += self.speedx
         # Kill if it moves off the screen
         if self.rect.bottom < 0 or self.rect.right < 0 or self.rect.left > WIDTH:
-            self.kill()
+            sprite_culler.cull(self)
 
 # Laser class
 class Laser(pygame.sprite.Sprite):
@@ -693,226 +698,389 @@ class Laser(pygame.sprite.Sprite):
             self.kill()
 
 # Enemy classes
+# Enemy behaviours
+# Each archetype has one shared behaviour object holding its tuned parameters
+# and the functions that set it up, move it and make it shoot. Enemies keep a
+# reference to theirs, so per-frame dispatch is a single call instead of a
+# chain of enemy_type string comparisons.
+def basic_bullet(x, y, owner):
+    return EnemyBullet(x, y, owner)
+
+def burst_bullet(x, y, owner):
+    # Fast smaller bullets for the cloaked ambusher's burst
+    bullet = EnemyBullet(x, y, owner)
+    bullet.speedy = 7  # Faster than normal
+    bullet.image = shared_surface("burst_bullet", lambda: draw_bullet((150, 150, 255), 3, 10))  # Light blue
+    return bullet
+
+def sapper_bullet(x, y, owner):
+    # Slow, large bullet
+    bullet = EnemyBullet(x, y, owner)
+    bullet.speedy = 3  # Slower
+    bullet.image = shared_surface("sapper_bullet", lambda: draw_bullet((200, 100, 200), 10, 20))  # Pink-purple
+    bullet.damage = 10  # More damage
+    return bullet
+
+class EnemyBehaviour:
+    drift = 1.0  # Share of the enemy's speed it moves down at
+    swarmable = False  # Simple enough to be run by the enemy swarm
+    sway = 0  # Side-to-side sway in pixels per frame, for swarm enemies
+    template = single_shot(basic_bullet, owned=True)
+
+    def setup(self, enemy):
+        # Initialise the per-enemy state this archetype needs
+        pass
+
+    def restart_timers(self, enemy, now):
+        pass
+
+    def move(self, enemy, now):
+        enemy.rect.y += enemy.speed
+
+    def think(self, enemy, now):
+        # Decisions that can wait a frame or two; run by the AI scheduler
+        pass
+
+    def fire(self, enemy, now):
+        # Called from update once the shoot delay has elapsed
+        self.shoot(enemy)
+
+    def shoot(self, enemy):
+        spawn_volley("enemy", (enemy.rect.centerx, enemy.rect.bottom), self.template, enemy)
+
+    def absorb_hit(self, enemy, damage):
+        # Return True if the hit was absorbed and does no damage
+        return False
+
+    def destroyed(self, enemy):
+        pass
+
+class BasicBehaviour(EnemyBehaviour):
+    # Basic enemies just move downward at a constant speed
+    swarmable = True
+
+class EliteBehaviour(EnemyBehaviour):
+    template = PatternTemplate(compile_pattern((-30, 30)), PURPLE, 8, 15, 6)
+    swarmable = True
+    sway = 2
+
+    def move(self, enemy, now):
+        # Elite enemies move in a slight side-to-side pattern while moving down
+        enemy.rect.y += enemy.speed
+        # Add sine wave horizontal movement
+        enemy.rect.x += math.sin(now / 500) * self.sway
+
+class CloakedAmbusherBehaviour(EnemyBehaviour):
+    burst_count = 3  # Number of shots in burst
+    burst_delay = 150  # Delay between shots in burst
+    cloak_duration = 1500  # How long it stays cloaked
+    template = single_shot(burst_bullet, owned=True)
+
+    def setup(self, enemy):
+        # Cloaking changes the image alpha, so it needs its own copy
+        enemy.original_image = enemy.image
+        enemy.image = enemy.image.copy()
+        enemy.visible = True
+        enemy.cloak_timer = random.randint(1500, 3000)  # Time until next cloak/uncloak
+        enemy.cloak_start = pygame.time.get_ticks()
+        enemy.alpha = 255  # Fully visible
+        enemy.burst_active = False
+        enemy.burst_shots = 0
+
+    def restart_timers(self, enemy, now):
+        enemy.cloak_start = now
+
+    def move(self, enemy, now):
+        # Cloaked ambusher moves downward, occasionally cloaking
+        enemy.rect.y += enemy.speed
+
+        # Handle burst fire
+        if enemy.burst_active and now - enemy.last_shot > self.burst_delay:
+            self.shoot(enemy)
+            enemy.burst_shots += 1
+            enemy.last_shot = now
+
+            # End burst after enough shots
+            if enemy.burst_shots >= self.burst_count:
+                enemy.burst_active = False
+
+    def think(self, enemy, now):
+        if enemy.visible and now - enemy.cloak_start > enemy.cloak_timer:
+            # Start cloaking
+            enemy.visible = False
+            enemy.cloak_start = now
+            enemy.image.set_alpha(30)  # Almost invisible
+        elif not enemy.visible and now - enemy.cloak_start > self.cloak_duration:
+            # Uncloak
+            enemy.visible = True
+            enemy.cloak_start = now
+            enemy.cloak_timer = random.randint(2000, 4000)  # Time until next cloak
+            enemy.image.set_alpha(255)  # Fully visible
+
+            # Burst attack when uncloaking
+            enemy.burst_active = True
+            enemy.burst_shots = 0
+            enemy.last_shot = now
+
+    def fire(self, enemy, now):
+        # Bursts are fired from move; single shots only while visible
+        if enemy.visible and not enemy.burst_active:
+            self.shoot(enemy)
+
+def draw_split_drone():
+    image = pygame.Surface((25, 25), pygame.SRCALPHA)
+    pygame.draw.circle(image, (0, 200, 200), (12, 12), 12)  # Brighter teal
+    return image
+
+class SplitterDroneBehaviour(EnemyBehaviour):
+    def setup(self, enemy):
+        enemy.is_split = False  # Whether this is a split version
+
+    def destroyed(self, enemy):
+        if enemy.is_split:
+            return
+        # Create 2-3 smaller split drones
+        num_splits = 3 if game_state.difficulty == "hard" else 2
+        for _ in range(num_splits):
+            split = enemy_prototypes.spawn("splitter_drone")
+            split.is_split = True  # Mark as a split version
+            split.health = enemy.health // 2  # Half health
+            split.rect.centerx = enemy.rect.centerx + random.randint(-20, 20)
+            split.rect.centery = enemy.rect.centery
+            split.speed = enemy.speed * 1.5  # Faster
+            # Make it smaller
+            split.image = shared_surface("split_drone", draw_split_drone)
+            split.rect = split.image.get_rect(center=split.rect.center)
+
+            all_sprites.add(split)
+            enemies.add(split)
+
+class ShieldBearerBehaviour(EnemyBehaviour):
+    shield_max_health = 40
+    shield_regen_rate = 0.02
+    shield_radius = 80  # How far the shield extends
+    template = PatternTemplate(compile_pattern((-30, 0, 30)), PURPLE, 8, 15, 6)  # Shoots bullets in 3 directions
+
+    def setup(self, enemy):
+        enemy.shield_active = True
+        enemy.shield_health = self.shield_max_health
+        enemy.shield_max_health = self.shield_max_health
+        enemy.shield_radius = self.shield_radius
+
+    def move(self, enemy, now):
+        # Shield bearer moves downward with shield protection
+        enemy.rect.y += enemy.speed
+
+        if enemy.shield_active:
+            # Regenerate shield while it's up
+            enemy.shield_health = min(self.shield_max_health, enemy.shield_health + self.shield_regen_rate)
+
+    def think(self, enemy, now):
+        # Drop the shield when depleted, raise it again once it has recovered
+        if enemy.shield_active:
+            if enemy.shield_health <= 0:
+                enemy.shield_active = False
+        elif enemy.shield_health > self.shield_max_health * 0.3:
+            enemy.shield_active = True
+
+    def absorb_hit(self, enemy, damage):
+        if not enemy.shield_active:
+            return False
+        enemy.shield_health -= damage
+        # Only take damage once the shield is down
+        if enemy.shield_health <= 0:
+            enemy.shield_active = False
+        return True
+
+class EnergySapperBehaviour(EnemyBehaviour):
+    drift = 0.7
+    beam_duration = 2000
+    beam_cooldown = 4000
+    template = single_shot(sapper_bullet, owned=True)
+
+    def setup(self, enemy):
+        enemy.beam_active = False
+        enemy.beam_start = 0
+        enemy.beam_target = None
+
+    def move(self, enemy, now):
+        # Energy sapper moves slowly
+        enemy.rect.y += enemy.speed * 0.7
+
+        # If player is in beam, drain energy
+        if enemy.beam_target is not None:
+            if player.energy > 0:
+                player.energy = max(0, player.energy - 0.5)
+            elif player.shoot_delay < 500:
+                player.shoot_delay += 1  # Slowly increase shoot delay (reduce fire rate)
+
+    def think(self, enemy, now):
+        # Check if we should start/stop the beam
+        if not enemy.beam_active and now - enemy.last_shot > enemy.shoot_delay:
+            enemy.beam_active = True
+            enemy.beam_start = now
+            enemy.last_shot = now
+        elif enemy.beam_active and now - enemy.beam_start > self.beam_duration:
+            enemy.beam_active = False
+
+        # If beam is active, look for player to target
+        if (enemy.beam_active and enemy.rect.left < player.rect.centerx < enemy.rect.right
+                and player.rect.top > enemy.rect.bottom):
+            enemy.beam_target = player
+        else:
+            enemy.beam_target = None
+
+    def fire(self, enemy, now):
+        # Doesn't shoot regular bullets when beam is active
+        if not enemy.beam_active:
+            self.shoot(enemy)
+
+class BladeSpinnerBehaviour(EnemyBehaviour):
+    drift = 0.8
+    num_bullets = 4
+    spiral_angles = tuple(i * (2 * math.pi / 4) for i in range(4))  # Evenly spaced start angles
+    # All fired straight down, the spiral spreads them
+    template = PatternTemplate(compile_pattern((0,) * 4), (255, 100, 100), 10, 15, 6)
+    reflect_template = PatternTemplate(compile_pattern((0,)), (255, 200, 0), 8, 15, 6)
+
+    def setup(self, enemy):
+        enemy.angle = 0
+        enemy.spin_speed = 5
+        enemy.blade_angle = 0
+        enemy.original_image = enemy.image
+        enemy.orbit_center = None
+        enemy.orbit_radius = random.randint(80, 150)
+        enemy.orbit_speed = random.uniform(0.01, 0.03)
+        enemy.orbit_angle = random.uniform(0, math.pi*2)
+        enemy.reflect_bullets = game_state.difficulty == "hard"  # Only reflect on hard
+        # Orbit centre is taken from wherever the spawner places it
+        enemy.base_x = None
+        enemy.base_y = None
+
+    def move(self, enemy, now):
+        # Blade spinner moves in a spinning orbit while drifting downward
+        enemy.orbit_angle += enemy.orbit_speed
+
+        if enemy.base_x is None:
+            # First frame: fix the orbit centre and move straight down
+            enemy.base_x = enemy.rect.centerx
+            enemy.base_y = enemy.rect.centery
+            enemy.rect.y += enemy.speed * 0.8
+        else:
+            # Drift the orbit centre downward and follow it with the orbit offset
+            enemy.base_y += enemy.speed * 0.8
+            enemy.rect.centerx = int(enemy.base_x + math.cos(enemy.orbit_angle) * enemy.orbit_radius)
+            enemy.rect.centery = int(enemy.base_y + math.sin(enemy.orbit_angle) * enemy.orbit_radius)
+
+            # Keep within screen boundaries
+            if enemy.rect.left < 0:
+                enemy.rect.left = 0
+                enemy.base_x = enemy.rect.centerx
+            elif enemy.rect.right > WIDTH:
+                enemy.rect.right = WIDTH
+                enemy.base_x = enemy.rect.centerx
+
+        # Rotate blade
+        enemy.blade_angle = (enemy.blade_angle + 5) % 360
+
+    def shoot(self, enemy):
+        # Create multiple bullets in a spiral pattern
+        volley = spawn_volley("enemy", (enemy.rect.centerx, enemy.rect.centery), self.template, enemy)
+        for bullet, spiral_angle in zip(volley, self.spiral_angles):
+            # Add spiral properties
+            bullet.spiral = True
+            bullet.spiral_angle = spiral_angle
+            bullet.spiral_speed = 0.05  # Rotation speed
+            bullet.spiral_radius = 5    # Initial radius
+            bullet.base_x = bullet.centerx  # Store base position for spiral calculation
+            bullet.base_y = bullet.centery
+
+    def absorb_hit(self, enemy, damage):
+        # 40% chance to reflect bullets in hard mode
+        if not enemy.reflect_bullets or random.random() >= 0.4:
+            return False
+        angle = random.randint(0, 360)
+        spawn_volley("enemy", (enemy.rect.centerx, enemy.rect.centery), self.reflect_template._replace(rotation=angle), enemy)
+        return True
+
+ENEMY_BEHAVIOURS = {
+    "basic": BasicBehaviour(),
+    "elite": EliteBehaviour(),
+    "cloaked_ambusher": CloakedAmbusherBehaviour(),
+    "splitter_drone": SplitterDroneBehaviour(),
+    "shield_bearer": ShieldBearerBehaviour(),
+    "energy_sapper": EnergySapperBehaviour(),
+    "blade_spinner": BladeSpinnerBehaviour()
+}
+
 class Enemy(pygame.sprite.Sprite):
+    swarm_index = None  # Row in the enemy swarm while it runs this enemy
+    
     def __init__(self, enemy_type="basic"):
         pygame.sprite.Sprite.__init__(self)
         self.enemy_type = enemy_type
         
-        # Base speed calculation - scales with game sector and difficulty
-        difficulty_multiplier = {
-            "easy": 0.8,
-            "normal": 1.0,
-            "hard": 1.3
-        }[game_state.difficulty]
+        # Stats come from the compiled table for the current difficulty
+        stats = definitions.enemies[game_state.difficulty][enemy_type]
+        self.image = definition_image((stats.image,), stats.fallback)
+        self.rect = self.image.get_rect()
+        self.health = stats.health
+        self.score_value = stats.score_value
+        self.base_shoot_delay = stats.shoot_delay
         
-        base_min_speed = (2 + (game_state.sector - 1) * 0.5) * difficulty_multiplier
-        base_max_speed = (5 + (game_state.sector - 1) * 0.5) * difficulty_multiplier
+        # Speed range scales with sector and difficulty
+        sector_speed = (game_state.sector - 1) * stats.sector_speed
+        self.min_speed = stats.min_speed + sector_speed
+        self.max_speed = stats.max_speed + sector_speed
         
-        # Common variables for all enemy types
-        self.bullets = []  # Track this enemy's bullets
-        self.last_shot = pygame.time.get_ticks() - random.randint(0, 2000)  # Random initial delay
+        # Archetype-specific state and per-frame behaviour
+        self.behaviour = ENEMY_BEHAVIOURS[enemy_type]
+        self.randomise()
         
-        # Common features based on enemy type
-        if enemy_type == "basic":
-            try:
-                self.image = load_image("assets/images/basic_enemy.png")
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((40, 40), pygame.SRCALPHA)
-                pygame.draw.polygon(self.image, RED, [(0, 0), (40, 0), (20, 40)])
-            self.rect = self.image.get_rect()
-            
-            # Adjust health based on difficulty
-            if game_state.difficulty == "easy":
-                self.health = 8
-            elif game_state.difficulty == "normal":
-                self.health = 10
-            else:  # hard
-                self.health = 15
-                
-            self.speed = random.uniform(base_min_speed, base_max_speed)  # Speed scales with sector and difficulty
-            self.shoot_delay = 2000  # Base delay
-            self.score_value = 10
-            
-        elif enemy_type == "elite":
-            try:
-                self.image = load_image("assets/images/elite_enemy.png")
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((60, 60), pygame.SRCALPHA)
-                pygame.draw.polygon(self.image, PURPLE, [(0, 0), (60, 0), (30, 60)])
-            self.rect = self.image.get_rect()
-            
-            # Adjust health based on difficulty
-            if game_state.difficulty == "easy":
-                self.health = 40
-            elif game_state.difficulty == "normal":
-                self.health = 50
-            else:  # hard
-                self.health = 70
-                
-            self.speed = random.uniform(base_min_speed, base_max_speed)
-            self.shoot_delay = 1000  # Base delay
-            self.score_value = 25  # Elite enemies are worth more points
-            
-        # New enemy types
-        elif enemy_type == "cloaked_ambusher":
-            try:
-                self.image = load_image("assets/images/cloaked_ambusher.png")
-                self.original_image = self.image.copy()
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((45, 45), pygame.SRCALPHA)
-                pygame.draw.polygon(self.image, (100, 100, 150), [(0, 0), (45, 0), (22, 45)])  # Light blue-purple
-                self.original_image = self.image.copy()
-            self.rect = self.image.get_rect()
-            
-            # Cloaking variables
-            self.visible = True
-            self.cloak_timer = random.randint(1500, 3000)  # Time until next cloak/uncloak
-            self.cloak_start = pygame.time.get_ticks()
-            self.cloak_duration = 1500  # How long it stays cloaked
-            self.alpha = 255  # Fully visible
-            
-            if game_state.difficulty == "easy":
-                self.health = 15
-            elif game_state.difficulty == "normal":
-                self.health = 20
-            else:  # hard
-                self.health = 30
-                
-            self.speed = random.uniform(base_min_speed*0.8, base_max_speed*0.8)  # Slightly slower
-            self.shoot_delay = 2500  # Longer delay between shots
-            self.burst_count = 3  # Number of shots in burst
-            self.burst_delay = 150  # Delay between shots in burst
-            self.burst_active = False
-            self.burst_shots = 0
-            self.score_value = 20
-            
-        elif enemy_type == "splitter_drone":
-            try:
-                if not hasattr(self, 'is_split') or not self.is_split:
-                    self.image = load_image("assets/images/splitter_drone.png")
-                else:
-                    self.image = load_image("assets/images/mini_splitter_drone.png")
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((50, 50), pygame.SRCALPHA)
-                pygame.draw.circle(self.image, (0, 180, 180), (25, 25), 25)  # Teal color
-            self.rect = self.image.get_rect()
-            self.is_split = False  # Whether this is a split version
-            
-            if game_state.difficulty == "easy":
-                self.health = 20
-            elif game_state.difficulty == "normal":
-                self.health = 25
-            else:  # hard
-                self.health = 35
-                
-            self.speed = random.uniform(base_min_speed*0.9, base_max_speed*0.9)
-            self.shoot_delay = 2200
-            self.score_value = 15
-            
-        elif enemy_type == "shield_bearer":
-            try:
-                self.image = load_image("assets/images/shield_bearer.png")
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((55, 55), pygame.SRCALPHA)
-                pygame.draw.circle(self.image, (50, 150, 250), (27, 27), 27)  # Light blue
-            self.rect = self.image.get_rect()
-            
-            # Shield variables
-            self.shield_active = True
-            self.shield_health = 40
-            self.shield_max_health = 40
-            self.shield_regen_rate = 0.02
-            self.shield_radius = 80  # How far the shield extends
-            
-            if game_state.difficulty == "easy":
-                self.health = 15
-            elif game_state.difficulty == "normal":
-                self.health = 20
-            else:  # hard
-                self.health = 30
-                
-            self.speed = random.uniform(base_min_speed*0.7, base_max_speed*0.7)  # Slower
-            self.shoot_delay = 3000  # Shoots less often
-            self.score_value = 25
-            
-        elif enemy_type == "energy_sapper":
-            try:
-                self.image = load_image("assets/images/energy_sapper.png")
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((45, 55), pygame.SRCALPHA)
-                pygame.draw.ellipse(self.image, (200, 100, 200), (0, 0, 45, 55))  # Pink-purple
-            self.rect = self.image.get_rect()
-            
-            # Sapper beam variables
-            self.beam_active = False
-            self.beam_start = 0
-            self.beam_duration = 2000
-            self.beam_cooldown = 4000
-            self.beam_target = None
-            
-            if game_state.difficulty == "easy":
-                self.health = 25
-            elif game_state.difficulty == "normal":
-                self.health = 35
-            else:  # hard
-                self.health = 50
-                
-            self.speed = random.uniform(base_min_speed*0.6, base_max_speed*0.6)  # Very slow
-            self.shoot_delay = 4000  # Rarely shoots regular bullets
-            self.score_value = 30
-            
-        elif enemy_type == "blade_spinner":
-            try:
-                self.image = load_image("assets/images/blade_spinner.png")
-            except:
-                # Fallback if image loading fails
-                self.image = pygame.Surface((48, 48), pygame.SRCALPHA)
-                # Draw a spinning blade-like appearance
-                points = []
-                center = (24, 24)
-                for i in range(8):  # 8-pointed star
-                    angle = math.pi * i / 4
-                    points.append((center[0] + 24 * math.cos(angle), center[1] + 24 * math.sin(angle)))
-                    angle += math.pi / 8
-                    points.append((center[0] + 12 * math.cos(angle), center[1] + 12 * math.sin(angle)))
-                pygame.draw.polygon(self.image, (255, 150, 0), points)  # Orange color
-            self.rect = self.image.get_rect()
-            
-            # Spinning variables
-            self.angle = 0
-            self.spin_speed = 5
-            self.original_image = self.image.copy()
-            self.orbit_center = None
-            self.orbit_radius = random.randint(80, 150)
-            self.orbit_speed = random.uniform(0.01, 0.03)
-            self.orbit_angle = random.uniform(0, math.pi*2)
-            self.reflect_bullets = game_state.difficulty == "hard"  # Only reflect on hard
-            
-            if game_state.difficulty == "easy":
-                self.health = 20
-            elif game_state.difficulty == "normal":
-                self.health = 30
-            else:  # hard
-                self.health = 45
-                
-            self.speed = random.uniform(base_min_speed*0.7, base_max_speed*0.7)
-            self.shoot_delay = 2500
-            self.score_value = 25
-            
-        # Add random offset to shoot delay to prevent synchronized firing
-        self.shoot_delay += random.randint(-500, 500)
+    def randomise(self):
+        # Roll the fields that differ between enemies of the same kind.
+        # Uses random() directly, it's several times cheaper than randint/uniform
+        rand = random.random
+        self.speed = self.min_speed + (self.max_speed - self.min_speed) * rand()
+        self.bullets = BulletTracker()  # Track this enemy's bullets
+        
+        # Add random offset (-500..500) to shoot delay to prevent synchronized firing
+        self.shoot_delay = self.base_shoot_delay + int(rand() * 1001) - 500
         
         # Random initial delay so they don't all start firing at once
-        self.last_shot = pygame.time.get_ticks() - random.randint(0, self.shoot_delay)
+        self.last_shot = pygame.time.get_ticks() - int(rand() * (self.shoot_delay + 1))
+        
+        self.rect.x = int(rand() * (WIDTH - self.rect.width))
+        self.rect.y = int(rand() * 100) - 150
+        
+        # Level of detail: dormant until it first comes into view
+        self.lod_active = False
+        self.lod_phase = int(rand() * 256)  # Spreads cheap updates across frames
+        
+        self.behaviour.setup(self)
+        
+    def think(self, now):
+        # Dormant enemies have nothing to decide yet
+        if self.lod_active:
+            self.behaviour.think(self, now)
+        
+    def cheap_update(self, frames):
+        # Movement only, covering several frames at once, while off-screen
+        self.rect.y += self.speed * self.behaviour.drift * frames
         
-        self.rect.x = random.randrange(0, WIDTH - self.rect.width)
-        self.rect.y = random.randrange(-150, -50)
+    def restart_timers(self, now):
+        # Start shooting and ability timers from when the enemy enters play
+        self.last_shot = now - int(random.random() * (self.shoot_delay + 1))
+        self.behaviour.restart_timers(self, now)
+        
+    def clone(self):
+        # Copy a configured enemy without going through the stat lookup
+        enemy = Enemy.__new__(Enemy)
+        enemy.__dict__ = self.__dict__.copy()
+        pygame.sprite.Sprite.__init__(enemy)  # Fresh group membership
+        enemy.rect = self.rect.copy()
+        enemy.randomise()
+        return enemy
         
     def update(self):
         # Store previous position to calculate momentum
@@ -921,152 +1089,7 @@ class Enemy(pygame.sprite.Sprite):
         
         now = pygame.time.get_ticks()
         
-        # Movement based on enemy type
-        if self.enemy_type == "basic":
-            # Basic enemies just move downward at a constant speed
-            self.rect.y += self.speed
-            
-        elif self.enemy_type == "elite":
-            # Elite enemies move in a slight side-to-side pattern while moving down
-            self.rect.y += self.speed
-            # Add sine wave horizontal movement
-            self.rect.x += math.sin(now / 500) * 2
-            
-            # Keep within screen boundaries
-            if self.rect.left < 0:
-                self.rect.left = 0
-            elif self.rect.right > WIDTH:
-                self.rect.right = WIDTH
-            
-        elif self.enemy_type == "cloaked_ambusher":
-            # Cloaked ambusher moves downward, occasionally cloaking
-            self.rect.y += self.speed
-            
-            # Handle cloaking
-            if hasattr(self, 'visible'):
-                if self.visible and now - self.cloak_start > self.cloak_timer:
-                    # Start cloaking
-                    self.visible = False
-                    self.cloak_start = now
-                    # Make semi-transparent
-                    self.image.set_alpha(30)  # Almost invisible
-                elif not self.visible and now - self.cloak_start > self.cloak_duration:
-                    # Uncloak
-                    self.visible = True
-                    self.cloak_start = now
-                    self.cloak_timer = random.randint(2000, 4000)  # Time until next cloak
-                    self.image.set_alpha(255)  # Fully visible
-                    
-                    # Burst attack when uncloaking
-                    if hasattr(self, 'burst_active'):
-                        self.burst_active = True
-                        self.burst_shots = 0
-                        self.last_shot = now
-                
-                # Handle burst fire
-                if hasattr(self, 'burst_active') and self.burst_active and now - self.last_shot > self.burst_delay:
-                    self.shoot_cloaked_ambusher()
-                    self.burst_shots += 1
-                    self.last_shot = now
-                    
-                    # End burst after enough shots
-                    if self.burst_shots >= self.burst_count:
-                        self.burst_active = False
-            
-        elif self.enemy_type == "splitter_drone":
-            # Splitter drone moves downward, splitting happens in hit() method
-            self.rect.y += self.speed
-            
-        elif self.enemy_type == "shield_bearer":
-            # Shield bearer moves downward with shield protection
-            self.rect.y += self.speed
-            
-            # Regenerate shield if it's active
-            if hasattr(self, 'shield_active') and self.shield_active:
-                if hasattr(self, 'shield_health') and hasattr(self, 'shield_max_health') and hasattr(self, 'shield_regen_rate'):
-                    self.shield_health = min(self.shield_max_health, self.shield_health + self.shield_regen_rate)
-                
-            # Check if shield should be disabled/enabled
-            if hasattr(self, 'shield_active') and hasattr(self, 'shield_health'):
-                if self.shield_active and self.shield_health <= 0:
-                    self.shield_active = False
-                elif not self.shield_active and hasattr(self, 'shield_max_health') and self.shield_health > self.shield_max_health * 0.3:
-                    self.shield_active = True
-                
-        elif self.enemy_type == "energy_sapper":
-            # Energy sapper moves slowly
-            self.rect.y += self.speed * 0.7
-            
-            # Check if we should start/stop the beam
-            if hasattr(self, 'beam_active'):
-                if not self.beam_active and now - self.last_shot > self.shoot_delay:
-                    self.beam_active = True
-                    self.beam_start = now
-                    self.last_shot = now
-                elif self.beam_active and hasattr(self, 'beam_start') and hasattr(self, 'beam_duration') and now - self.beam_start > self.beam_duration:
-                    self.beam_active = False
-                
-                # If beam is active, look for player to target
-                if self.beam_active and player.rect.centerx > self.rect.left and player.rect.centerx < self.rect.right:
-                    if player.rect.top > self.rect.bottom:
-                        # If player is in beam, drain energy
-                        if player.energy > 0:
-                            player.energy = max(0, player.energy - 0.5)
-                        elif player.shoot_delay < 500:
-                            player.shoot_delay += 1  # Slowly increase shoot delay (reduce fire rate)
-                
-        elif self.enemy_type == "blade_spinner":
-            # Blade spinner moves in a spinning orbit while drifting downward
-            if hasattr(self, 'orbit_angle') and hasattr(self, 'orbit_speed'):
-                self.orbit_angle += self.orbit_speed
-                
-                # Calculate orbit position
-                if hasattr(self, 'orbit_radius'):
-                    orbit_x = math.cos(self.orbit_angle) * self.orbit_radius
-                    orbit_y = math.sin(self.orbit_angle) * self.orbit_radius
-                    
-                    # Update base position (drifting downward)
-                    if hasattr(self, 'base_y'):
-                        self.base_y += self.speed * 0.8
-                        
-                        # Set actual position with orbit offset
-                        if hasattr(self, 'base_x'):
-                            self.rect.centerx = int(self.base_x + orbit_x)
-                            self.rect.centery = int(self.base_y + orbit_y)
-                            
-                            # Keep within screen boundaries
-                            if self.rect.left < 0:
-                                self.rect.left = 0
-                                self.base_x = self.rect.centerx
-                            elif self.rect.right > WIDTH:
-                                self.rect.right = WIDTH 
-                                self.base_x = self.rect.centerx
-                    else:
-                        # If base position not set, initialize it
-                        self.base_x = self.rect.centerx
-                        self.base_y = self.rect.centery
-                        # And continue with basic downward movement for this frame
-                        self.rect.y += self.speed * 0.8
-                else:
-                    # Initialize orbit radius if missing
-                    self.orbit_radius = 40 + random.randint(0, 30)
-            else:
-                # Initialize orbit parameters if missing
-                self.orbit_angle = random.random() * math.pi * 2
-                self.orbit_speed = 0.05 + (random.random() * 0.05)
-                self.orbit_radius = 40 + random.randint(0, 30)
-                self.base_x = self.rect.centerx
-                self.base_y = self.rect.centery
-                # Basic movement for this frame
-                self.rect.y += self.speed
-                
-            # Rotate blade if attribute exists
-            if hasattr(self, 'blade_angle'):
-                self.blade_angle += 5
-                if self.blade_angle >= 360:
-                    self.blade_angle = 0
-            else:
-                self.blade_angle = 0
+        self.behaviour.move(self, now)
         
         # Ensure all enemies stay within horizontal screen boundaries regardless of type
         if self.rect.right > WIDTH:
@@ -1080,122 +1103,29 @@ class Enemy(pygame.sprite.Sprite):
             
         # Check if off bottom of screen
         if self.rect.top > HEIGHT:
-            self.kill()
+            sprite_culler.cull(self)
             
         # Shooting logic
         if now - self.last_shot > self.shoot_delay:
-            # Different shooting methods based on enemy type
-            if self.enemy_type == "basic":
-                self.shoot()
-            elif self.enemy_type == "elite":
-                self.shoot()  # Elite enemies use the same shooting pattern but more frequently
-            elif self.enemy_type == "cloaked_ambusher":
-                # Handled in the cloaked_ambusher logic above with burst fire
-                if hasattr(self, 'visible') and self.visible and not (hasattr(self, 'burst_active') and self.burst_active):
-                    self.shoot_cloaked_ambusher()
-            elif self.enemy_type == "splitter_drone":
-                self.shoot_splitter_drone()
-            elif self.enemy_type == "shield_bearer":
-                self.shoot_shield_bearer()
-            elif self.enemy_type == "energy_sapper":
-                if not (hasattr(self, 'beam_active') and self.beam_active):
-                    self.shoot_energy_sapper()
-            elif self.enemy_type == "blade_spinner":
-                self.shoot_blade_spinner()
-                
+            self.behaviour.fire(self, now)
             self.last_shot = now
     
     def shoot(self):
-        if self.enemy_type == "basic":
-            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom, self)
-            all_sprites.add(bullet)
-            enemy_bullets.add(bullet)
-            self.bullets.append(bullet)  # Track this bullet
-        elif self.enemy_type == "elite":
-            for angle in range(-30, 31, 60):  # Changed from 30 to 60 (fewer bullets)
-                bullet = EnemySpreadBullet(
-                    self.rect.centerx,   # x
-                    self.rect.bottom,    # y
-                    angle,               # angle
-                    self,                # owner
-                    PURPLE,              # color
-                    8,                   # size
-                    15,                  # damage
-                    6                    # speed
-                )
-                all_sprites.add(bullet)
-                enemy_bullets.add(bullet)
-                self.bullets.append(bullet)  # Track this bullet
-                
-        elif self.enemy_type == "cloaked_ambusher":
-            self.shoot_cloaked_ambusher()
-        elif self.enemy_type == "splitter_drone":
-            self.shoot_splitter_drone()
-        elif self.enemy_type == "shield_bearer":
-            self.shoot_shield_bearer()
-        elif self.enemy_type == "energy_sapper":
-            self.shoot_energy_sapper()
-        elif self.enemy_type == "blade_spinner":
-            self.shoot_blade_spinner()
+        self.behaviour.shoot(self)
     
     def hit(self, damage):
-        # For shield bearer, check if shield is active
-        if self.enemy_type == "shield_bearer" and self.shield_active:
-            self.shield_health -= damage
-            # Only take damage if shield is down
-            if self.shield_health <= 0:
-                self.shield_active = False
-            return 0  # No score for hitting shield
-            
-        # For blade spinner with reflective ability
-        if self.enemy_type == "blade_spinner" and self.reflect_bullets and random.random() < 0.4:
-            # 40% chance to reflect bullets in hard mode
-            angle = random.randint(0, 360)
-            reflected = EnemySpreadBullet(
-                self.rect.centerx,   # x
-                self.rect.centery,   # y
-                angle,               # angle
-                self,                # owner
-                (255, 200, 0),       # color (brighter orange)
-                8,                   # size
-                15,                  # damage
-                6                    # speed
-            )
-            all_sprites.add(reflected)
-            enemy_bullets.add(reflected)
-            self.bullets.append(reflected)
-            return 0  # No score for reflected hits
+        # Shields and reflection can absorb the hit entirely
+        if self.behaviour.absorb_hit(self, damage):
+            return 0  # No score for absorbed hits
         
         # Normal damage handling
         self.health -= damage
         if self.health <= 0:
-            # Special case for splitter drone
-            if self.enemy_type == "splitter_drone" and not self.is_split:
-                # Create 2-3 smaller split drones
-                num_splits = 2
-                if game_state.difficulty == "hard":
-                    num_splits = 3
-                    
-                for _ in range(num_splits):
-                    # Create smaller split drone
-                    split = Enemy("splitter_drone")
-                    split.is_split = True  # Mark as a split version
-                    split.health = self.health // 2  # Half health
-                    split.rect.centerx = self.rect.centerx + random.randint(-20, 20)
-                    split.rect.centery = self.rect.centery
-                    split.speed = self.speed * 1.5  # Faster
-                    # Make it smaller
-                    split.image = pygame.Surface((25, 25), pygame.SRCALPHA)
-                    pygame.draw.circle(split.image, (0, 200, 200), (12, 12), 12)  # Brighter teal
-                    split.rect = split.image.get_rect(center=split.rect.center)
-                    
-                    all_sprites.add(split)
-                    enemies.add(split)
+            # Archetype-specific death effects such as splitting
+            self.behaviour.destroyed(self)
             
             # Destroy all bullets fired by this enemy
-            for bullet in self.bullets[:]:  # Use a copy of the list to safely iterate
-                bullet.kill()
-            self.bullets.clear()  # Clear the list
+            self.bullets.despawn()
             
             # Random chance to drop a power-up
             if random.random() < 0.3:
@@ -1207,106 +1137,219 @@ class Enemy(pygame.sprite.Sprite):
             return self.score_value
         return 0
 
-    def shoot_cloaked_ambusher(self):
-        # Fast smaller bullets in a burst
-        bullet = EnemyBullet(self.rect.centerx, self.rect.bottom, self)
-        bullet.speedy = 7  # Faster than normal
-        bullet.image = pygame.Surface((3, 10))
-        bullet.image.fill((150, 150, 255))  # Light blue
-        all_sprites.add(bullet)
-        enemy_bullets.add(bullet)
-        self.bullets.append(bullet)
-        
-    def shoot_splitter_drone(self):
-        # Shoots a single bullet straight down
-        bullet = EnemyBullet(self.rect.centerx, self.rect.bottom, self)
-        all_sprites.add(bullet)
-        enemy_bullets.add(bullet)
-        self.bullets.append(bullet)
-        
-    def shoot_shield_bearer(self):
-        # Shoots bullets in 3 directions
-        for angle in [-30, 0, 30]:
-            bullet = EnemySpreadBullet(
-                self.rect.centerx,   # x
-                self.rect.bottom,    # y
-                angle,               # angle
-                self,                # owner
-                PURPLE,              # color
-                8,                   # size
-                15,                  # damage
-                6                    # speed
-            )
-            all_sprites.add(bullet)
-            enemy_bullets.add(bullet)
-            self.bullets.append(bullet)
-            
-    def shoot_energy_sapper(self):
-        # Doesn't shoot regular bullets when beam is active
-        if not self.beam_active:
-            # Shoot a slow, large bullet
-            bullet = EnemyBullet(self.rect.centerx, self.rect.bottom, self)
-            bullet.speedy = 3  # Slower
-            bullet.image = pygame.Surface((10, 20))
-            bullet.image.fill((200, 100, 200))  # Pink-purple
-            bullet.damage = 10  # More damage
-            all_sprites.add(bullet)
-            enemy_bullets.add(bullet)
-            self.bullets.append(bullet)
-            
-    def shoot_blade_spinner(self):
-        if pygame.time.get_ticks() - self.last_shot > self.shoot_delay:
-            self.last_shot = pygame.time.get_ticks()
-            
-            # Create multiple bullets in a spiral pattern
-            num_bullets = 4
-            for i in range(num_bullets):
-                # Create a bullet with spiral properties
-                bullet = EnemySpreadBullet(
-                    self.rect.centerx,          # x
-                    self.rect.centery,          # y
-                    0,                          # angle
-                    self,                       # owner
-                    (255, 100, 100),            # color (reddish)
-                    10,                         # size
-                    15,                         # damage
-                    6                           # speed
-                )
-                
-                # Add spiral properties
-                bullet.spiral = True
-                bullet.spiral_angle = (i * (2 * math.pi / num_bullets))  # Start at evenly spaced angles
-                bullet.spiral_speed = 0.05  # Rotation speed
-                bullet.spiral_radius = 5    # Initial radius
-                bullet.base_x = float(bullet.rect.centerx)  # Store base position for spiral calculation
-                bullet.base_y = float(bullet.rect.centery)
-                
-                all_sprites.add(bullet)
-                enemy_bullets.add(bullet)
-                self.bullets.append(bullet)
+# Enemy prototypes
+# One fully configured template per (archetype, difficulty, sector) is built
+# the first time it's needed; spawning clones it and only re-rolls the
+# per-instance random fields. Enemy speed scales with every sector, so each
+# sector is its own band.
+class EnemyPrototypes:
+    def __init__(self):
+        self.templates = {}
+        
+    def template(self, enemy_type, difficulty, sector):
+        key = (enemy_type, difficulty, sector)
+        template = self.templates.get(key)
+        if template is None:
+            template = self.templates[key] = Enemy(enemy_type)
+        return template
+        
+    def spawn(self, enemy_type="basic"):
+        return self.template(enemy_type, game_state.difficulty, game_state.sector).clone()
+        
+    def clear(self):
+        self.templates.clear()
+
+enemy_prototypes = EnemyPrototypes()
+
+# Simulation level of detail
+# Enemies spawn above the screen. Until they first come into view they
+# only drift down, updated every few frames, and can't shoot; on entering
+# the view they're promoted to full AI with fresh shooting timers.
+class LodScheduler:
+    cheap_interval = 4  # Frames between updates of dormant enemies
+    
+    def __init__(self, view):
+        self.view = view
+        self.frame = 0
+        self.full_updates = 0  # Counts for the last frame
+        self.cheap_updates = 0
+        
+    def update(self, group):
+        self.frame += 1
+        full = cheap = 0
+        view = self.view
+        interval = self.cheap_interval
+        now = pygame.time.get_ticks()
+        # Swarm enemies are moved by the enemy swarm
+        sprites = group.solo_sprites() if hasattr(group, "solo_sprites") else group.sprites()
+        for sprite in sprites:
+            if not isinstance(sprite, Enemy):
+                sprite.update()
+                continue
+            if not sprite.lod_active:
+                if not sprite.rect.colliderect(view):
+                    if (self.frame + sprite.lod_phase) % interval == 0:
+                        sprite.cheap_update(interval)
+                        cheap += 1
+                    continue
+                # Entered the view - promote to full AI
+                sprite.lod_active = True
+                sprite.restart_timers(now)
+            sprite.update()
+            full += 1
+        self.full_updates = full
+        self.cheap_updates = cheap
+        
+    def counts(self):
+        return {"full": self.full_updates, "cheap": self.cheap_updates}
+
+lod_scheduler = LodScheduler(pygame.Rect(0, 0, WIDTH, HEIGHT))
+
+# Time-sliced AI decisions
+# Choices that can wait a frame (cloaking, beam targeting, shield toggles,
+# boss pattern changes and retargeting) live in think() methods. Each frame
+# the scheduler carries on round-robin from where it stopped last frame and
+# makes decisions until its time budget is used up, so a crowded screen
+# spreads them over several frames instead of spiking one.
+class AiScheduler:
+    report_interval = 5000  # Milliseconds between overrun reports
+    
+    def __init__(self, budget_us=300):
+        self.budget_us = budget_us
+        self.cursor = 0
+        self.thinks = 0  # Counts for the last frame
+        self.deferred = 0
+        self.elapsed_us = 0
+        self.overruns = 0  # Frames that went over budget since the last report
+        self.worst_us = 0
+        self.last_report = 0
+        
+    def update(self, groups):
+        budget = self.budget_us / 1000000
+        now = pygame.time.get_ticks()
+        clock = time.perf_counter
+        start = clock()
+        # Swarm enemies have no decisions to make; gathering the rest counts against the budget
+        thinkers = [sprite for group in groups for sprite in group.solo if hasattr(sprite, "think")]
+        count = len(thinkers)
+        thinks = 0
+        elapsed = clock() - start
+        index = self.cursor % count if count else 0
+        while thinks < count:
+            thinkers[index].think(now)
+            thinks += 1
+            index = (index + 1) % count
+            cost = clock() - start - elapsed
+            elapsed += cost
+            # Stop when the next decision probably wouldn't fit
+            if elapsed + cost > budget:
+                break
+        self.cursor = index
+        self.thinks = thinks
+        self.deferred = count - thinks
+        self.elapsed_us = elapsed * 1000000
+        if elapsed > budget:
+            self.overruns += 1
+            self.worst_us = max(self.worst_us, self.elapsed_us)
+        if self.overruns and now - self.last_report > self.report_interval:
+            self.report(now)
+            
+    def report(self, now):
+        log.warning("AI budget overrun on %d frames (worst %.0f us, budget %d us)", self.overruns, self.worst_us, self.budget_us)
+        self.overruns = 0
+        self.worst_us = 0
+        self.last_report = now
+        
+    def counts(self):
+        return {"thinks": self.thinks, "deferred": self.deferred, "elapsed_us": self.elapsed_us}
+
+ai_scheduler = AiScheduler()
+
+# Garbage collection: rare during play, full collections at pauses
+gc_policy = GcPolicy(1000 / FPS)
+
+# Off-screen culling
+# Entities that leave the screen remove themselves through cull(). The
+# sweep is the safety net for any that don't: every few frames it bounds
+# tests each watched group - only groups whose members can actually leave
+# the play area - with one Rect.collidelistall call and kills whatever is
+# outside. Culls are counted per class, separately for the sweep and the
+# entities themselves, so a class that keeps needing the sweep stands out.
+class SpriteCuller:
+    report_interval = 10000  # Milliseconds between reports of swept sprites
+    
+    def __init__(self, interval=30):
+        self.interval = interval  # Frames between sweeps
+        self.frame = 0
+        self.watched = []
+        self.swept = Counter()
+        self.self_culled = Counter()
+        self.last_report = 0
+        
+    def watch(self, group, bounds):
+        # Members of group are swept once they're entirely outside bounds
+        self.watched.append((group, bounds))
+        
+    def cull(self, sprite):
+        # Called by entities leaving the screen on their own
+        self.self_culled[type(sprite).__name__] += 1
+        sprite.kill()
+        
+    def update(self):
+        self.frame += 1
+        if self.frame % self.interval:
+            return
+        swept = 0
+        for group, bounds in self.watched:
+            sprites = group.sprites()
+            inside = bounds.collidelistall([sprite.rect for sprite in sprites])
+            if len(inside) == len(sprites):
+                continue
+            inside = set(inside)
+            for i, sprite in enumerate(sprites):
+                if i not in inside:
+                    self.swept[type(sprite).__name__] += 1
+                    sprite.kill()
+                    swept += 1
+        now = pygame.time.get_ticks()
+        if swept and now - self.last_report > self.report_interval:
+            self.report(now)
+            
+    def report(self, now):
+        swept = ", ".join(f"{name} {count}" for name, count in self.swept.most_common())
+        log.debug("Culling: swept %d (%s), self-culled %d", sum(self.swept.values()), swept, sum(self.self_culled.values()))
+        self.last_report = now
+        
+    def counts(self):
+        return {"swept": dict(self.swept), "self_culled": dict(self.self_culled)}
+        
+    def reset(self):
+        self.swept.clear()
+        self.self_culled.clear()
+
+sprite_culler = SpriteCuller()
 
 # Enemy bullet classes
-class EnemyBullet(pygame.sprite.Sprite):
+# Enemy bullets are lightweight projectiles kept in the enemy_bullets batch,
+# which moves, culls and draws them
+class EnemyBullet(Projectile):
+    __slots__ = ()
+    
     def __init__(self, x, y, owner=None):
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((5, 15))
-        self.image.fill(RED)
-        self.rect = self.image.get_rect()
-        self.rect.centerx = x
-        self.rect.top = y
+        self.place(shared_surface("enemy_bullet", lambda: draw_bullet(RED, 5, 15)), x, y)
         
         # Base speed
-        self.base_speed = 5
+        base_speed = 5
         
         # Add owner's speed if available
         self.speedx = 0
-        self.speedy = self.base_speed
+        self.speedy = base_speed
         
         if owner:
             # Check for momentum tracking (used by Boss)
             if hasattr(owner, 'momentum_x') and hasattr(owner, 'momentum_y'):
                 self.speedx += owner.momentum_x * 0.7  # 70% of owner's horizontal momentum
-                self.speedy += self.base_speed + (abs(owner.momentum_y) * 0.5)  # Add momentum to base speed
+                self.speedy += base_speed + (abs(owner.momentum_y) * 0.5)  # Add momentum to base speed
             # Check for standard speed attributes
             elif hasattr(owner, 'speed'):
                 # Add a portion of the owner's speed to the bullet
@@ -1317,37 +1360,26 @@ class EnemyBullet(pygame.sprite.Sprite):
                 self.speedx += owner.speedx * 0.5  # 50% of owner's horizontal speed
             
         self.damage = 5
-        self.owner = owner  # Store reference to the enemy that fired this bullet
-        
-    def update(self):
-        self.rect.y += self.speedy
-        self.rect.x += self.speedx
-        
-        # Kill if it moves off the screen
-        if (self.rect.top > HEIGHT or self.rect.bottom < 0 or 
-            self.rect.right < 0 or self.rect.left > WIDTH):
-            self.kill()
-            
-        # Remove reference from owner's bullet list when bullet is destroyed
-        if self.owner and not self.alive():
-            if self in self.owner.bullets:
-                self.owner.bullets.remove(self)
 
-class EnemySpreadBullet(pygame.sprite.Sprite):
+def draw_bullet(color, width, height):
+    image = pygame.Surface((width, height))
+    image.fill(color)
+    return image
+
+def draw_spread_bullet(color, size):
+    return draw_bullet(color, size, size)
+
+class EnemySpreadBullet(Projectile):
+    __slots__ = ("spiral_angle", "spiral_speed", "spiral_radius", "base_x", "base_y")
+    
     def __init__(self, x, y, angle, owner=None, color=PURPLE, size=8, damage=15, speed=6):
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((size, size))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.centerx = x
-        self.rect.top = y
-        self.angle = math.radians(angle)
+        speed, adjustment = self.owner_adjustment(owner, speed)
+        self.launch(x, y, direction(angle + adjustment), self.image_for(color, size), speed, damage)
         
-        # Store base speed and calculate components
-        self.base_speed = speed
-        self.speed = speed
-        
-        # Factor in owner's speed if available
+    @staticmethod
+    def owner_adjustment(owner, speed):
+        # Returns the bullet speed and angle adjustment (degrees) the owner's movement adds
+        adjustment = 0
         if owner:
             # Check for momentum tracking (used by Boss)
             if hasattr(owner, 'momentum_x') and hasattr(owner, 'momentum_y'):
@@ -1356,51 +1388,60 @@ class EnemySpreadBullet(pygame.sprite.Sprite):
             # Check for standard speed attributes
             elif hasattr(owner, 'speed'):
                 # Add a portion of the owner's vertical speed
-                self.speed += owner.speed * 0.5  # 50% of owner's speed
+                speed += owner.speed * 0.5  # 50% of owner's speed
                 
             if hasattr(owner, 'speedx') and hasattr(owner, 'speedy'):
                 # For enemies with separate x and y speeds, adjust angle slightly based on movement
                 # This creates a more realistic firing arc when moving horizontally
                 if abs(owner.speedx) > 0.5:  # Only if moving horizontally with some speed
                     # Adjust angle slightly in the direction of movement (max 15 degrees)
-                    angle_adjustment = min(15, max(-15, owner.speedx * 3))
-                    self.angle = math.radians(angle + angle_adjustment)
-        
-        # Calculate velocity components
-        self.speedy = self.speed * math.cos(self.angle)
-        self.speedx = self.speed * math.sin(self.angle)
-        
+                    adjustment = min(15, max(-15, owner.speedx * 3))
+        return speed, adjustment
+        
+    @staticmethod
+    def image_for(color, size):
+        # Bullets of the same colour and size share one surface
+        return shared_surface(f"spread_bullet_{color}_{size}", lambda: draw_spread_bullet(color, size))
+        
+    @classmethod
+    def volley(cls, x, y, pattern, owner=None, color=PURPLE, size=8, damage=15, speed=6, rotation=0):
+        """Create every bullet of a compiled pattern, turned by rotation degrees."""
+        # Owner adjustments are the same for the whole volley, so work them out once
+        speed, adjustment = cls.owner_adjustment(owner, speed)
+        rotation += adjustment
+        vectors = rotate(pattern.vectors, rotation) if rotation else pattern.vectors
+        image = cls.image_for(color, size)
+        volley = []
+        for vector, (dx, dy) in zip(vectors, pattern.offsets):
+            bullet = cls.__new__(cls)
+            bullet.launch(x + dx, y + dy, vector, image, speed, damage)
+            volley.append(bullet)
+        return volley
+        
+    def launch(self, x, y, vector, image, speed, damage):
+        self.place(image, x, y)
+        self.speedx = speed * vector[0]
+        self.speedy = speed * vector[1]
         self.damage = damage
-        self.owner = owner  # Store reference to the enemy that fired this bullet
-        # Initialize spiral properties (will be set later if needed)
-        self.spiral = False
-        
-    def update(self):
-        # Normal movement
-        self.rect.y += self.speedy
-        self.rect.x += self.speedx
         
+    def advance(self):
         # Special spiral motion for blade spinner projectiles
-        if hasattr(self, 'spiral') and self.spiral:
-            self.spiral_angle += self.spiral_speed
-            # Calculate spiral offset
-            spiral_x = math.cos(self.spiral_angle) * self.spiral_radius
-            spiral_y = math.sin(self.spiral_angle) * self.spiral_radius
-            
-            # Update base position with regular movement
-            self.base_x += self.speedx
-            self.base_y += self.speedy
-            
-            # Set actual position with spiral offset
-            self.rect.centerx = int(self.base_x + spiral_x)
-            self.rect.centery = int(self.base_y + spiral_y)
-            
-            # Gradually increase spiral radius for expanding effect
-            self.spiral_radius += 0.1
-        
-        # Kill if it moves off the screen
-        if self.rect.bottom < 0 or self.rect.top > HEIGHT or self.rect.left > WIDTH or self.rect.right < 0:
-            self.kill()
+        self.spiral_angle += self.spiral_speed
+        # Calculate spiral offset
+        sin, cos = sin_cos(self.spiral_angle)
+        spiral_x = cos * self.spiral_radius
+        spiral_y = sin * self.spiral_radius
+        
+        # Update base position with regular movement
+        self.base_x += self.speedx
+        self.base_y += self.speedy
+        
+        # Set actual position with spiral offset
+        self.x = self.base_x + spiral_x - self.width / 2
+        self.y = self.base_y + spiral_y - self.height / 2
+        
+        # Gradually increase spiral radius for expanding effect
+        self.spiral_radius += 0.1
 
 # PowerUp class
 class PowerUp(pygame.sprite.Sprite):
@@ -1437,7 +1478,7 @@ class PowerUp(pygame.sprite.Sprite):
     def update(self):
         self.rect.y += self.speedy
         if self.rect.top > HEIGHT:
-            self.kill()
+            sprite_culler.cull(self)
 
     def apply_effect(self, player):
         if self.type == "health":
@@ -1466,6 +1507,10 @@ class PowerUp(pygame.sprite.Sprite):
 
 # Boss class
 class Boss(pygame.sprite.Sprite):
+    spread_template = PatternTemplate(compile_pattern(range(-45, 46, 15)), PURPLE, 8, 15, 6)
+    wide_template = PatternTemplate(compile_pattern(range(-90, 91, 30)), PURPLE, 8, 15, 6)  # -90 to 90 degrees range
+    aimed_template = PatternTemplate(compile_pattern(range(-20, 21, 10)), PURPLE, 8, 15, 7)
+    
     def __init__(self, sector):
         pygame.sprite.Sprite.__init__(self)
         self.sector = sector
@@ -1474,115 +1519,15 @@ class Boss(pygame.sprite.Sprite):
         self.dying = False
         
         # Track boss bullets
-        self.bullets = []
-        
-        # Difficulty multipliers
-        difficulty_multipliers = {
-            "easy": 0.8,
-            "normal": 1.0, 
-            "hard": 1.5
-        }
-        difficulty_mult = difficulty_multipliers[game_state.difficulty]
+        self.bullets = BulletTracker()
         
-        # Boss visuals and stats based on sector
-        if sector == 1:
-            # Nova Prime Edge Boss
-            try:
-                # Try both naming formats for boss images
-                self.image = load_image(f"assets/images/boss_{sector}.png")
-            except:
-                try:
-                    # Alternative naming format
-                    self.image = load_image(f"assets/images/boss_sector{sector}.png")
-                except:
-                    # Fallback if image loading fails
-                    self.image = pygame.Surface((100, 100), pygame.SRCALPHA)
-                    pygame.draw.polygon(self.image, RED, [(0, 0), (100, 0), (100, 100), (50, 75), (0, 100)])
-            self.max_health = int(500 * difficulty_mult)
-            self.shoot_delay = int(800 / difficulty_mult)  # Shorter delay = faster shooting on higher difficulties
-            self.name = "Sector 1 - Edge Guardian"
-        elif sector == 2:
-            # Asteroid Field Anomaly
-            try:
-                # Try both naming formats for boss images
-                self.image = load_image(f"assets/images/boss_{sector}.png")
-            except:
-                try:
-                    # Alternative naming format
-                    self.image = load_image(f"assets/images/boss_sector{sector}.png")
-                except:
-                    # Fallback if image loading fails
-                    self.image = pygame.Surface((120, 120), pygame.SRCALPHA)
-                    pygame.draw.circle(self.image, (150, 75, 0), (60, 60), 60)
-            self.max_health = int(800 * difficulty_mult)
-            self.shoot_delay = int(700 / difficulty_mult)
-            self.name = "Sector 2 - Asteroid Titan"
-        elif sector == 3:
-            # Rhovax Border Patrol
-            try:
-                # Try both naming formats for boss images
-                self.image = load_image(f"assets/images/boss_{sector}.png")
-            except:
-                try:
-                    # Alternative naming format
-                    self.image = load_image(f"assets/images/boss_sector{sector}.png")
-                except:
-                    # Fallback if image loading fails
-                    self.image = pygame.Surface((150, 100), pygame.SRCALPHA)
-                    pygame.draw.polygon(self.image, (150, 0, 150), [(0, 50), (75, 0), (150, 50), (75, 100)])
-            self.max_health = int(1200 * difficulty_mult)
-            self.shoot_delay = int(600 / difficulty_mult)
-            self.name = "Sector 3 - Rhovax Dreadnought"
-        elif sector == 4:
-            # Dominion Shipyards
-            try:
-                # Try both naming formats for boss images
-                self.image = load_image(f"assets/images/boss_{sector}.png")
-            except:
-                try:
-                    # Alternative naming format
-                    self.image = load_image(f"assets/images/boss_sector{sector}.png")
-                except:
-                    # Fallback if image loading fails
-                    self.image = pygame.Surface((160, 160), pygame.SRCALPHA)
-                    pygame.draw.rect(self.image, (0, 100, 200), (0, 0, 160, 160))
-                    pygame.draw.rect(self.image, (0, 0, 0), (30, 30, 100, 100))
-            self.max_health = int(2000 * difficulty_mult)
-            self.shoot_delay = int(500 / difficulty_mult)
-            self.name = "Sector 4 - Shipyard Sentinel"
-        elif sector == 5:
-            # Cosmic Storm Nexus
-            try:
-                # Try both naming formats for boss images
-                self.image = load_image(f"assets/images/boss_{sector}.png")
-            except:
-                try:
-                    # Alternative naming format
-                    self.image = load_image(f"assets/images/boss_sector{sector}.png")
-                except:
-                    # Fallback if image loading fails
-                    self.image = pygame.Surface((180, 150), pygame.SRCALPHA)
-                    pygame.draw.ellipse(self.image, (50, 50, 200), (0, 0, 180, 150))
-                    pygame.draw.ellipse(self.image, (100, 0, 100), (30, 30, 120, 90))
-            self.max_health = int(3000 * difficulty_mult)
-            self.shoot_delay = int(400 / difficulty_mult)
-            self.name = "Sector 5 - Storm Lord"
-        else:  # Sector 6 - Final Boss
-            # Dominion Mothership
-            try:
-                # Try both naming formats for boss images
-                self.image = load_image(f"assets/images/boss_{sector}.png")
-            except:
-                try:
-                    # Alternative naming format
-                    self.image = load_image(f"assets/images/boss_sector{sector}.png")
-                except:
-                    # Fallback if image loading fails
-                    self.image = pygame.Surface((200, 200), pygame.SRCALPHA)
-                    pygame.draw.polygon(self.image, (200, 0, 0), [(0, 0), (200, 0), (160, 100), (200, 200), (0, 200), (40, 100)])
-            self.max_health = int(5000 * difficulty_mult)
-            self.shoot_delay = int(300 / difficulty_mult)
-            self.name = "Sector 6 - Dominion Mothership"
+        # Boss visuals and stats based on sector, from the compiled table
+        bosses = definitions.bosses[game_state.difficulty]
+        stats = bosses[min(sector, len(bosses)) - 1]
+        self.image = definition_image([path.format(sector=sector) for path in stats.images], stats.fallback)
+        self.max_health = stats.max_health
+        self.shoot_delay = stats.shoot_delay
+        self.name = stats.name
             
         self.rect = self.image.get_rect()
         self.rect.centerx = WIDTH // 2
@@ -1592,10 +1537,12 @@ class Boss(pygame.sprite.Sprite):
         self.pattern = 0  # Current attack pattern
         self.pattern_timer = pygame.time.get_ticks()
         self.pattern_delay = 5000  # Change patterns every 5 seconds
+        self.charge_dir = 0  # Which way pattern 2 charges, -1, 0 or 1
+        self.aim_angle = 90  # Where pattern 2 aims, straight down to start with
         
         # Base speed attributes - scale with difficulty and sector
-        self.base_speed = 2 + (sector * 0.2)  # Slightly faster in higher sectors
-        self.speed = self.base_speed * difficulty_multipliers[game_state.difficulty]
+        self.base_speed = stats.base_speed + (sector * stats.speed_per_sector)  # Slightly faster in higher sectors
+        self.speed = self.base_speed * stats.speed_multiplier
         
         # Initial speed direction
         self.speedx = self.speed
@@ -1605,7 +1552,12 @@ class Boss(pygame.sprite.Sprite):
         self.momentum_x = 0  # Tracks recent movement for more natural projectile physics
         self.momentum_y = 0
         
-        self.score_value = sector * 500  # More points for later bosses
+        self.score_value = sector * stats.score_per_sector  # More points for later bosses
+        
+    def restart_timers(self, now):
+        # Bosses can be built ahead of time; start the attack clock on arrival
+        self.last_shot = now
+        self.pattern_timer = now
     
     def update(self):
         # Boss movement patterns
@@ -1615,11 +1567,6 @@ class Boss(pygame.sprite.Sprite):
         prev_x = self.rect.x
         prev_y = self.rect.y
         
-        # Change attack pattern periodically
-        if now - self.pattern_timer > self.pattern_delay:
-            self.pattern = (self.pattern + 1) % 3  # Cycle through 3 patterns
-            self.pattern_timer = now
-            
         # Boss movement based on pattern
         if self.pattern == 0:
             # Pattern 0: Move back and forth horizontally
@@ -1638,14 +1585,8 @@ class Boss(pygame.sprite.Sprite):
                 self.speedy *= -1
         else:  # pattern == 2
             # Pattern 2: Charge toward player's x position
-            if player.rect.centerx > self.rect.centerx:
-                self.rect.x += self.speed * 1.5
-                self.speedx = self.speed * 1.5
-            elif player.rect.centerx < self.rect.centerx:
-                self.rect.x -= self.speed * 1.5
-                self.speedx = -self.speed * 1.5
-            else:
-                self.speedx = 0
+            self.speedx = self.speed * 1.5 * self.charge_dir
+            self.rect.x += self.speedx
             
             # Add a small vertical movement using sine wave
             vertical_move = math.sin(now / 500) * 2
@@ -1675,23 +1616,31 @@ class Boss(pygame.sprite.Sprite):
             self.shoot()
             self.last_shot = now
             
-    def shoot(self):
-        if self.pattern == 0:
-            # Simple spread pattern - only horizontally and downward
-            for angle in [-45, -30, -15, 0, 15, 30, 45]:
-                # In our coordinate system, only bullets with positive speedy go downward
-                # cos(0) = 1, so a 0 angle goes straight down
-                bullet = EnemySpreadBullet(
-                    self.rect.centerx,   # x
-                    self.rect.bottom,    # y
-                    angle,               # angle
-                    self,                # owner
-                    PURPLE,              # color
-                    8,                   # size
-                    15,                  # damage
-                    6 + abs(self.momentum_x) * 0.3  # speed + momentum factor
-                )
-                
+    def think(self, now):
+        # Change attack pattern periodically
+        if now - self.pattern_timer > self.pattern_delay:
+            self.pattern = (self.pattern + 1) % 3  # Cycle through 3 patterns
+            self.pattern_timer = now
+            
+        if self.pattern == 2:
+            # Retarget the charge and the aimed shots on the player
+            if player.rect.centerx > self.rect.centerx:
+                self.charge_dir = 1
+            elif player.rect.centerx < self.rect.centerx:
+                self.charge_dir = -1
+            else:
+                self.charge_dir = 0
+            target_y = max(player.rect.centery, self.rect.centery + 50)  # Force target to be below boss
+            self.aim_angle = math.degrees(math.atan2(target_y - self.rect.centery,
+                                                     player.rect.centerx - self.rect.centerx))
+            
+    def shoot(self):
+        if self.pattern == 0:
+            # Simple spread pattern - only horizontally and downward
+            # In our coordinate system, only bullets with positive speedy go downward
+            # cos(0) = 1, so a 0 angle goes straight down
+            template = self.spread_template._replace(speed=6 + abs(self.momentum_x) * 0.3)  # speed + momentum factor
+            for bullet in spawn_volley("enemy", (self.rect.centerx, self.rect.bottom), template, self):
                 # Add momentum to bullet trajectory
                 bullet.speedx += self.momentum_x * 0.7  # 70% of boss's horizontal momentum
                 
@@ -1699,24 +1648,10 @@ class Boss(pygame.sprite.Sprite):
                 if bullet.speedy < 0:
                     bullet.speedy = -bullet.speedy  # Reverse if it would go upward
                 
-                all_sprites.add(bullet)
-                enemy_bullets.add(bullet)
-                self.bullets.append(bullet)  # Track this bullet
-                
         elif self.pattern == 1:
             # Modified pattern - only shoot downward with wider spread
-            for angle in range(-90, 91, 30):  # -90 to 90 degrees range
-                bullet = EnemySpreadBullet(
-                    self.rect.centerx,   # x
-                    self.rect.centery,   # y
-                    angle,               # angle
-                    self,                # owner
-                    PURPLE,              # color
-                    8,                   # size
-                    15,                  # damage
-                    6 + (abs(self.momentum_x) + abs(self.momentum_y)) * 0.25  # speed + momentum factor
-                )
-                
+            template = self.wide_template._replace(speed=6 + (abs(self.momentum_x) + abs(self.momentum_y)) * 0.25)
+            for bullet in spawn_volley("enemy", (self.rect.centerx, self.rect.centery), template, self):
                 # Add momentum to bullet trajectory
                 bullet.speedx += self.momentum_x * 0.6  # 60% of boss's horizontal momentum
                 
@@ -1724,32 +1659,14 @@ class Boss(pygame.sprite.Sprite):
                 if bullet.speedy < 0:
                     bullet.speedy = 0  # Make it go horizontally instead of upward
                 
-                all_sprites.add(bullet)
-                enemy_bullets.add(bullet)
-                self.bullets.append(bullet)  # Track this bullet
-                
         elif self.pattern == 2:
-            # Aimed pattern - ensure it's only aimed horizontally or downward
-            target_y = max(player.rect.centery, self.rect.centery + 50)  # Force target to be below boss
-            angle = math.degrees(math.atan2(target_y - self.rect.centery, 
-                                          player.rect.centerx - self.rect.centerx))
-            
+            # Aimed pattern - aim_angle is kept horizontal or downward by think()
             # Calculate bullet speed based on boss momentum and pattern
             # Pattern 2 is more aggressive, so bullets are faster
-            bullet_speed = 7 + (abs(self.momentum_x) + abs(self.momentum_y)) * 0.4
-            
-            for i in range(-2, 3):
-                bullet = EnemySpreadBullet(
-                    self.rect.centerx,   # x
-                    self.rect.bottom,    # y
-                    angle + (i * 10) + 90,  # angle - 90 degree offset makes 0 angle point downward
-                    self,                # owner
-                    PURPLE,              # color
-                    8,                   # size
-                    15,                  # damage
-                    bullet_speed         # speed with momentum factor
-                )
-                
+            template = self.aimed_template._replace(
+                speed=7 + (abs(self.momentum_x) + abs(self.momentum_y)) * 0.4,
+                rotation=self.aim_angle + 90)  # 90 degree offset makes 0 angle point downward
+            for bullet in spawn_volley("enemy", (self.rect.centerx, self.rect.bottom), template, self):
                 # Add momentum to bullet trajectory - more in pattern 2 for "charging" effect
                 bullet.speedx += self.momentum_x * 0.8  # 80% of boss's horizontal momentum
                 bullet.speedy += self.momentum_y * 0.5  # 50% of boss's vertical momentum
@@ -1757,14 +1674,10 @@ class Boss(pygame.sprite.Sprite):
                 # Double-check to make absolutely sure no bullets go upward
                 if bullet.speedy < 0:
                     bullet.speedy = abs(bullet.speedy)  # Force to be positive (downward)
-                
-                all_sprites.add(bullet)
-                enemy_bullets.add(bullet)
-                self.bullets.append(bullet)  # Track this bullet
             
             # Also spawn some minions
             if random.random() < 0.3 and len(enemies) < 5:
-                enemy = Enemy("elite")
+                enemy = enemy_prototypes.spawn("elite")
                 enemy.rect.centerx = self.rect.centerx
                 enemy.rect.top = self.rect.bottom
                 all_sprites.add(enemy)
@@ -1776,9 +1689,7 @@ class Boss(pygame.sprite.Sprite):
             self.dying = True
             
             # Destroy all bullets fired by this boss
-            for bullet in self.bullets[:]:  # Use a copy of the list to safely iterate
-                bullet.kill()
-            self.bullets.clear()  # Clear the list
+            self.bullets.despawn()
             
             # Drop several power-ups when boss is killed
             for _ in range(3 + self.sector):
@@ -1789,7 +1700,7 @@ class Boss(pygame.sprite.Sprite):
             
             # Spawn a shop portal where the boss was
             spawn_shop_portal(self.rect.centerx, self.rect.centery)
-            print(f"Boss defeated in sector {self.sector}! Shop portal spawned.")
+            log.info("Boss defeated in sector %d! Shop portal spawned.", self.sector)
             
             # Remove the boss
             self.kill()
@@ -1801,48 +1712,55 @@ class Boss(pygame.sprite.Sprite):
 class ShopPortal(pygame.sprite.Sprite):
     def __init__(self, x, y):
         pygame.sprite.Sprite.__init__(self)
-        # Create a visually distinct portal
-        self.image = pygame.Surface((80, 80), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (50, 255, 150), (40, 40), 35)  # Green outer circle
-        pygame.draw.circle(self.image, (0, 0, 0), (40, 40), 25)       # Black inner circle
-        pygame.draw.circle(self.image, (255, 255, 255), (40, 40), 15) # White core
-        
-        # Add pulsing effect
-        self.pulse_size = 0
-        self.pulse_direction = 1
-        self.original_image = self.image.copy()
+        # Pulse frames are drawn once and shared by every portal
+        frames = build_animation("shop_portal", ShopPortal.draw_frame, ShopPortal.pulse_sizes())
+        self.animation = FrameAnimation(frames)
+        self.image = self.animation.frame
         
         self.rect = self.image.get_rect()
         self.rect.centerx = x
         self.rect.centery = y
         
-        # Add hover text
-        self.font = pygame.font.SysFont("Arial", 14)
-        self.text = self.font.render("ENTER SHOP (Press E)", True, WHITE)
+        # Add hover text (rendered once for all portals)
+        self.text = shared_surface("shop_portal_text", ShopPortal.render_text)
         self.text_rect = self.text.get_rect()
         
+    @staticmethod
+    def pulse_sizes():
+        # One full pulse loop, stepping 0.1 between -5 and 5 (kept in tenths to avoid float drift)
+        sizes = []
+        pulse, direction = 0, 1
+        while True:
+            sizes.append(int(80 + pulse / 10))
+            pulse += direction
+            if pulse > 50:
+                direction = -1
+            elif pulse < -50:
+                direction = 1
+            if pulse == 0 and direction == 1:
+                return sizes
+        
+    @staticmethod
+    def draw_frame(size):
+        # Draw the portal circles at the given pulse size
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(image, (50, 255, 150), (size//2, size//2), size//2 - 5)   # Green outer circle
+        pygame.draw.circle(image, (0, 0, 0), (size//2, size//2), size//2 - 15)       # Black inner circle
+        pygame.draw.circle(image, (255, 255, 255), (size//2, size//2), size//2 - 25) # White core
+        return image
+        
+    @staticmethod
+    def render_text():
+        return get_font(14).render("ENTER SHOP (Press E)", True, WHITE)
+        
     def update(self):
-        # Create a pulsing effect
-        self.pulse_size += 0.1 * self.pulse_direction
-        if self.pulse_size > 5:
-            self.pulse_direction = -1
-        elif self.pulse_size < -5:
-            self.pulse_direction = 1
-            
-        # Pulse the portal
-        size = int(80 + self.pulse_size)
-        pulsed_image = pygame.Surface((size, size), pygame.SRCALPHA)
-        
-        # Draw the pulsing circles
-        pygame.draw.circle(pulsed_image, (50, 255, 150), (size//2, size//2), size//2 - 5)
-        pygame.draw.circle(pulsed_image, (0, 0, 0), (size//2, size//2), size//2 - 15)
-        pygame.draw.circle(pulsed_image, (255, 255, 255), (size//2, size//2), size//2 - 25)
-        
-        # Update image and rect
-        self.image = pulsed_image
-        old_center = self.rect.center
-        self.rect = self.image.get_rect()
-        self.rect.center = old_center
+        # Advance the pulse; only the size changes between frames
+        image = self.animation.advance()
+        if image is not self.image:
+            self.image = image
+            old_center = self.rect.center
+            self.rect.size = image.get_size()
+            self.rect.center = old_center
         
         # Update text position
         self.text_rect.centerx = self.rect.centerx
@@ -1853,6 +1771,12 @@ class ShopPortal(pygame.sprite.Sprite):
         surface.blit(self.image, self.rect)
         surface.blit(self.text, self.text_rect)
 
+# Horde mode: endless mode with waves of hundreds to thousands of enemies
+HORDE_ENEMIES = 300  # Enemies per wave in the first horde sector
+HORDE_GROWTH = 150  # Added to every wave each sector after that
+HORDE_MAX_ENEMIES = 2000
+HORDE_COLLISION_DAMAGE = 10  # There's no dodging every one of them
+
 # Game state classes
 class GameState:
     def __init__(self):
@@ -1906,29 +1830,31 @@ class GameState:
             self.difficulty = "normal"  # Default difficulty
             
         # Track changes for debugging
-        print(f"GameState reset: {prev_state} -> {self.state}")
+        log.debug("GameState reset: %s -> %s", prev_state, self.state)
         
-        # Clear endless mode
+        # Clear endless and horde mode
         if hasattr(self, 'endless_mode'):
             delattr(self, 'endless_mode')
+        if hasattr(self, 'horde_mode'):
+            delattr(self, 'horde_mode')
         
     def next_wave(self):
         # Special handling for endless mode wave transitions
         if hasattr(self, 'endless_mode') and self.endless_mode and self.sector >= 7:
-            print(f"Endless mode wave transition: Sector {self.sector}, Wave {self.wave}")
+            log.debug("Endless mode wave transition: Sector %d, Wave %d", self.sector, self.wave)
             # Make sure we don't get stuck in high sectors
             if self.wave >= self.waves_per_sector:
-                print(f"Forcing wave progression in sector {self.sector}")
+                log.warning("Forcing wave progression in sector %d", self.sector)
             
         self.wave += 1
         
         # Print debug info for wave progression
-        print(f"Next wave: Sector {self.sector}, Wave {self.wave}, waves_per_sector: {self.waves_per_sector}")
+        log.info("Next wave: Sector %d, Wave %d, waves_per_sector: %d", self.sector, self.wave, self.waves_per_sector)
         
         # Ensure boss fights happen in endless mode
         if hasattr(self, 'endless_mode') and self.endless_mode and self.sector >= 7 and self.wave > self.waves_per_sector:
             # Boss wave in endless mode
-            print(f"Triggering boss wave in endless mode sector {self.sector}")
+            log.info("Triggering boss wave in endless mode sector %d", self.sector)
             self.boss_fight = True
             # Set a flag to indicate we want a random boss
             self.use_random_boss = True
@@ -1945,7 +1871,7 @@ class GameState:
         self.boss_fight = False
         
         # Debug info for sector transitions
-        print(f"Moving to next sector: {self.sector}")
+        log.info("Moving to next sector: %d", self.sector)
         
         # Award resources for sector completion
         self.resources += 100 * self.sector
@@ -1962,10 +1888,14 @@ class GameState:
         if hasattr(self, 'endless_mode') and self.endless_mode:
             # Keep boss fights coming at a regular cadence
             self.waves_per_sector = 4  # Fewer waves between bosses in endless mode
-            print(f"Endless mode sector {self.sector}, waves_per_sector set to {self.waves_per_sector}")
+            log.debug("Endless mode sector %d, waves_per_sector set to %d", self.sector, self.waves_per_sector)
             
-            # Increase enemy count but cap it
-            self.wave_enemies = min(15, 5 + self.sector)  # Cap at 15 enemies per wave
+            if getattr(self, 'horde_mode', False):
+                # Horde waves grow by a big step every sector
+                self.wave_enemies = min(HORDE_MAX_ENEMIES, HORDE_ENEMIES + HORDE_GROWTH * (self.sector - 7))
+            else:
+                # Increase enemy count but cap it
+                self.wave_enemies = min(15, 5 + self.sector)  # Cap at 15 enemies per wave
         else:
             # Regular progression - more gradual
             self.wave_enemies = min(15, 5 + self.sector)  # Cap at 15 enemies per wave
@@ -1977,9 +1907,19 @@ class GameState:
         count = self.purchase_counts.get(item_type, 0)
         return int(base_price * (1 + (0.1 * count)))
 
+# Fonts are loaded once per size and shared by all text drawing
+fonts = {}
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        font = pygame.font.SysFont("Arial", size)
+        fonts[size] = font
+    return font
+
 # Function to draw text
 def draw_text(surface, text, size, x, y, color=WHITE, return_rect=False):
-    font = pygame.font.SysFont("Arial", size)
+    font = get_font(size)
     text_surface = font.render(text, True, color)
     text_rect = text_surface.get_rect()
     text_rect.midtop = (x, y)
@@ -1997,6 +1937,9 @@ def draw_bar(surface, x, y, value, max_value, width, height, color):
     pygame.draw.rect(surface, color, fill_rect)
     pygame.draw.rect(surface, WHITE, outline_rect, 2)
 
+# Buttons drawn during the current menu render, used for hover tracking
+drawn_buttons = []
+
 # Function to draw a button and check if it's clicked
 def draw_button(surface, text, size, x, y, width, height, color=BLUE, hover_color=GREEN, text_color=WHITE):
     # Get mouse position and adjust for offset if we're drawing to gameplay_surface
@@ -2026,90 +1969,103 @@ def draw_button(surface, text, size, x, y, width, height, color=BLUE, hover_colo
     
     # Draw button border
     pygame.draw.rect(surface, WHITE, button_rect, 2, border_radius=10)
+    drawn_buttons.append(button_rect)
     
     return clicked
 
-# Function to show controls screen
-def show_controls_screen():
-    controls_running = True
+# Shared render target for every screen
+gameplay_surface = pygame.Surface((WIDTH, HEIGHT))
+
+# Base for screens that block on input and only redraw when something changed
+class MenuScreen(Scene):
+    frame_rate = None
     
-    while controls_running:
-        clock.tick(FPS)
-        
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    controls_running = False
-        
-        # Draw controls screen
-        screen.fill(BLACK)
-        
-        # Create a gameplay surface
-        controls_surface = pygame.Surface((WIDTH, HEIGHT))
-        controls_surface.fill(BLACK)
-        
-        draw_text(controls_surface, "CONTROLS", 50, WIDTH/2, 80)
-        
-        controls = [
-            "Movement: WASD or Arrow Keys",
-            "Shoot: SPACE or Left Mouse Button",
-            "Shield: E key",
-            "Hyper Dash: SHIFT key",
-            "Pause: ESC key",
-            "Enter Shop: E key (when next to shop portal)",
-            "Select Items: Arrow Keys / WASD and ENTER",
-            "Exit Menus: ESC key"
-        ]
+    def __init__(self):
+        Scene.__init__(self)
+        self.menu = IdleMenu((OFFSET_X, OFFSET_Y))
+        
+    def enter(self):
+        self.menu.invalidate()
+        # Nothing is moving in menus, so collect the garbage now
+        gc_policy.pause(self.name)
         
-        y_pos = 160
-        for control in controls:
-            draw_text(controls_surface, control, 24, WIDTH/2, y_pos)
-            y_pos += 40
+    def resume(self):
+        # Returning from a sub-screen - everything needs redrawing
+        self.menu.invalidate()
+        
+    def poll_events(self):
+        return self.menu.wait()
+        
+    def needs_render(self):
+        return self.menu.start_redraw()
+        
+    def rendered(self):
+        # Remember where the buttons were drawn for hover tracking
+        self.menu.finish_render(drawn_buttons)
+        drawn_buttons.clear()
+
+def render_menu_background(title, title_y, lines=(), line_size=24, line_y=160, line_spacing=40):
+    # Static menu text is rendered once into a background and reused
+    background = pygame.Surface((WIDTH, HEIGHT))
+    background.fill(BLACK)
+    draw_text(background, title, 50, WIDTH/2, title_y)
+    for i, line in enumerate(lines):
+        draw_text(background, line, line_size, WIDTH/2, line_y + i * line_spacing)
+    return background
+
+# Controls screen
+class ControlsScreen(MenuScreen):
+    name = "controls"
+    controls = [
+        "Movement: WASD or Arrow Keys",
+        "Shoot: SPACE or Left Mouse Button",
+        "Shield: E key",
+        "Hyper Dash: SHIFT key",
+        "Pause: ESC key",
+        "Enter Shop: E key (when next to shop portal)",
+        "Select Items: Arrow Keys / WASD and ENTER",
+        "Exit Menus: ESC key"
+    ]
+    
+    def handle_event(self, event):
+        if event.type == KEYDOWN:
+            if event.key == K_ESCAPE:
+                self.stack.pop()
+                
+    def render(self, surface):
+        # Draw controls screen over the cached background
+        background = shared_surface("controls_background", lambda: render_menu_background("CONTROLS", 80, self.controls))
+        surface.blit(background, (0, 0))
         
         # Back button
-        if draw_button(controls_surface, "Back to Menu", 24, WIDTH/2, HEIGHT-80, 200, 50):
-            controls_running = False
-            
-        # Draw the controls surface to the screen with offsets
-        screen.blit(controls_surface, (OFFSET_X, OFFSET_Y))
-        pygame.display.flip()
+        if draw_button(surface, "Back to Menu", 24, WIDTH/2, HEIGHT-80, 200, 50):
+            self.stack.pop()
 
-# Function to show difficulty selection screen
-def show_difficulty_screen():
-    difficulty_running = True
-    selected_difficulty = game_state.difficulty
+# Difficulty selection screen
+class DifficultyScreen(MenuScreen):
+    name = "difficulty"
     
-    while difficulty_running:
-        clock.tick(FPS)
-        
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    difficulty_running = False
-        
-        # Draw difficulty screen
-        screen.fill(BLACK)
-        
-        # Create a gameplay surface
-        difficulty_surface = pygame.Surface((WIDTH, HEIGHT))
-        difficulty_surface.fill(BLACK)
-        
-        draw_text(difficulty_surface, "SELECT DIFFICULTY", 50, WIDTH/2, 80)
-        
-        # Description based on difficulty
-        descriptions = {
-            "easy": "More health, slower enemies, more resources",
-            "normal": "Standard challenge",
-            "hard": "Less health, faster enemies, tougher bosses"
-        }
+    # Description based on difficulty
+    descriptions = {
+        "easy": "More health, slower enemies, more resources",
+        "normal": "Standard challenge",
+        "hard": "Less health, faster enemies, tougher bosses"
+    }
+    
+    def enter(self):
+        MenuScreen.enter(self)
+        self.selected_difficulty = game_state.difficulty
+        
+    def handle_event(self, event):
+        if event.type == KEYDOWN:
+            if event.key == K_ESCAPE:
+                self.stack.pop()
+                
+    def render(self, surface):
+        # Draw difficulty screen over the cached background
+        background = shared_surface("difficulty_background", lambda: render_menu_background("SELECT DIFFICULTY", 80))
+        surface.blit(background, (0, 0))
+        shown_difficulty = self.selected_difficulty
         
         # Difficulty buttons
         button_width = 200
@@ -2118,58 +2074,159 @@ def show_difficulty_screen():
         spacing = 100
         
         # Easy button
-        easy_color = GREEN if selected_difficulty == "easy" else BLUE
-        if draw_button(difficulty_surface, "Easy", 30, WIDTH/2, button_y, button_width, button_height, easy_color):
-            selected_difficulty = "easy"
+        easy_color = GREEN if self.selected_difficulty == "easy" else BLUE
+        if draw_button(surface, "Easy", 30, WIDTH/2, button_y, button_width, button_height, easy_color):
+            self.selected_difficulty = "easy"
             
         # Normal button
-        normal_color = GREEN if selected_difficulty == "normal" else BLUE
-        if draw_button(difficulty_surface, "Normal", 30, WIDTH/2, button_y + spacing, button_width, button_height, normal_color):
-            selected_difficulty = "normal"
+        normal_color = GREEN if self.selected_difficulty == "normal" else BLUE
+        if draw_button(surface, "Normal", 30, WIDTH/2, button_y + spacing, button_width, button_height, normal_color):
+            self.selected_difficulty = "normal"
             
         # Hard button
-        hard_color = GREEN if selected_difficulty == "hard" else BLUE
-        if draw_button(difficulty_surface, "Hard", 30, WIDTH/2, button_y + spacing*2, button_width, button_height, hard_color):
-            selected_difficulty = "hard"
+        hard_color = GREEN if self.selected_difficulty == "hard" else BLUE
+        if draw_button(surface, "Hard", 30, WIDTH/2, button_y + spacing*2, button_width, button_height, hard_color):
+            self.selected_difficulty = "hard"
         
         # Show description of selected difficulty
-        draw_text(difficulty_surface, descriptions[selected_difficulty], 24, WIDTH/2, button_y + spacing*3)
+        draw_text(surface, self.descriptions[self.selected_difficulty], 24, WIDTH/2, button_y + spacing*3)
+        
+        if self.selected_difficulty != shown_difficulty:
+            self.menu.invalidate()  # Redraw with the new highlight
         
         # Back and Confirm buttons
-        if draw_button(difficulty_surface, "Back", 24, WIDTH/3, HEIGHT-80, 150, 50):
-            difficulty_running = False
+        if draw_button(surface, "Back", 24, WIDTH/3, HEIGHT-80, 150, 50):
+            self.stack.pop()
             
-        if draw_button(difficulty_surface, "Confirm", 24, WIDTH*2/3, HEIGHT-80, 150, 50):
-            game_state.difficulty = selected_difficulty
-            difficulty_running = False
-        
-        # Draw the difficulty surface to the screen with offsets
-        screen.blit(difficulty_surface, (OFFSET_X, OFFSET_Y))
-        pygame.display.flip()
+        elif draw_button(surface, "Confirm", 24, WIDTH*2/3, HEIGHT-80, 150, 50):
+            game_state.difficulty = self.selected_difficulty
+            self.stack.pop()
 
 # Initialize game state and sprite groups
 game_state = GameState()
-all_sprites = pygame.sprite.Group()
+all_sprites = SplitGroup()
 player = Player()
 bullets = pygame.sprite.Group()
-enemy_bullets = pygame.sprite.Group()
-enemies = pygame.sprite.Group()
+enemy_bullets = ProjectileBatch(WIDTH, HEIGHT, on_cull=sprite_culler.cull)
+enemy_swarm = EnemySwarm(WIDTH, HEIGHT, on_cull=sprite_culler.cull)
+enemies = SwarmGroup(enemy_swarm)
 powerups = pygame.sprite.Group()
-bosses = pygame.sprite.Group()
+bosses = SplitGroup()
 shop_portals = pygame.sprite.Group()
+target_index = TargetIndex((enemies, bosses))
 all_sprites.add(player)
 
+# Only these can leave the play area. Enemies wait above the screen
+# before they enter, so their bounds reach further up. Enemy bullets are
+# culled by their batch every frame.
+CULL_BOUNDS = pygame.Rect(-100, -100, WIDTH + 200, HEIGHT + 200)
+sprite_culler.watch(bullets, CULL_BOUNDS)
+sprite_culler.watch(powerups, CULL_BOUNDS)
+sprite_culler.watch(enemies, pygame.Rect(-100, -500, WIDTH + 200, HEIGHT + 600))
+
+# Batched volley spawning
+# Shooters hand over a whole volley at once. Its bullets go into their
+# groups in one pass per group, or into the enemy projectile batch in one
+# call, and are tracked by the owner's bullet tracker. The returned handle
+# can take the volley back out again.
+VOLLEY_TARGETS = {
+    "player": lambda volley: add_new((all_sprites, bullets), volley),
+    "enemy": enemy_bullets.extend,
+}
+
+DRONE_TEMPLATES = {
+    "normal": single_shot(Bullet, chance=0.7),
+    "spread": ShotTemplate(SpreadBullet, tuple((0, 0, (angle,)) for angle in range(-15, 16, 15)), chance=0.3),
+    "bouncing": single_shot(BouncingBullet, chance=0.5),
+    "homing": single_shot(HomingBullet, chance=0.2),
+}
+
+class Volley:
+    def __init__(self, bullets, tracker):
+        self.bullets = bullets
+        self.tracker = tracker
+        
+    def __iter__(self):
+        return iter(self.bullets)
+        
+    def __len__(self):
+        return len(self.bullets)
+        
+    def kill(self):
+        for bullet in self.bullets:
+            bullet.kill()
+        
+def add_new(groups, sprites):
+    # Bulk add of freshly made sprites, skipping Group.add's per-sprite membership checks
+    for group in groups:
+        add = group.add_internal
+        for sprite in sprites:
+            add(sprite)
+            sprite.add_internal(group)
+        
+def spawn_volley(kind, origin, template, owner=None):
+    """Build a whole volley from a template and register it with its groups and owner."""
+    x, y = origin
+    if isinstance(template, PatternTemplate):
+        volley = EnemySpreadBullet.volley(x, y, template.pattern, owner, template.color, template.size,
+                                          template.damage, template.speed, template.rotation)
+    else:
+        volley = template.build(x, y, owner)
+    VOLLEY_TARGETS[kind](volley)
+    tracker = owner.bullets if owner is not None else None
+    if tracker is not None:
+        tracker.track(volley)
+    return Volley(volley, tracker)
+
+# Collisions against crowds
+# There are far more enemies than player bullets. groupcollide() tests every
+# enemy against every bullet in Python; here each bullet tests itself against
+# all the enemy rects in a single collidelistall() call instead.
+def collide_groups(targets, bullets):
+    """Same result as groupcollide(targets, bullets, False, False)."""
+    sprites = targets.sprites()
+    if not sprites:
+        return {}
+    rects = [sprite.rect for sprite in sprites]
+    hits = {}
+    for bullet in bullets.sprites():
+        for i in bullet.rect.collidelistall(rects):
+            hits.setdefault(sprites[i], []).append(bullet)
+    return hits
+
+def collide_sprite(sprite, group):
+    # Members of group overlapping sprite, without killing them
+    sprites = group.sprites()
+    return [sprites[i] for i in sprite.rect.collidelistall([other.rect for other in sprites])]
+
 # Create initial enemies
-for i in range(game_state.wave_enemies):
-    enemy = Enemy()
-    all_sprites.add(enemy)
-    enemies.add(enemy)
-
-# Upgrade menu functions
-def show_upgrade_menu():
-    upgrade_running = True
-    selected_option = 0
-    option_rects = []  # Store rectangles for mouse detection
+def spawn_initial_enemies():
+    for i in range(game_state.wave_enemies):
+        enemy = enemy_prototypes.spawn()
+        all_sprites.add(enemy)
+        enemies.add(enemy)
+
+spawn_initial_enemies()
+
+def reset_world():
+    # Empty every sprite group and restore the player in place for a new run
+    for group in (all_sprites, bullets, enemy_bullets, enemies, powerups, bosses, shop_portals):
+        group.empty()
+    player.reset()
+    all_sprites.add(player)
+    wave_director.reset()
+    sprite_culler.reset()
+
+def return_to_menu():
+    # Reset the run, keeping difficulty and high score
+    game_state.reset()
+    reset_world()
+    # Set a special game state flag to prevent difficulty screen transition
+    game_state.skip_difficulty = True
+
+# Upgrade menu shown between sectors
+class UpgradeScreen(MenuScreen):
+    name = "upgrade_menu"
     
     # Base prices
     base_prices = {
@@ -2180,13 +2237,18 @@ def show_upgrade_menu():
         "drone_slot": 200
     }
     
-    while upgrade_running:
-        clock.tick(FPS)
-        mouse_pos = pygame.mouse.get_pos()
-        # Adjust mouse position for gameplay surface
-        adjusted_mouse_pos = (mouse_pos[0] - OFFSET_X, mouse_pos[1] - OFFSET_Y)
+    def enter(self):
+        MenuScreen.enter(self)
+        self.selected_option = 0
+        self.option_rects = []  # Store rectangles for mouse detection
+        
+    def update(self):
+        # The game is paused here, so get the next wave ready
+        wave_director.prepare()
         
+    def upgrade_options(self):
         # Create upgrade options dynamically
+        base_prices = self.base_prices
         upgrade_options = [
             {"name": "Hull Integrity", "cost": game_state.get_item_price("health", base_prices["health"]), 
              "effect": "Increases max health by 20", "type": "health"},
@@ -2207,72 +2269,70 @@ def show_upgrade_menu():
                 "effect": "Increases max drone capacity by 1", 
                 "type": "drone_slot"
             })
+        return upgrade_options
+        
+    def handle_event(self, event):
+        upgrade_options = self.upgrade_options()
+        if event.type == KEYDOWN:
+            if event.key == K_ESCAPE:
+                self.stack.pop()
+            elif event.key == K_UP or event.key == K_w:  # Allow W for up
+                self.selected_option = (self.selected_option - 1) % len(upgrade_options)
+            elif event.key == K_DOWN or event.key == K_s:  # Allow S for down
+                self.selected_option = (self.selected_option + 1) % len(upgrade_options)
+            elif event.key == K_RETURN:
+                # Apply upgrade if enough resources
+                apply_upgrade(upgrade_options[self.selected_option])
+        elif event.type == MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left mouse button
+                # Adjust mouse position for gameplay surface
+                adjusted_mouse_pos = (event.pos[0] - OFFSET_X, event.pos[1] - OFFSET_Y)
+                # Check if click is on an option
+                for i, rect in enumerate(self.option_rects):
+                    if rect.collidepoint(adjusted_mouse_pos):
+                        if i < len(upgrade_options):  # Make sure the option exists
+                            apply_upgrade(upgrade_options[i])
+                            break
+                            
+    def render(self, surface):
+        # Draw upgrade menu over the cached background
+        surface.blit(shared_surface("upgrade_background", render_upgrade_background), (0, 0))
         
-        # Process input
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    upgrade_running = False
-                elif event.key == K_UP or event.key == K_w:  # Allow W for up
-                    selected_option = (selected_option - 1) % len(upgrade_options)
-                elif event.key == K_DOWN or event.key == K_s:  # Allow S for down
-                    selected_option = (selected_option + 1) % len(upgrade_options)
-                elif event.key == K_RETURN:
-                    # Apply upgrade if enough resources
-                    apply_upgrade(upgrade_options[selected_option])
-            elif event.type == MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left mouse button
-                    # Check if click is on an option
-                    for i, rect in enumerate(option_rects):
-                        if rect.collidepoint(adjusted_mouse_pos):
-                            if i < len(upgrade_options):  # Make sure the option exists
-                                apply_upgrade(upgrade_options[i])
-                                break
-        
-        # Draw upgrade menu
-        screen.fill(BLACK)
-        
-        # Create a gameplay surface
-        upgrade_surface = pygame.Surface((WIDTH, HEIGHT))
-        upgrade_surface.fill(BLACK)
-        
-        draw_text(upgrade_surface, "UPGRADE MENU", 40, WIDTH / 2, 30)
-        draw_text(upgrade_surface, f"Resources: {game_state.resources}", 25, WIDTH / 2, 80)
-        
-        option_rects = []  # Reset the list
-        for i, option in enumerate(upgrade_options):
+        draw_text(surface, f"Resources: {game_state.resources}", 25, WIDTH / 2, 80)
+        
+        self.option_rects = []  # Reset the list
+        for i, option in enumerate(self.upgrade_options()):
             color = RED if game_state.resources < option["cost"] else GREEN
             
             # If it's a drone option and player is at max, show as unavailable
             if option["type"] == "drone" and len(player.drone_list) >= player.max_drones:
                 color = RED
                 
-            highlight = ">" if i == selected_option else " "
+            highlight = ">" if i == self.selected_option else " "
             
             # Calculate text position
             y_pos = 150 + (i * 40)
             text = f"{highlight} {option['name']} (Cost: {option['cost']})"
             
             # Draw option and get its rect for mouse detection
-            text_rect = draw_text(upgrade_surface, text, 20, WIDTH / 2, y_pos, color, return_rect=True)
-            option_rects.append(text_rect)
-            
-            draw_text(upgrade_surface, option["effect"], 16, WIDTH / 2, y_pos + 20, WHITE)
+            text_rect = draw_text(surface, text, 20, WIDTH / 2, y_pos, color, return_rect=True)
+            self.option_rects.append(text_rect)
             
-        draw_text(upgrade_surface, "Arrow keys to select, ENTER to purchase, ESC to exit", 
-                18, WIDTH / 2, HEIGHT - 50)
-        draw_text(upgrade_surface, "You can also click on options with your mouse", 
-                18, WIDTH / 2, HEIGHT - 30)
+            draw_text(surface, option["effect"], 16, WIDTH / 2, y_pos + 20, WHITE)
         
-        # Draw the upgrade surface to the screen with offsets
-        screen.blit(upgrade_surface, (OFFSET_X, OFFSET_Y))
-        
-        pygame.display.flip()
-    
-    return
+        # Options are text rather than buttons, so track them for hover too
+        drawn_buttons.extend(self.option_rects)
+
+def render_upgrade_background():
+    # Title and instructions never change while the shop is open
+    background = pygame.Surface((WIDTH, HEIGHT))
+    background.fill(BLACK)
+    draw_text(background, "UPGRADE MENU", 40, WIDTH / 2, 30)
+    draw_text(background, "Arrow keys to select, ENTER to purchase, ESC to exit", 
+            18, WIDTH / 2, HEIGHT - 50)
+    draw_text(background, "You can also click on options with your mouse", 
+            18, WIDTH / 2, HEIGHT - 30)
+    return background
 
 # Function to apply upgrades (extracted for reuse)
 def apply_upgrade(option):
@@ -2308,17 +2368,6 @@ def apply_upgrade(option):
             player.max_drones += 1
             game_state.purchase_counts["drone_slot"] += 1
 
-# Add basic sprite cleanup to save resources
-def cleanup_sprites():
-    # Remove sprites that are far off screen
-    for sprite in all_sprites:
-        if hasattr(sprite, 'rect'):
-            if (sprite.rect.top > HEIGHT + 100 or 
-                sprite.rect.bottom < -100 or
-                sprite.rect.right < -100 or
-                sprite.rect.left > WIDTH + 100):
-                sprite.kill()
-
 def create_random_boss(current_sector):
     """Create a random boss for endless mode.
     Instead of using the current sector's boss, this selects a random boss from sectors 1-6.
@@ -2326,7 +2375,7 @@ def create_random_boss(current_sector):
     """
     # Select a random boss type from sectors 1-6
     boss_sector = random.randint(1, 6)
-    print(f"Creating random boss from sector {boss_sector} for endless mode sector {current_sector}")
+    log.info("Creating random boss from sector %d for endless mode sector %d", boss_sector, current_sector)
     
     # Create the boss with the random visual style and base stats
     boss = Boss(boss_sector)
@@ -2352,73 +2401,432 @@ def spawn_shop_portal(x, y):
     """Spawn a shop portal at the given coordinates.
     This function can be called by any entity when a shop portal should appear.
     """
-    print(f"Spawning shop portal at {x}, {y}")
-    
-    # Create a new portal
-    portal = ShopPortal(x, y)
-    all_sprites.add(portal)
-    
-    # Ensure shop_portals is initialized
-    if 'shop_portals' not in globals():
-        global shop_portals
-        shop_portals = pygame.sprite.Group()
+    log.debug("Spawning shop portal at %d, %d", x, y)
+    return wave_director.boss_defeated(x, y)
+
+# Wave director
+# Single owner of wave and boss transitions. The next transition - a wave's
+# enemies or a boss - is built ahead of time during lulls (the last few
+# enemies of a wave, the upgrade menu), so when a wave is cleared the
+# prepared sprites only have to be added to the groups. Wave enemies are
+# released a few per frame so large waves don't all appear at once.
+#
+# Horde waves are too big to build in one frame, so they are only planned
+# ahead (type and start position of each enemy); each enemy is cloned as it
+# is released, at a higher budget.
+HordeSpawn = namedtuple("HordeSpawn", "enemy_type x bottom")
+
+class WaveDirector:
+    spawn_budget = 3  # Most enemies released in a single frame
+    horde_spawn_budget = 40
+    horde_fire_enemies = 40  # A horde fires about as much in total as this many enemies
+    lull_enemies = 3  # Prepare the next wave once this few enemies are left
     
-    # Add the portal to the sprite group
-    shop_portals.add(portal)
+    # Weighted selection of enemy types: (upper bound of the roll, type)
+    wave_mix = (
+        (0.15, "elite"),             # 15% chance of elite enemy
+        (0.25, "cloaked_ambusher"),  # 10% chance of cloaked ambusher
+        (0.35, "splitter_drone"),    # 10% chance of splitter drone
+        (0.45, "shield_bearer"),     # 10% chance of shield bearer
+        (0.55, "energy_sapper"),     # 10% chance of energy sapper
+        (0.65, "blade_spinner"),     # 10% chance of blade spinner
+        (1.0, "basic")               # 35% chance of basic enemy
+    )
     
-    # Reset boss_fight flag to allow next wave to start
-    game_state.boss_fight = False
+    # Hordes are mostly basic and elite enemies, which the enemy swarm runs
+    horde_mix = (
+        (0.25, "elite"),             # 25% chance of elite enemy
+        (0.27, "cloaked_ambusher"),  # 2% chance of each specialised type
+        (0.29, "splitter_drone"),
+        (0.31, "shield_bearer"),
+        (0.33, "energy_sapper"),
+        (0.35, "blade_spinner"),
+        (1.0, "basic")               # 65% chance of basic enemy
+    )
     
-    return portal
+    def __init__(self):
+        self.pending = deque()  # Prepared wave sprites not released yet
+        self.prepared = None  # (game state key, transition) built ahead of time
+        self.prepared_count = 0
+        self.built_on_demand = 0
+        
+    def reset(self):
+        self.pending.clear()
+        self.prepared = None
+        
+    def pick_type(self, roll, mix=None):
+        for threshold, enemy_type in mix or self.wave_mix:
+            if roll < threshold:
+                return enemy_type
+        return "basic"
+        
+    def transition_key(self):
+        # Everything the next transition depends on; a prepared transition
+        # is only used if none of it changed in the meantime
+        return (game_state.difficulty, game_state.sector, game_state.wave, game_state.waves_per_sector,
+                game_state.wave_enemies, getattr(game_state, 'endless_mode', False),
+                getattr(game_state, 'horde_mode', False))
+        
+    def prepare(self):
+        """Build the next transition now if it isn't already prepared."""
+        key = self.transition_key()
+        if self.prepared is None or self.prepared[0] != key:
+            self.prepared = (key, self.build_transition())
+            self.prepared_count += 1
+            
+    def idle(self):
+        # Called every gameplay frame; use lulls to get the next wave ready
+        if not self.pending and not game_state.boss_fight and not shop_portals and len(enemies) <= self.lull_enemies:
+            self.prepare()
+            
+    def build_transition(self):
+        endless = getattr(game_state, 'endless_mode', False) and game_state.sector > 6
+        
+        # In high endless sectors the boss fight is forced instead of going through next_wave()
+        if endless and game_state.wave >= game_state.waves_per_sector:
+            return ("forced_boss", self.build_boss(endless))
+        # next_wave() starts a boss fight once the sector's waves are done
+        if game_state.wave + 1 > game_state.waves_per_sector:
+            return ("boss", self.build_boss(endless))
+        return ("wave", self.build_wave(game_state.wave + 1))
+        
+    def build_wave(self, wave):
+        if getattr(game_state, 'horde_mode', False):
+            sprites = self.plan_horde(game_state.wave_enemies)
+        else:
+            # Create every enemy in the wave with its start position
+            sprites = []
+            for i in range(game_state.wave_enemies):
+                enemy = enemy_prototypes.spawn(self.pick_type(random.random()))
+                # Place it randomly at the top of the screen with some spacing
+                enemy.rect.x = random.randint(enemy.rect.width, WIDTH - enemy.rect.width)
+                enemy.rect.bottom = random.randint(-150, -20)
+                sprites.append(enemy)
+        
+        # Chance to spawn a mini-boss (Barrier Goliath) after wave 3
+        # Only if this is not a boss wave
+        if wave > 3 and wave < game_state.waves_per_sector and random.random() < 0.15:
+            # Make sure we don't have too many enemies
+            if len(sprites) > 10:
+                log.debug("Skipping mini-boss spawn - too many enemies (%d)", len(sprites))
+            else:
+                log.info("Mini-boss will join wave %d", wave)
+                sprites.append(self.build_mini_boss())
+        return sprites
+        
+    def plan_horde(self, count):
+        # Type and start position of every enemy; the height they start at
+        # spreads their arrival over a few seconds
+        rand = random.random
+        return [HordeSpawn(self.pick_type(rand(), self.horde_mix), rand(), -20 - int(rand() * 400))
+                for i in range(count)]
+        
+    def spawn_horde(self, spawn):
+        enemy = enemy_prototypes.spawn(spawn.enemy_type)
+        enemy.rect.x = int(spawn.x * (WIDTH - enemy.rect.width))
+        enemy.rect.bottom = spawn.bottom
+        # Spread the horde's fire so the whole wave shoots about as often as a normal one
+        enemy.shoot_delay = int(enemy.shoot_delay * max(1, game_state.wave_enemies / self.horde_fire_enemies))
+        return enemy
+        
+    def build_boss(self, endless):
+        if not endless:
+            # In regular game mode, always use the correct sector boss
+            return Boss(game_state.sector)
+        if random.random() < 0.4:
+            # In endless mode (after sector 6), sometimes a mini-boss instead
+            mini_boss = self.build_mini_boss()
+            mini_boss.max_health *= 1 + (game_state.sector - 6) * 0.2  # +20% health per sector above 6
+            mini_boss.health = mini_boss.max_health
+            return mini_boss
+        # Create a random boss from the pool for endless mode
+        return create_random_boss(game_state.sector)
+        
+    def build_mini_boss(self):
+        return BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, spawn_volley)
+        
+    def activate(self, sprite, now):
+        # Adding prepared sprites to the groups is all that's left to do
+        if isinstance(sprite, HordeSpawn):
+            sprite = self.spawn_horde(sprite)
+        if isinstance(sprite, BarrierGoliath):
+            sprite.activate()
+            return
+        sprite.restart_timers(now)
+        all_sprites.add(sprite)
+        if isinstance(sprite, Boss):
+            bosses.add(sprite)
+        else:
+            enemies.add(sprite)
+            
+    def release(self):
+        # Spawn the next few prepared enemies
+        now = pygame.time.get_ticks()
+        budget = self.horde_spawn_budget if getattr(game_state, 'horde_mode', False) else self.spawn_budget
+        for i in range(min(budget, len(self.pending))):
+            self.activate(self.pending.popleft(), now)
+            
+    def update(self):
+        # Called once per gameplay frame after collisions
+        if self.pending:
+            self.release()
+        elif not enemies and not game_state.boss_fight and not shop_portals:
+            self.wave_cleared()
+        else:
+            self.idle()
+            
+    def wave_cleared(self):
+        log.info("Wave cleared - Sector %d, Wave %d", game_state.sector, game_state.wave)
+        if self.prepared is None or self.prepared[0] != self.transition_key():
+            # Nothing ready (e.g. the wave was cleared in one go) - build it now
+            self.built_on_demand += 1
+            self.prepare()
+        kind, content = self.prepared[1]
+        self.prepared = None
+        
+        # The screen is empty between waves - a good moment to collect
+        gc_policy.collect("wave transition")
+        alloc_monitor.wave(f"sector {game_state.sector} wave {game_state.wave}")
+        
+        if kind == "forced_boss":
+            log.warning("Forcing boss fight for sector %d, wave %d", game_state.sector, game_state.wave)
+            game_state.boss_fight = True
+            game_state.wave = 1  # Reset wave counter
+        elif game_state.next_wave():
+            # Ensure we don't spawn regular enemies during a boss wave
+            game_state.boss_fight = True
+        else:
+            # Not a boss wave - release the prepared enemies over the next frames
+            if game_state.boss_fight:
+                # This shouldn't happen, but if it does, reset the flag
+                game_state.boss_fight = False
+                log.warning("Resetting boss_fight flag in wave %d", game_state.wave)
+            self.pending.extend(content)
+            return
+            
+        self.activate(content, pygame.time.get_ticks())
+        log.info("Boss fight started in sector %d", game_state.sector)
+        
+    def boss_defeated(self, x, y):
+        # A shop portal appears where the boss died
+        portal = ShopPortal(x, y)
+        all_sprites.add(portal)
+        shop_portals.add(portal)
+        
+        # Reset boss_fight flag to allow next wave to start
+        game_state.boss_fight = False
+        return portal
+        
+    def enter_shop(self):
+        # Leave the sector through the portal; returns True if the game was completed
+        for portal in shop_portals:
+            portal.kill()  # This removes it from all sprite groups
+            
+        # Clear any existing bullets to prevent issues after shop
+        bullets.empty()  # Clear all player bullets
+        self.reset()
+        return game_state.next_sector()
 
-# Initialize game state
-if __name__ == "__main__":
-    running = True
+wave_director = WaveDirector()
+
+def render_main_menu_background():
+    # Title and endless mode description shown behind the main menu buttons
+    background = pygame.Surface((WIDTH, HEIGHT))
+    background.fill(BLACK)
+    draw_text(background, "Xbacab", 64, WIDTH / 2, HEIGHT / 4)
+    draw_text(background, "Endless Mode: Skip to high difficulty infinite play with upgraded ship", 16, WIDTH / 2, HEIGHT - 38, color=(180, 180, 255))
+    draw_text(background, "Horde Mode: Endless play against waves of hundreds of enemies", 16, WIDTH / 2, HEIGHT - 20, color=(180, 180, 255))
+    return background
+
+# Main menu
+class MainMenuScreen(MenuScreen):
+    name = "menu"
+    
+    def enter(self):
+        MenuScreen.enter(self)
+        game_state.state = "menu"
+        
+    def handle_event(self, event):
+        if event.type == KEYDOWN and event.key == K_ESCAPE:
+            self.stack.quit()
+            
+    def render(self, surface):
+        # Draw menu screen on the gameplay surface over the cached title and footer
+        surface.blit(shared_surface("main_menu_background", render_main_menu_background), (0, 0))
+        
+        # Menu buttons
+        button_width = 200
+        button_height = 56
+        button_y = HEIGHT / 2 - 30
+        spacing = 64
+        
+        # Start Game button
+        if draw_button(surface, "Start Game", 30, WIDTH/2, button_y, button_width, button_height):
+            # Set up for a new game with the current difficulty
+            game_state.sector = 1  # Start at sector 1
+            game_state.wave = 1
+            # Remove endless mode if it was set previously
+            if hasattr(game_state, 'endless_mode'):
+                delattr(game_state, 'endless_mode')
+                
+            log.info("Starting new game with difficulty: %s", game_state.difficulty)
+            # We don't call show_difficulty_screen() directly to avoid the issue
+            self.stack.replace(screens["playing"])
+        
+        # Endless Mode button
+        if draw_button(surface, "Endless Mode", 30, WIDTH/2, button_y + spacing, button_width, button_height):
+            self.start_endless()
+            
+        # Horde Mode button
+        if draw_button(surface, "Horde Mode", 30, WIDTH/2, button_y + spacing*2, button_width, button_height):
+            self.start_endless(horde=True)
+        
+        # Controls button
+        if draw_button(surface, "Controls", 30, WIDTH/2, button_y + spacing*3, button_width, button_height):
+            self.stack.push(screens["controls"])
+            
+        # Difficulty button
+        if draw_button(surface, "Difficulty", 30, WIDTH/2, button_y + spacing*4, button_width, button_height):
+            # Check if we should skip the difficulty screen (for game over transitions)
+            if hasattr(game_state, 'skip_difficulty') and game_state.skip_difficulty:
+                # We've just come from the game over screen, skip showing difficulty
+                log.debug("Skipping difficulty screen due to game over transition")
+                # Remove the flag now that we've used it
+                delattr(game_state, 'skip_difficulty')
+            else:
+                # Normal case - show difficulty screen
+                self.stack.push(screens["difficulty"])
+        
+        # Display current difficulty
+        draw_text(surface, f"Current Difficulty: {game_state.difficulty.capitalize()}", 18, WIDTH / 2, HEIGHT - 62)
+        
+    def start_endless(self, horde=False):
+        # Set up for endless mode - first ensure clean state
+        if horde:
+            log.info("Initializing Horde Mode...")
+        else:
+            log.info("Initializing Endless Mode...")
+        
+        # Clear the world and restore the player in place to prevent state issues
+        reset_world()
+        
+        # Reset game state for endless mode
+        game_state.sector = 7  # Start at sector 7 (beyond sector 6)
+        game_state.wave = 1
+        game_state.score = 0
+        game_state.combo = 1
+        game_state.max_combo = 1
+        
+        # Ensure endless mode flag is set
+        game_state.endless_mode = True
+        if horde:
+            game_state.horde_mode = True
+            game_state.wave_enemies = HORDE_ENEMIES
+        game_state.waves_per_sector = 4  # Fewer waves before boss fights
+        game_state.bosses_defeated = 6  # Ensure drone slot upgrades are available
+        game_state.resources = 1000  # Give extra starting resources for upgrades
+        game_state.boss_fight = False  # Ensure no boss fight initially
+        
+        # Set up powerful player for endless mode
+        player.max_health = 200
+        player.health = 200
+        player.max_energy = 150
+        player.energy = 150
+        player.energy_regen = 0.7
+        player.weapon_level = 3  # Start with level 3 weapons
+        
+        # Start with 2 drones
+        player.max_drones = 4
+        for i in range(2):
+            player.add_drone()
+            
+        if horde:
+            # The first horde comes in through the wave director like every other one
+            wave_director.pending.extend(wave_director.build_wave(game_state.wave))
+        else:
+            # Spawn initial enemies for endless mode
+            for i in range(game_state.wave_enemies):
+                # Create a mix of enemy types for endless mode
+                enemy_roll = random.random()
+                if enemy_roll < 0.6:  # 60% chance of more challenging enemies
+                    enemy_type = random.choice(["elite", "cloaked_ambusher", "splitter_drone", 
+                                              "shield_bearer", "energy_sapper", "blade_spinner"])
+                else:
+                    enemy_type = "basic"
+                
+                enemy = enemy_prototypes.spawn(enemy_type)
+                enemy.rect.x = random.randint(0 + enemy.rect.width, WIDTH - enemy.rect.width)
+                enemy.rect.bottom = random.randint(-150, -20)
+                all_sprites.add(enemy)
+                enemies.add(enemy)
+            
+        log.info("%s Mode initialized successfully", "Horde" if horde else "Endless")
+        self.stack.replace(screens["playing"])
 
-# Main game loop
-while running:
-    # Keep loop running at the right speed
-    clock.tick(FPS)
+# Gameplay screen
+class PlayingScreen(Scene):
+    name = "playing"
+    frame_rate = FPS
     
-    # Process input (events)
-    for event in pygame.event.get():
-        if event.type == QUIT:
-            running = False
+    def enter(self):
+        game_state.state = "playing"
+        gc_policy.play()
+        
+    def resume(self):
+        # Back from the shop
+        gc_policy.play()
+        
+    def handle_event(self, event):
         # Key press events
-        elif event.type == KEYDOWN:
+        if event.type == KEYDOWN:
             if event.key == K_ESCAPE:
-                if game_state.state == "playing":
-                    game_state.state = "menu"
-                elif game_state.state == "menu":
-                    running = False
-            elif event.key == K_SPACE and game_state.state == "playing":
+                self.stack.replace(screens["menu"])
+            elif event.key == K_SPACE:
                 player.shoot()
-            elif event.key == K_LSHIFT and game_state.state == "playing":
+            elif event.key == K_LSHIFT:
                 player.hyper_dash()
         # Mouse click events
         elif event.type == MOUSEBUTTONDOWN:
-            if event.button == 1 and game_state.state == "playing":
+            if event.button == 1:
                 player.shoot()
-
-    # Check mouse position for player aim direction
-    if game_state.state == "playing":
+                
+    def update(self):
+        gc_policy.begin_frame()
+        alloc_monitor.begin_frame()
+        spike_sampler.begin_frame()
+        frame_metrics.begin_frame()
+        
+        # Check mouse position for player aim direction
         player.mouse_pos = pygame.mouse.get_pos()
         # Adjust the mouse position to the gameplay coordinates
         player.mouse_pos = (player.mouse_pos[0] - OFFSET_X, player.mouse_pos[1] - OFFSET_Y)
-    
-    # Update all sprites for gameplay
-    if game_state.state == "playing":
-        all_sprites.update()
+        
+        self.simulate()
+        
+        # Switch screens if the frame ended the run
+        if game_state.state != "playing" and self.stack.top is self:
+            self.stack.replace(screens[game_state.state])
+            
+    def simulate(self):
+        # Update all sprites for gameplay
+        # Decisions first, within the AI time budget
+        ai_scheduler.update((enemies, bosses))
+        # Basic and elite enemies move as one swarm
+        enemy_swarm.update(pygame.time.get_ticks())
+        target_index.invalidate()
+        # Dormant off-screen enemies get a cheap movement-only update
+        lod_scheduler.update(all_sprites)
+        enemy_bullets.update()
         
         # Check player health - switch to game over if health is zero or negative
         if player.health <= 0:
             game_state.state = "game_over"
             
         # Periodically remove sprites that are far off screen
-        cleanup_sprites()
+        sprite_culler.update()
         
         # Check for bullet hits on enemies
-        hits = pygame.sprite.groupcollide(enemies, bullets, False, False)  # Changed to keep bullets
+        hits = collide_groups(enemies, bullets)  # Bullets are kept, see below
         for enemy, bullet_list in hits.items():
             for bullet in bullet_list:
                 if isinstance(bullet, BouncingBullet):
@@ -2452,7 +2860,7 @@ while running:
                         game_state.max_combo = game_state.combo
                     
         # Check for bullet hits on bosses
-        hits = pygame.sprite.groupcollide(bosses, bullets, False, False)  # Changed to keep bullets
+        hits = collide_groups(bosses, bullets)  # Bullets are kept, see below
         for boss, bullet_list in hits.items():
             for bullet in bullet_list:
                 if isinstance(bullet, BouncingBullet):
@@ -2481,15 +2889,19 @@ while running:
                         game_state.resources += 75  # Fewer resources on hard
         
         # Check for enemy bullet hits on player
-        hits = pygame.sprite.spritecollide(player, enemy_bullets, True)
+        # Bullets of an enemy destroyed this frame don't count
+        hits = enemy_bullets.spritecollide(player, True)
         if hits:
             if player.hit(hits[0].damage):
                 game_state.state = "game_over"
                 
         # Check for collision with enemies
-        hits = pygame.sprite.spritecollide(player, enemies, True)
+        hits = collide_sprite(player, enemies)
+        for enemy in hits:
+            enemy.kill()
         if hits:
-            if player.hit(30):  # Collision with enemy does major damage
+            damage = HORDE_COLLISION_DAMAGE if getattr(game_state, 'horde_mode', False) else 30
+            if player.hit(damage):  # Collision with enemy does major damage
                 game_state.state = "game_over"
                 
         # Check for collision with power-ups
@@ -2512,284 +2924,29 @@ while running:
                 keys = pygame.key.get_pressed()
                 if keys[K_e]:
                     # Enter shop and remove the portal
-                    
-                    # Remove portals from both groups
-                    for portal in shop_portals:
-                        portal.kill()  # This removes it from all sprite groups
-                    shop_portals.empty()  # This is redundant but kept for safety
-                    
-                    # Clear any existing bullets to prevent issues after shop
-                    bullets.empty()  # Clear all player bullets
-                    
-                    # Show upgrade menu between sectors
-                    if game_state.next_sector():
-                        # Game completed!
-                        pass
-                    else:
-                        # Show upgrade menu
-                        show_upgrade_menu()
-                        
-                    # Double-check that portals are removed - redundant but kept for safety
-                    shop_portals.empty()
-        
-        # Debug output before checking for wave completion
-        if len(enemies) == 0 and game_state.state == "playing" and hasattr(game_state, 'endless_mode') and game_state.endless_mode:
-            print(f"No enemies present. boss_fight={game_state.boss_fight}, portals={len(shop_portals) if 'shop_portals' in globals() else 'not defined'}")
-        
-        # Check for wave completion
-        if len(enemies) == 0 and not game_state.boss_fight and 'shop_portals' in globals() and len(shop_portals) == 0:
-            # Debug info for the second check
-            print(f"Second wave completion check - Sector {game_state.sector}, Wave {game_state.wave}")
-            
-            # Check for special cases in endless mode for high sectors
-            if hasattr(game_state, 'endless_mode') and game_state.endless_mode and game_state.sector >= 7 and game_state.wave >= game_state.waves_per_sector:
-                print(f"Second check - Forcing boss fight for sector {game_state.sector}, wave {game_state.wave}")
-                game_state.boss_fight = True
-                
-                # Force boss spawn directly instead of using next_wave()
-                if random.random() < 0.4:  # 40% chance for mini-boss
-                    mini_boss = BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet)
-                    health_multiplier = 1 + (game_state.sector - 6) * 0.2
-                    mini_boss.max_health *= health_multiplier
-                    mini_boss.health = mini_boss.max_health
-                    all_sprites.add(mini_boss)
-                    enemies.add(mini_boss)
-                    print(f"Second check - Spawned mini-boss for sector {game_state.sector}")
-                else:
-                    # Spawn regular boss - enhanced in endless mode
-                    if hasattr(game_state, 'endless_mode') and game_state.endless_mode and game_state.sector > 6:
-                        # Use random boss in endless mode
-                        boss = create_random_boss(game_state.sector)
-                    else:
-                        # Normal progression - use sector-specific boss
-                        boss = Boss(game_state.sector)
-                    
-                    all_sprites.add(boss)
-                    bosses.add(boss)
-                
-                game_state.wave = 1  # Reset wave counter
-                continue
-            
-            # Standard wave progression
-            if game_state.next_wave():
-                # Boss fight time!
-                
-                # Check if we should use random boss in endless mode
-                use_random_boss = (hasattr(game_state, 'endless_mode') and 
-                                 game_state.endless_mode and 
-                                 game_state.sector > 6)
-                
-                # In endless mode (after sector 6), sometimes spawn mini-boss instead
-                if use_random_boss and random.random() < 0.4:
-                    # This is handled by our special case above in endless mode
-                    mini_boss = BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet)
-                    mini_boss.max_health *= 1 + (game_state.sector - 6) * 0.2  # +20% health per sector above 6
-                    mini_boss.health = mini_boss.max_health
-                    all_sprites.add(mini_boss)
-                    enemies.add(mini_boss)
-                    # Ensure we don't spawn regular enemies during a boss wave
-                    game_state.boss_fight = True
-                    print(f"Spawned mini-boss for endless sector {game_state.sector}")
-                elif not use_random_boss:  # Regular game mode or early endless sectors
-                    # In regular game mode, always use the correct sector boss
-                    # Mini-bosses don't replace sector bosses in normal progression
-                    boss = Boss(game_state.sector)
-                    if hasattr(game_state, 'endless_mode') and game_state.endless_mode and game_state.sector > 6:
-                        health_multiplier = 1 + (game_state.sector - 6) * 0.3  # +30% health per sector above 6
-                        boss.max_health *= health_multiplier
-                        boss.health = boss.max_health
-                        boss.shoot_delay = max(300, boss.shoot_delay * 0.8)  # Faster shooting (min 300ms)
-                        boss.score_value = 500 + (game_state.sector - 6) * 300  # More points in higher sectors
-                    all_sprites.add(boss)
-                    bosses.add(boss)
-                    # Ensure we don't spawn regular enemies during a boss wave
-                    game_state.boss_fight = True
-                    print(f"Spawned sector {game_state.sector} boss")
-                else: # This is the else for the use_random_boss and random.random() check
-                    # Create a random boss for endless mode
-                    boss = create_random_boss(game_state.sector)
-                    all_sprites.add(boss)
-                    bosses.add(boss)
-                    # Ensure we don't spawn regular enemies during a boss wave
-                    game_state.boss_fight = True
-                    print(f"Created random boss from pool for endless sector {game_state.sector}")
-            else:
-                # Not a boss wave, spawn regular enemies
-                if game_state.boss_fight:
-                    # This shouldn't happen, but if it does, reset the flag
-                    game_state.boss_fight = False
-                    print(f"Resetting boss_fight flag in wave {game_state.wave}")
-                
-                # Spawn new wave of enemies
-                for i in range(game_state.wave_enemies):
-                    # Choose enemy type based on wave and sector
-                    enemy_roll = random.random()
-                    
-                    # Use a weighted selection system for different enemy types
-                    if enemy_roll < 0.15:  # 15% chance of elite enemy
-                        enemy = Enemy("elite")
-                    elif enemy_roll < 0.25:  # 10% chance of cloaked ambusher
-                        enemy = Enemy("cloaked_ambusher")
-                    elif enemy_roll < 0.35:  # 10% chance of splitter drone
-                        enemy = Enemy("splitter_drone")
-                    elif enemy_roll < 0.45:  # 10% chance of shield bearer
-                        enemy = Enemy("shield_bearer")
-                    elif enemy_roll < 0.55:  # 10% chance of energy sapper
-                        enemy = Enemy("energy_sapper")
-                    elif enemy_roll < 0.65:  # 10% chance of blade spinner
-                        enemy = Enemy("blade_spinner")
-                    else:  # 35% chance of basic enemy
-                        enemy = Enemy("basic")
-                        
-                    # Place it randomly at the top of the screen with some spacing
-                    enemy.rect.x = random.randint(0 + enemy.rect.width, WIDTH - enemy.rect.width)
-                    enemy.rect.bottom = random.randint(-150, -20)
-                    all_sprites.add(enemy)
-                    enemies.add(enemy)
-                
-                # Chance to spawn a mini-boss (Barrier Goliath) after wave 3
-                # Only if this is not a boss wave
-                if game_state.wave > 3 and game_state.wave < game_state.waves_per_sector and random.random() < 0.15 and not game_state.boss_fight:
-                    # Make sure we don't have too many enemies
-                    if len(enemies) > 10:
-                        # Too many enemies already - skip mini-boss for this wave
-                        print(f"Skipping mini-boss spawn - too many enemies ({len(enemies)})")
-                    else:
-                        print(f"Spawning mini-boss during wave {game_state.wave}")
-                        mini_boss = BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet)
-                        all_sprites.add(mini_boss)
-                        enemies.add(mini_boss)
-                        # Note: We don't set boss_fight to True here since this isn't a boss wave
-    
-    # Draw / render
-    screen.fill(BLACK)
-    
-    # Create a gameplay surface that's the original game size
-    gameplay_surface = pygame.Surface((WIDTH, HEIGHT))
-    gameplay_surface.fill(BLACK)
-    
-    if game_state.state == "menu":
-        # Draw menu screen on the gameplay surface
-        draw_text(gameplay_surface, "Xbacab", 64, WIDTH / 2, HEIGHT / 4)
-        
-        # Menu buttons
-        button_width = 200
-        button_height = 60
-        button_y = HEIGHT / 2
-        spacing = 80
-        
-        # Start Game button
-        if draw_button(gameplay_surface, "Start Game", 30, WIDTH/2, button_y, button_width, button_height):
-            # Set up for a new game with the current difficulty
-            game_state.state = "playing"
-            game_state.sector = 1  # Start at sector 1
-            game_state.wave = 1
-            # Remove endless mode if it was set previously
-            if hasattr(game_state, 'endless_mode'):
-                delattr(game_state, 'endless_mode')
-                
-            print(f"Starting new game with difficulty: {game_state.difficulty}")
-            # We don't call show_difficulty_screen() directly to avoid the issue
-        
-        # Endless Mode button
-        if draw_button(gameplay_surface, "Endless Mode", 30, WIDTH/2, button_y + spacing, button_width, button_height):
-            # Set up for endless mode - first ensure clean state
-            print("Initializing Endless Mode...")
-            
-            # Clear any existing sprite groups to prevent state issues
-            all_sprites.empty()
-            bullets.empty()
-            enemy_bullets.empty()
-            enemies.empty()
-            powerups.empty()
-            bosses.empty()
-            shop_portals.empty()
-            
-            # Reset game state for endless mode
-            game_state.state = "playing"
-            game_state.sector = 7  # Start at sector 7 (beyond sector 6)
-            game_state.wave = 1
-            game_state.score = 0
-            game_state.combo = 1
-            game_state.max_combo = 1
-            
-            # Ensure endless mode flag is set
-            game_state.endless_mode = True
-            game_state.waves_per_sector = 4  # Fewer waves before boss fights
-            game_state.bosses_defeated = 6  # Ensure drone slot upgrades are available
-            game_state.resources = 1000  # Give extra starting resources for upgrades
-            game_state.boss_fight = False  # Ensure no boss fight initially
-            
-            # Create a completely new player instance to avoid state issues
-            player = Player()
-            
-            # Set up powerful player for endless mode
-            player.max_health = 200
-            player.health = 200
-            player.max_energy = 150
-            player.energy = 150
-            player.energy_regen = 0.7
-            player.weapon_level = 3  # Start with level 3 weapons
-            
-            # Add player to sprites
-            all_sprites.add(player)
-            
-            # Start with 2 drones
-            player.max_drones = 4
-            player.drone_list = []  # Initialize empty drone list
-            for i in range(2):
-                player.add_drone()
-                
-            # Spawn initial enemies for endless mode
-            for i in range(game_state.wave_enemies):
-                # Create a mix of enemy types for endless mode
-                enemy_roll = random.random()
-                if enemy_roll < 0.6:  # 60% chance of more challenging enemies
-                    enemy_type = random.choice(["elite", "cloaked_ambusher", "splitter_drone", 
-                                              "shield_bearer", "energy_sapper", "blade_spinner"])
-                else:
-                    enemy_type = "basic"
-                    
-                enemy = Enemy(enemy_type)
-                enemy.rect.x = random.randint(0 + enemy.rect.width, WIDTH - enemy.rect.width)
-                enemy.rect.bottom = random.randint(-150, -20)
-                all_sprites.add(enemy)
-                enemies.add(enemy)
-                
-            print("Endless Mode initialized successfully")
-        
-        # Controls button
-        if draw_button(gameplay_surface, "Controls", 30, WIDTH/2, button_y + spacing*2, button_width, button_height):
-            show_controls_screen()
-            
-        # Difficulty button
-        if draw_button(gameplay_surface, "Difficulty", 30, WIDTH/2, button_y + spacing*3, button_width, button_height):
-            # Check if we should skip the difficulty screen (for game over transitions)
-            if hasattr(game_state, 'skip_difficulty') and game_state.skip_difficulty:
-                # We've just come from the game over screen, skip showing difficulty
-                print("Skipping difficulty screen due to game over transition")
-                # Remove the flag now that we've used it
-                delattr(game_state, 'skip_difficulty')
-            else:
-                # Normal case - show difficulty screen
-                show_difficulty_screen()
-        
-        # Display current difficulty
-        draw_text(gameplay_surface, f"Current Difficulty: {game_state.difficulty.capitalize()}", 18, WIDTH / 2, HEIGHT - 50)
+                    if not wave_director.enter_shop():
+                        # Show upgrade menu between sectors; the next wave is
+                        # prepared while it's open and starts once play resumes
+                        self.stack.push(screens["upgrade_menu"])
+                        return
+                    break
+        
+        # Release prepared spawns and move on once the wave is cleared
+        wave_director.update()
+
+    def render(self, surface):
+        surface.fill(BLACK)
         
-        # Endless mode description
-        draw_text(gameplay_surface, "Endless Mode: Skip to high difficulty infinite play with upgraded ship", 16, WIDTH / 2, HEIGHT - 20, color=(180, 180, 255))
-            
-    elif game_state.state == "playing":
         # Draw all sprites to the gameplay surface
-        all_sprites.draw(gameplay_surface)
+        all_sprites.draw(surface)
+        enemy_bullets.draw(surface)
         
         # Draw player information
-        draw_bar(gameplay_surface, 10, 10, player.health, player.max_health, 200, 20, GREEN)
-        draw_text(gameplay_surface, f"Health: {int(player.health)}/{player.max_health}", 18, 110, 10)
+        draw_bar(surface, 10, 10, player.health, player.max_health, 200, 20, GREEN)
+        draw_text(surface, f"Health: {int(player.health)}/{player.max_health}", 18, 110, 10)
         
-        draw_bar(gameplay_surface, 10, 40, player.energy, player.max_energy, 200, 20, BLUE)
-        draw_text(gameplay_surface, f"Energy: {int(player.energy)}/{player.max_energy}", 18, 110, 40)
+        draw_bar(surface, 10, 40, player.energy, player.max_energy, 200, 20, BLUE)
+        draw_text(surface, f"Energy: {int(player.energy)}/{player.max_energy}", 18, 110, 40)
         
         # Add weapon type indicator
         weapon_colors = {
@@ -2799,245 +2956,95 @@ while running:
         }
         weapon_type = player.weapon_type.capitalize()
         weapon_level = player.weapon_level
-        draw_text(gameplay_surface, f"Weapon: {weapon_type} (Lvl {weapon_level})", 18, 110, 70, weapon_colors.get(player.weapon_type, WHITE))
+        draw_text(surface, f"Weapon: {weapon_type} (Lvl {weapon_level})", 18, 110, 70, weapon_colors.get(player.weapon_type, WHITE))
         
         # Draw shield if active
         if player.shield_active:
-            pygame.draw.circle(gameplay_surface, BLUE, player.rect.center, 40, 2)
+            effects.draw(surface, "shield", player.rect.size, player.rect.center)
             
         # Draw game information
-        draw_text(gameplay_surface, f"Score: {game_state.score}", 22, WIDTH - 100, 10)
-        draw_text(gameplay_surface, f"Combo: x{game_state.combo}", 18, WIDTH - 100, 40)
-        draw_text(gameplay_surface, f"Sector: {game_state.sector} - Wave: {game_state.wave}", 18, WIDTH - 100, 70)
-        draw_text(gameplay_surface, f"Drones: {len(player.drone_list)}/{player.max_drones}", 18, WIDTH - 100, 100)
-        draw_text(gameplay_surface, f"Resources: {game_state.resources}", 18, WIDTH - 100, 130)
+        draw_text(surface, f"Score: {game_state.score}", 22, WIDTH - 100, 10)
+        draw_text(surface, f"Combo: x{game_state.combo}", 18, WIDTH - 100, 40)
+        draw_text(surface, f"Sector: {game_state.sector} - Wave: {game_state.wave}", 18, WIDTH - 100, 70)
+        draw_text(surface, f"Drones: {len(player.drone_list)}/{player.max_drones}", 18, WIDTH - 100, 100)
+        draw_text(surface, f"Resources: {game_state.resources}", 18, WIDTH - 100, 130)
+        if getattr(game_state, 'horde_mode', False):
+            draw_text(surface, f"Horde: {len(enemies)}", 18, WIDTH - 100, 160)
         
         # Draw boss health bar if fighting a boss
         if game_state.boss_fight and bosses:
             boss = bosses.sprites()[0]
-            draw_bar(gameplay_surface, WIDTH//2 - 150, HEIGHT - 30, boss.health, boss.max_health, 300, 20, RED)
-            draw_text(gameplay_surface, boss.name, 20, WIDTH//2, HEIGHT - 50)
+            draw_bar(surface, WIDTH//2 - 150, HEIGHT - 30, boss.health, boss.max_health, 300, 20, RED)
+            draw_text(surface, boss.name, 20, WIDTH//2, HEIGHT - 50)
         
         # Draw special effects
         if player.hyper_dash_active:
-            # Draw dash trail
-            for i in range(5):
-                trail_alpha = 150 - (i * 30)  # Fade out the trail
-                s = pygame.Surface((player.rect.width, player.rect.height), pygame.SRCALPHA)
-                s.fill((0, 255, 255, trail_alpha))
-                trail_rect = s.get_rect()
-                trail_rect.center = (player.rect.centerx, player.rect.centery + (i * 15))
-                gameplay_surface.blit(s, trail_rect)
+            # Draw dash trail, fading out behind the player
+            for i, trail in enumerate(effects.frames("dash_trail", player.rect.size)):
+                effects.blit(surface, trail, (player.rect.centerx, player.rect.centery + (i * 15)))
                 
-        # Debug output before checking for wave completion (second check)
-        if len(enemies) == 0 and game_state.state == "playing" and hasattr(game_state, 'endless_mode') and game_state.endless_mode:
-            print(f"Second check - No enemies present. boss_fight={game_state.boss_fight}, portals={len(shop_portals) if 'shop_portals' in globals() else 'not defined'}")
-        
-        # Check for wave completion
-        if len(enemies) == 0 and not game_state.boss_fight and 'shop_portals' in globals() and len(shop_portals) == 0:
-            # Debug info for the second check
-            print(f"Second wave completion check - Sector {game_state.sector}, Wave {game_state.wave}")
-            
-            # Check for special cases in endless mode for high sectors
-            if hasattr(game_state, 'endless_mode') and game_state.endless_mode and game_state.sector >= 7 and game_state.wave >= game_state.waves_per_sector:
-                print(f"Second check - Forcing boss fight for sector {game_state.sector}, wave {game_state.wave}")
-                game_state.boss_fight = True
-                
-                # Force boss spawn directly instead of using next_wave()
-                if random.random() < 0.4:  # 40% chance for mini-boss
-                    mini_boss = BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet)
-                    health_multiplier = 1 + (game_state.sector - 6) * 0.2
-                    mini_boss.max_health *= health_multiplier
-                    mini_boss.health = mini_boss.max_health
-                    all_sprites.add(mini_boss)
-                    enemies.add(mini_boss)
-                    print(f"Second check - Spawned mini-boss for sector {game_state.sector}")
-                else:
-                    # Spawn regular boss - enhanced in endless mode
-                    if hasattr(game_state, 'endless_mode') and game_state.endless_mode and game_state.sector > 6:
-                        # Use random boss in endless mode
-                        boss = create_random_boss(game_state.sector)
-                        print(f"Random boss created for endless sector {game_state.sector}")
-                    else:
-                        # Normal progression - use sector-specific boss
-                        boss = Boss(game_state.sector)
-                        if game_state.sector > 6:
-                            health_multiplier = 1 + (game_state.sector - 6) * 0.3  # +30% health per sector above 6
-                            boss.max_health *= health_multiplier
-                            boss.health = boss.max_health
-                            boss.shoot_delay = max(300, boss.shoot_delay * 0.8)  # Faster shooting (min 300ms)
-                            boss.score_value = 500 + (game_state.sector - 6) * 300  # More points in higher sectors
-                        all_sprites.add(boss)
-                        bosses.add(boss)
-                    
-                    game_state.wave = 1  # Reset wave counter
-                    continue
-            
-            # Standard wave progression
-            if game_state.next_wave():
-                # Boss fight time!
-                
-                # Check if we should use random boss in endless mode
-                use_random_boss = (hasattr(game_state, 'endless_mode') and 
-                                 game_state.endless_mode and 
-                                 game_state.sector > 6)
-                
-                # In endless mode (after sector 6), sometimes spawn mini-boss instead
-                if use_random_boss and random.random() < 0.4:
-                    # This is handled by our special case above in endless mode
-                    mini_boss = BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet)
-                    mini_boss.max_health *= 1 + (game_state.sector - 6) * 0.2  # +20% health per sector above 6
-                    mini_boss.health = mini_boss.max_health
-                    all_sprites.add(mini_boss)
-                    enemies.add(mini_boss)
-                    # Ensure we don't spawn regular enemies during a boss wave
-                    game_state.boss_fight = True
-                    print(f"Spawned mini-boss for endless sector {game_state.sector}")
-                elif not use_random_boss:  # Regular game mode or early endless sectors
-                    # In regular game mode, always use the correct sector boss
-                    # Mini-bosses don't replace sector bosses in normal progression
-                    boss = Boss(game_state.sector)
-                    if hasattr(game_state, 'endless_mode') and game_state.endless_mode and game_state.sector > 6:
-                        health_multiplier = 1 + (game_state.sector - 6) * 0.3  # +30% health per sector above 6
-                        boss.max_health *= health_multiplier
-                        boss.health = boss.max_health
-                        boss.shoot_delay = max(300, boss.shoot_delay * 0.8)  # Faster shooting (min 300ms)
-                        boss.score_value = 500 + (game_state.sector - 6) * 300  # More points in higher sectors
-                    all_sprites.add(boss)
-                    bosses.add(boss)
-                    # Ensure we don't spawn regular enemies during a boss wave
-                    game_state.boss_fight = True
-                    print(f"Spawned sector {game_state.sector} boss")
-                else: # This is the else for the use_random_boss and random.random() check
-                    # Create a random boss for endless mode
-                    boss = create_random_boss(game_state.sector)
-                    all_sprites.add(boss)
-                    bosses.add(boss)
-                    # Ensure we don't spawn regular enemies during a boss wave
-                    game_state.boss_fight = True
-                    print(f"Created random boss from pool for endless sector {game_state.sector}")
-            else:
-                # Not a boss wave, spawn regular enemies
-                if game_state.boss_fight:
-                    # This shouldn't happen, but if it does, reset the flag
-                    game_state.boss_fight = False
-                    print(f"Resetting boss_fight flag in wave {game_state.wave}")
-                
-                # Spawn new wave of enemies
-                for i in range(game_state.wave_enemies):
-                    # Choose enemy type based on wave and sector
-                    enemy_roll = random.random()
-                    
-                    # Use a weighted selection system for different enemy types
-                    if enemy_roll < 0.15:  # 15% chance of elite enemy
-                        enemy = Enemy("elite")
-                    elif enemy_roll < 0.25:  # 10% chance of cloaked ambusher
-                        enemy = Enemy("cloaked_ambusher")
-                    elif enemy_roll < 0.35:  # 10% chance of splitter drone
-                        enemy = Enemy("splitter_drone")
-                    elif enemy_roll < 0.45:  # 10% chance of shield bearer
-                        enemy = Enemy("shield_bearer")
-                    elif enemy_roll < 0.55:  # 10% chance of energy sapper
-                        enemy = Enemy("energy_sapper")
-                    elif enemy_roll < 0.65:  # 10% chance of blade spinner
-                        enemy = Enemy("blade_spinner")
-                    else:  # 35% chance of basic enemy
-                        enemy = Enemy("basic")
-                        
-                    # Place it randomly at the top of the screen with some spacing
-                    enemy.rect.x = random.randint(0 + enemy.rect.width, WIDTH - enemy.rect.width)
-                    enemy.rect.bottom = random.randint(-150, -20)
-                    all_sprites.add(enemy)
-                    enemies.add(enemy)
-                
-                # Chance to spawn a mini-boss (Barrier Goliath) after wave 3
-                # Only if this is not a boss wave
-                if game_state.wave > 3 and game_state.wave < game_state.waves_per_sector and random.random() < 0.15 and not game_state.boss_fight:
-                    # Make sure we don't have too many enemies
-                    if len(enemies) > 10:
-                        # Too many enemies already - skip mini-boss for this wave
-                        print(f"Skipping mini-boss spawn - too many enemies ({len(enemies)})")
-                    else:
-                        print(f"Spawning mini-boss during wave {game_state.wave}")
-                        mini_boss = BarrierGoliath(WIDTH, HEIGHT, game_state, all_sprites, enemies, enemy_bullets, powerups, PowerUp, EnemySpreadBullet)
-                        all_sprites.add(mini_boss)
-                        enemies.add(mini_boss)
-                        # Note: We don't set boss_fight to True here since this isn't a boss wave
-    
         # Draw portal special effects and text
         for portal in shop_portals:
-            portal.draw(gameplay_surface)
+            portal.draw(surface)
+
+        effects.end_frame()
+        
+    def rendered(self):
+        gc_policy.end_frame(pygame.time.get_ticks())
+        alloc_monitor.end_frame()
+        spike_sampler.end_frame()
+        frame_metrics.end_frame()
+
+# Game over screen
+class GameOverScreen(MenuScreen):
+    name = "game_over"
     
-    elif game_state.state == "game_over":
+    def enter(self):
+        MenuScreen.enter(self)
+        game_state.state = "game_over"
+        
+    def render(self, surface):
+        surface.fill(BLACK)
+        
         # Draw game over screen
-        draw_text(gameplay_surface, "GAME OVER", 64, WIDTH / 2, HEIGHT / 4)
-        draw_text(gameplay_surface, f"Score: {game_state.score}", 36, WIDTH / 2, HEIGHT / 2)
-        draw_text(gameplay_surface, f"Max Combo: x{game_state.max_combo}", 24, WIDTH / 2, HEIGHT / 2 + 50)
+        draw_text(surface, "GAME OVER", 64, WIDTH / 2, HEIGHT / 4)
+        draw_text(surface, f"Score: {game_state.score}", 36, WIDTH / 2, HEIGHT / 2)
+        draw_text(surface, f"Max Combo: x{game_state.max_combo}", 24, WIDTH / 2, HEIGHT / 2 + 50)
         
         # Add a continue button - renamed to "Main Menu" for clarity
-        if draw_button(gameplay_surface, "Return to Menu", 24, WIDTH / 2, HEIGHT * 3 / 4, 250, 50):
+        if draw_button(surface, "Return to Menu", 24, WIDTH / 2, HEIGHT * 3 / 4, 250, 50):
             # Reset game
-            print("Game over: Returning to main menu...")
-            
-            # Force direct exit from this frame loop to prevent difficulty screen
-            # Instead of using global and return, set a special flag
-            
-            # First create a complete reset of the GameState
-            # Create a new instance of GameState with default values
-            temp_state = GameState()
-            
-            # Copy only necessary attributes from the temp state to ensure clean slate
-            game_state.state = "menu"  # Explicitly set to menu state
-            game_state.sector = temp_state.sector
-            game_state.wave = temp_state.wave
-            game_state.score = 0
-            game_state.combo = 1
-            game_state.max_combo = 1
-            game_state.resources = 0
-            game_state.boss_fight = False
-            game_state.wave_enemies = temp_state.wave_enemies
-            game_state.waves_per_sector = temp_state.waves_per_sector
-            game_state.bosses_defeated = 0
-            
-            # Preserve difficulty setting only
-            if not hasattr(game_state, 'difficulty'):
-                game_state.difficulty = "normal"
-                
-            # Remove any endless mode
-            if hasattr(game_state, 'endless_mode'):
-                delattr(game_state, 'endless_mode')
-            
-            # Reset all sprite groups to a clean slate
-            all_sprites.empty()
-            bullets.empty()
-            enemy_bullets.empty()
-            enemies.empty()
-            powerups.empty()
-            bosses.empty()
-            shop_portals.empty()
-            
-            # Create a new player for the menu
-            player = Player()
-            all_sprites.add(player)
+            log.info("Game over: Returning to main menu...")
             
-            # Set a special game state flag to prevent difficulty screen transition
-            game_state.skip_difficulty = True
+            # Reset the run in place and skip the difficulty screen transition
+            return_to_menu()
             
-            print("Game Over screen: Complete reset to menu state performed")
+            log.debug("Game Over screen: Complete reset to menu state performed")
+            self.stack.replace(screens["menu"])
+
+# Victory screen
+class VictoryScreen(MenuScreen):
+    name = "victory"
     
-    elif game_state.state == "victory":
+    def enter(self):
+        MenuScreen.enter(self)
+        game_state.state = "victory"
+        
+    def render(self, surface):
+        surface.fill(BLACK)
+        
         # Draw victory screen
-        draw_text(gameplay_surface, "CONGRATULATIONS!", 64, WIDTH / 2, HEIGHT / 4)
-        draw_text(gameplay_surface, "You defeated the Dominion Mothership!", 36, WIDTH / 2, HEIGHT / 2 - 50)
-        draw_text(gameplay_surface, f"Final Score: {game_state.score}", 36, WIDTH / 2, HEIGHT / 2)
-        draw_text(gameplay_surface, f"Max Combo: x{game_state.max_combo}", 24, WIDTH / 2, HEIGHT / 2 + 50)
+        draw_text(surface, "CONGRATULATIONS!", 64, WIDTH / 2, HEIGHT / 4)
+        draw_text(surface, "You defeated the Dominion Mothership!", 36, WIDTH / 2, HEIGHT / 2 - 50)
+        draw_text(surface, f"Final Score: {game_state.score}", 36, WIDTH / 2, HEIGHT / 2)
+        draw_text(surface, f"Max Combo: x{game_state.max_combo}", 24, WIDTH / 2, HEIGHT / 2 + 50)
         
         # Draw information about endless mode
-        draw_text(gameplay_surface, "ENDLESS MODE UNLOCKED", 28, WIDTH / 2, HEIGHT / 2 + 90)
-        draw_text(gameplay_surface, "Continue with increased difficulty", 20, WIDTH / 2, HEIGHT / 2 + 120)
+        draw_text(surface, "ENDLESS MODE UNLOCKED", 28, WIDTH / 2, HEIGHT / 2 + 90)
+        draw_text(surface, "Continue with increased difficulty", 20, WIDTH / 2, HEIGHT / 2 + 120)
         
         # Add continue button
-        if draw_button(gameplay_surface, "Continue", 24, WIDTH / 2 - 120, HEIGHT * 3 / 4, 200, 50):
+        if draw_button(surface, "Continue", 24, WIDTH / 2 - 120, HEIGHT * 3 / 4, 200, 50):
             # Save current score as high score before resetting
             if game_state.score > game_state.high_score:
                 game_state.high_score = game_state.score
@@ -3059,7 +3066,6 @@ while running:
             }
             
             # Prepare for endless mode
-            game_state.state = "playing"
             game_state.sector += 1  # Increase sector instead of resetting to 1
             game_state.wave = 1
             game_state.boss_fight = False
@@ -3079,17 +3085,8 @@ while running:
             additional_resources = 100 + (game_state.sector * 25)
             game_state.resources += additional_resources
             
-            # Reset sprite groups
-            all_sprites = pygame.sprite.Group()
-            bullets = pygame.sprite.Group()
-            enemy_bullets = pygame.sprite.Group()
-            enemies = pygame.sprite.Group()
-            powerups = pygame.sprite.Group()
-            bosses = pygame.sprite.Group()
-            shop_portals = pygame.sprite.Group()
-            
-            # Create new player but restore previous attributes
-            player = Player()
+            # Clear the world and restore the player in place
+            reset_world()
             
             # Restore saved attributes
             for attr, value in stored_player_attributes.items():
@@ -3099,71 +3096,149 @@ while running:
             player.drone_list = []  # Clear the list of drone references
             for i in range(stored_player_attributes['drones']):
                 player.add_drone()
-                
-            all_sprites.add(player)
             
             # Create initial enemies
-            for i in range(game_state.wave_enemies):
-                enemy = Enemy()
-                all_sprites.add(enemy)
-                enemies.add(enemy)
+            spawn_initial_enemies()
+            self.stack.replace(screens["playing"])
                 
         # Add quit button
-        if draw_button(gameplay_surface, "Quit", 24, WIDTH / 2 + 120, HEIGHT * 3 / 4, 200, 50):
-            print("Victory screen: Quit button clicked, returning to main menu...")
-            
-            # More thorough reset similar to what we did for game over screen
-            # Create a temp state to get default values
-            temp_state = GameState()
-            
-            # Copy default values from temp_state to ensure a clean reset
-            game_state.state = "menu"
-            game_state.sector = temp_state.sector
-            game_state.wave = temp_state.wave
-            game_state.score = 0
-            game_state.combo = 1
-            game_state.max_combo = 1
-            game_state.resources = 0
-            game_state.boss_fight = False
-            game_state.wave_enemies = temp_state.wave_enemies
-            game_state.waves_per_sector = temp_state.waves_per_sector
+        if draw_button(surface, "Quit", 24, WIDTH / 2 + 120, HEIGHT * 3 / 4, 200, 50):
+            log.info("Victory screen: Quit button clicked, returning to main menu...")
             
-            # Preserve difficulty and high score only
-            if not hasattr(game_state, 'difficulty'):
-                game_state.difficulty = "normal"
-                
-            # Ensure high score is saved
-            if not hasattr(game_state, 'high_score'):
-                game_state.high_score = 0
-                
-            # Ensure we clear endless mode
-            if hasattr(game_state, 'endless_mode'):
-                delattr(game_state, 'endless_mode')
-                
-            # Set the skip_difficulty flag to avoid difficulty screen
-            game_state.skip_difficulty = True
-            
-            # Clear all sprite groups
-            all_sprites.empty()
-            bullets.empty()
-            enemy_bullets.empty()
-            enemies.empty()
-            powerups.empty()
-            bosses.empty()
-            shop_portals.empty()
-            
-            # Create a new fresh player to avoid carrying over state
-            player = Player()
-            all_sprites.add(player)
-            
-            print("Victory screen: Complete reset performed, ready for new game")
-    
-    # Draw the gameplay surface to the screen with offsets
-    screen.blit(gameplay_surface, (OFFSET_X, OFFSET_Y))
+            # Same reset as the game over screen, keeping difficulty and high score
+            return_to_menu()
+            
+            log.debug("Victory screen: Complete reset performed, ready for new game")
+            self.stack.replace(screens["menu"])
+
+# Screens are created once and reused across transitions
+screens = {
+    "menu": MainMenuScreen(),
+    "controls": ControlsScreen(),
+    "difficulty": DifficultyScreen(),
+    "playing": PlayingScreen(),
+    "upgrade_menu": UpgradeScreen(),
+    "game_over": GameOverScreen(),
+    "victory": VictoryScreen()
+}
+
+# Allocation and object-count instrumentation, off unless asked for
+alloc_monitor = AllocationMonitor(
+    {"Bullet": Bullet, "EnemySpreadBullet": EnemySpreadBullet, "Enemy": Enemy, "PowerUp": PowerUp},
+    {"all_sprites": all_sprites, "bullets": bullets, "enemy_bullets": enemy_bullets, "enemies": enemies,
+     "powerups": powerups, "bosses": bosses},
+    {"boss_bullets": lambda: sum(len(boss.bullets) for boss in bosses if hasattr(boss, "bullets")),
+     "drones": lambda: len(player.drone_list)})
 
-    # After drawing everything, flip the display
-    pygame.display.flip()
+# Functions that make up a gameplay frame, timed as phases by the
+# diagnostics. Collisions are looked up as module globals, so they are
+# wrapped on the module.
+_game_module = sys.modules[__name__]
+FRAME_PHASES = (
+    (screens["playing"], "simulate", "simulate"),
+    (screens["playing"], "render", "render"),
+    (ai_scheduler, "update", "ai"),
+    (enemy_swarm, "update", "swarm"),
+    (lod_scheduler, "update", "sprites"),
+    (enemy_bullets, "update", "bullets"),
+    (sprite_culler, "update", "cull"),
+    (_game_module, "collide_groups", "collide"),
+    (_game_module, "collide_sprite", "collide"),
+    (enemy_bullets, "spritecollide", "collide"),
+    (wave_director, "update", "waves"),
+    (all_sprites, "draw", "draw"),
+    (enemy_bullets, "draw", "draw"),
+)
 
-# Quit the game
-pygame.quit()
-sys.exit()
+def frame_state():
+    # Sector, wave and mode flags recorded with each frame
+    flags = BOSS_FIGHT if game_state.boss_fight else 0
+    if getattr(game_state, 'endless_mode', False):
+        flags |= ENDLESS
+    if getattr(game_state, 'horde_mode', False):
+        flags |= HORDE
+    return game_state.sector, game_state.wave, flags
+
+# One row of metrics per gameplay frame, off unless asked for
+frame_metrics = FrameMetrics(
+    FRAME_PHASES,
+    ((_game_module, "collide_groups", "bullet_hits", lambda hits: sum(len(hit) for hit in hits.values())),
+     (enemy_bullets, "spritecollide", "player_hits", len),
+     (_game_module, "collide_sprite", "player_hits", len)),
+    {"enemies": enemies, "bullets": bullets, "enemy_bullets": enemy_bullets, "bosses": bosses, "powerups": powerups},
+    frame_state)
+
+# Stack samples of slow frames, off unless asked for
+spike_sampler = SpikeSampler(1000 / FPS)
+
+# cProfile per screen and per wave, off unless asked for
+scene_profiler = SegmentProfiler()
+
+def profile_segment(scene):
+    # Gameplay is split by sector and wave, everything else by screen
+    if scene.name != "playing":
+        return scene.name
+    label = f"playing sector {game_state.sector} wave {game_state.wave}"
+    if game_state.boss_fight:
+        label += " boss"
+    if getattr(game_state, 'horde_mode', False):
+        label += " horde"
+    elif getattr(game_state, 'endless_mode', False):
+        label += " endless"
+    return label
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Xbacab - vertical scrolling space shooter")
+    parser.add_argument("--log", metavar="LEVEL", choices=("debug", "info", "warning", "error"),
+                        help="show game messages of LEVEL and above (debug, info, warning, error); silent by default")
+    parser.add_argument("--log-file", metavar="FILE", help="write the messages to FILE instead of the console")
+    parser.add_argument("--instrument", metavar="FILE",
+                        help="record allocations per frame and live object counts to FILE (slow)")
+    parser.add_argument("--sample-spikes", metavar="FILE",
+                        help="write collapsed stacks of frames over budget to FILE")
+    parser.add_argument("--sample-interval", metavar="MS", type=float, default=spike_sampler.interval_ms,
+                        help="time between stack samples (default %(default)s ms)")
+    parser.add_argument("--spike-budget", metavar="MS", type=float, default=spike_sampler.budget_ms,
+                        help="frames slower than this are written out (default %(default).1f ms)")
+    parser.add_argument("--profile", metavar="DIR", nargs="?", const="profiles",
+                        help="profile with cProfile, one report per screen and per wave, into DIR "
+                             "(default %(const)s)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record per-frame metrics to FILE (CSV if it ends in .csv, binary otherwise) "
+                             "for analyze_metrics.py")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.log:
+        game_log.configure(args.log, args.log_file)
+    # Single main loop driving every screen through the scene stack
+    stack = SceneStack(screen, gameplay_surface, (OFFSET_X, OFFSET_Y), clock)
+    # Everything loaded so far lives for the whole game
+    gc_policy.freeze()
+    if args.instrument:
+        alloc_monitor.start(args.instrument)
+    if args.sample_spikes:
+        spike_sampler.interval_ms = args.sample_interval
+        spike_sampler.budget_ms = args.spike_budget
+        spike_sampler.start(args.sample_spikes)
+    if args.metrics:
+        frame_metrics.start(args.metrics)
+    before_step = None
+    if args.profile:
+        scene_profiler.start(args.profile)
+        before_step = lambda scene: scene_profiler.segment(profile_segment(scene))
+    stack.push(screens["menu"])
+    stack.run(before_step)
+    scene_profiler.stop()
+    alloc_monitor.stop()
+    spike_sampler.stop()
+    frame_metrics.stop()
+    game_log.shutdown()
+    
+    # Quit the game
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
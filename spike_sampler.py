@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from game_log import get_logger
+
+log = get_logger("sampler")
+
+# Sampling profiler for slow frames.
+# A background thread looks at the main thread's stack every interval_ms
+# (sys._current_frames()) and keeps the samples in a ring buffer. When a
+# frame takes longer than the budget, the samples taken during it are
+# appended to a file as collapsed stacks ("root;caller;callee count"), the
+# format flamegraph.pl, speedscope and similar tools read. Each slow frame
+# is its own root, so hitches don't average out as they do in cProfile.
+#
+# A sample only records the code objects on the stack; names are only looked
+# up for slow frames, which keeps it cheap enough to leave on while playing.
+# The sampler needs the GIL to take a sample, so the interpreter's switch
+# interval is lowered to match the sampling rate while it runs; otherwise
+# the main thread would hold on to the GIL for up to 5 ms at a time.
+class SpikeSampler:
+    def __init__(self, budget_ms=1000 / 60, interval_ms=2, capacity=4096):
+        self.budget_ms = budget_ms
+        self.interval_ms = interval_ms
+        self.samples = deque(maxlen=capacity)  # (time, stack of code objects, leaf first)
+        self.file = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.target = None  # Thread id of the sampled (main) thread
+        self.frame = 0
+        self.frame_start = None
+        self.spikes = 0
+        self.switch_interval = None  # The interpreter's own, while sampling
+
+    def start(self, path):
+        """Sample the calling thread from now on, writing slow frames to path."""
+        self.file = open(path, "w")
+        self.target = threading.get_ident()
+        self.stopping.clear()
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval_ms / 2000))
+        self.thread = threading.Thread(target=self.run, name="spike-sampler", daemon=True)
+        self.thread.start()
+        log.info("Spike sampler writing frames over %.1f ms to %s", self.budget_ms, path)
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+            sys.setswitchinterval(self.switch_interval)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def run(self):
+        interval = self.interval_ms / 1000
+        target = self.target
+        append = self.samples.append
+        clock = time.perf_counter
+        while not self.stopping.wait(interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            append((clock(), tuple(stack)))
+
+    def begin_frame(self):
+        if self.file is not None:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.file is None or self.frame_start is None:
+            return
+        end = time.perf_counter()
+        self.frame += 1
+        elapsed_ms = (end - self.frame_start) * 1000
+        if elapsed_ms > self.budget_ms:
+            self.dump(self.frame_start, end, elapsed_ms)
+        self.frame_start = None
+
+    def dump(self, start, end, elapsed_ms):
+        # Collapsed stacks of the samples taken during the slow frame
+        stacks = Counter(stack for when, stack in list(self.samples) if start <= when <= end)
+        self.spikes += 1
+        root = f"frame {self.frame} ({elapsed_ms:.1f} ms)"
+        for stack, count in stacks.items():
+            names = ";".join(f"{os.path.basename(code.co_filename)}:{code.co_name}" for code in reversed(stack))
+            self.file.write(f"{root};{names} {count}\n")
+        if not stacks:
+            # Too short for a sample; still record that it happened
+            self.file.write(f"{root} 1\n")
+        self.file.flush()
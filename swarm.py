@@ -0,0 +1,348 @@
+import math
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Array-backed enemies
+# Basic and elite enemies only move down (elites sway side to side), stay
+# inside the screen horizontally, leave at the bottom and fire on a timer.
+# Their state is kept in columns, one row per enemy, and the whole swarm is
+# stepped at once instead of through per-enemy update() calls. The enemies
+# are still ordinary Enemy sprites: each step writes their positions back to
+# their rects, and shooting, taking hits and dying all go through Enemy as
+# before.
+#
+# Small swarms keep their columns in lists and step them in one plain loop.
+# numpy has a fixed cost per call that only pays off with more rows, so once
+# a swarm grows past numpy_rows (and numpy is installed) the columns move to
+# arrays and each step is a handful of vector operations.
+#
+# Positions follow Rect arithmetic: once an enemy is in view its position is
+# rounded every frame, like rect.y += speed. Dormant enemies above the
+# screen keep fractional positions, as they did with cheap LOD updates.
+COLUMNS = ("x", "y", "speed", "sway", "max_x", "rect_height", "delay", "last_shot",
+           "active", "momentum_x", "momentum_y")
+
+def rect_round(value):
+    # Half away from zero, as Rect rounds
+    return int(value + 0.5) if value >= 0 else int(value - 0.5)
+
+class ListRows:
+    def __init__(self, columns=None):
+        columns = columns or {name: [] for name in COLUMNS}
+        for name in COLUMNS:
+            setattr(self, name, list(columns[name]))
+
+    def export(self):
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def append(self, values):
+        for name, value in zip(COLUMNS, values):
+            getattr(self, name).append(value)
+
+    def move(self, source, target):
+        # Overwrite row target with row source, which is the last row
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[target] = column[source]
+            column.pop()
+
+    def step(self, now, height):
+        """Move every row one frame; return the rows entering view, firing and leaving."""
+        sway = math.sin(now / 500)
+        x, y, speed, amplitude = self.x, self.y, self.speed, self.sway
+        max_x, rect_height = self.max_x, self.rect_height
+        delay, last_shot, active = self.delay, self.last_shot, self.active
+        momentum_x, momentum_y = self.momentum_x, self.momentum_y
+        entering = []
+        firing = []
+        culled = []
+        for i in range(len(x)):
+            old_x = x[i]
+            old_y = y[i]
+            if active[i]:
+                new_y = rect_round(old_y + speed[i])
+                new_x = rect_round(old_x + amplitude[i] * sway)
+            else:
+                new_y = old_y + speed[i]
+                new_x = old_x
+            if new_x > max_x[i]:
+                new_x = max_x[i]
+            if new_x < 0:
+                new_x = 0
+            x[i] = new_x
+            y[i] = new_y
+            momentum_x[i] = new_x - old_x
+            momentum_y[i] = new_y - old_y
+            if new_y > height:
+                culled.append(i)
+            elif not active[i]:
+                if new_y + rect_height[i] > 0:
+                    entering.append(i)
+            elif now - last_shot[i] > delay[i]:
+                firing.append(i)
+        return entering, firing, culled
+
+    def positions(self):
+        return self.x, self.y
+
+    def momentum(self, i):
+        return self.momentum_x[i], self.momentum_y[i]
+
+    def timers(self, i):
+        return bool(self.active[i]), int(self.last_shot[i])
+
+    def activate(self, i, last_shot):
+        self.active[i] = True
+        self.last_shot[i] = last_shot
+
+    def fired(self, rows, now):
+        last_shot = self.last_shot
+        for i in rows:
+            last_shot[i] = now
+
+class ArrayRows(ListRows):
+    # Same rows in numpy arrays, allocated ahead and doubled when full
+    dtypes = {"delay": "int64", "last_shot": "int64", "active": bool}
+
+    def __init__(self, columns):
+        self.count = len(columns["x"])
+        self.capacity = max(64, self.count * 2)
+        for name in COLUMNS:
+            array = numpy.zeros(self.capacity, self.dtypes.get(name, float))
+            array[:self.count] = columns[name]
+            setattr(self, name, array)
+
+    def export(self):
+        return {name: getattr(self, name)[:self.count].tolist() for name in COLUMNS}
+
+    def append(self, values):
+        if self.count == self.capacity:
+            self.capacity *= 2
+            for name in COLUMNS:
+                array = numpy.zeros(self.capacity, self.dtypes.get(name, float))
+                array[:self.count] = getattr(self, name)[:self.count]
+                setattr(self, name, array)
+        i = self.count
+        for name, value in zip(COLUMNS, values):
+            getattr(self, name)[i] = value
+        self.count += 1
+
+    def move(self, source, target):
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[target] = column[source]
+        self.count -= 1
+
+    def step(self, now, height):
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        active = self.active[:n]
+        old_x = x.copy()
+        old_y = y.copy()
+        y += self.speed[:n]
+        x += self.sway[:n] * active * math.sin(now / 500)
+        for column in (x, y):
+            # Half away from zero, as Rect rounds
+            numpy.copyto(column, numpy.trunc(column + numpy.copysign(0.5, column)), where=active)
+        numpy.minimum(x, self.max_x[:n], out=x)
+        numpy.maximum(x, 0, out=x)
+        numpy.subtract(x, old_x, out=self.momentum_x[:n])
+        numpy.subtract(y, old_y, out=self.momentum_y[:n])
+        below = y > height
+        entering = ~active & ~below & (y + self.rect_height[:n] > 0)
+        firing = active & ~below & (now - self.last_shot[:n] > self.delay[:n])
+        return (numpy.flatnonzero(entering).tolist(), numpy.flatnonzero(firing).tolist(),
+                numpy.flatnonzero(below).tolist())
+
+    def positions(self):
+        return self.x[:self.count].tolist(), self.y[:self.count].tolist()
+
+    def momentum(self, i):
+        return float(self.momentum_x[i]), float(self.momentum_y[i])
+
+    def fired(self, rows, now):
+        if rows:
+            self.last_shot[rows] = now
+
+class EnemySwarm:
+    def __init__(self, width, height, on_cull=None, numpy_rows=48):
+        self.width = width
+        self.height = height
+        self.on_cull = on_cull  # Called with each enemy that leaves the bottom
+        # Row count from which the columns live in numpy arrays; None for never
+        self.numpy_rows = numpy_rows if numpy is not None else None
+        self.members = []
+        self.rects = []
+        self.rows = ListRows()
+
+    def __len__(self):
+        return len(self.members)
+
+    def backend(self):
+        return "numpy" if isinstance(self.rows, ArrayRows) else "python"
+
+    def add(self, enemy):
+        rect = enemy.rect
+        behaviour = enemy.behaviour
+        enemy.swarm_index = len(self.members)
+        self.members.append(enemy)
+        self.rects.append(rect)
+        self.rows.append((rect.x, rect.y, enemy.speed * behaviour.drift, behaviour.sway,
+                          self.width - rect.width, rect.height, enemy.shoot_delay,
+                          enemy.last_shot, enemy.lod_active, 0, 0))
+        if (self.numpy_rows is not None and len(self.members) >= self.numpy_rows
+                and not isinstance(self.rows, ArrayRows)):
+            self.rows = ArrayRows(self.rows.export())
+
+    def discard(self, enemy):
+        i = enemy.swarm_index
+        if i is None:
+            return
+        # Hand the timers back so the enemy carries on from where it was
+        enemy.lod_active, enemy.last_shot = self.rows.timers(i)
+        # The last row takes the place of the removed one
+        last = len(self.members) - 1
+        moved = self.members[last]
+        self.members[i] = moved
+        self.rects[i] = self.rects[last]
+        moved.swarm_index = i
+        self.members.pop()
+        self.rects.pop()
+        self.rows.move(last, i)
+        enemy.swarm_index = None
+        # Back to lists once the swarm has thinned out well below the switch point
+        if isinstance(self.rows, ArrayRows) and len(self.members) < self.numpy_rows // 2:
+            self.rows = ListRows(self.rows.export())
+
+    def clear(self):
+        for enemy in self.members:
+            enemy.swarm_index = None
+        self.members = []
+        self.rects = []
+        self.rows = ListRows()
+
+    def update(self, now):
+        if not self.members:
+            return
+        rows = self.rows
+        entering, firing, culled = rows.step(now, self.height)
+        xs, ys = rows.positions()
+        for rect, x, y in zip(self.rects, xs, ys):
+            rect.x = x
+            rect.y = y
+        members = self.members
+        for i in entering:
+            # Entered the view - start shooting timers, like an LOD promotion
+            enemy = members[i]
+            enemy.lod_active = True
+            enemy.restart_timers(now)
+            rows.activate(i, enemy.last_shot)
+        for i in firing:
+            enemy = members[i]
+            # Bullets pick up the enemy's movement
+            enemy.momentum_x, enemy.momentum_y = rows.momentum(i)
+            enemy.behaviour.fire(enemy, now)
+        rows.fired(firing, now)
+        if culled:
+            # Killing an enemy reorders the rows, so look them all up first
+            for enemy in [members[i] for i in culled]:
+                if self.on_cull is not None:
+                    self.on_cull(enemy)
+                else:
+                    enemy.kill()
+
+    def counts(self):
+        return {"rows": len(self.members), "backend": self.backend()}
+
+def swarmable(sprite):
+    behaviour = getattr(sprite, "behaviour", None)
+    return behaviour is not None and behaviour.swarmable
+
+# A group that also keeps the members the swarm doesn't run, in the order
+# they joined, so per-sprite passes (level of detail, AI decisions) can go
+# through those alone instead of skipping past every swarm enemy.
+class SplitGroup(pygame.sprite.Group):
+    def __init__(self, *sprites):
+        self.solo = {}  # Used as an ordered set
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if not swarmable(sprite):
+            self.solo[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.solo.pop(sprite, None)
+
+    def solo_sprites(self):
+        return list(self.solo)
+
+# The enemies group. Members the swarm can run are handed to it as they join
+# and taken back as they leave, whether by kill(), remove() or empty().
+class SwarmGroup(SplitGroup):
+    def __init__(self, swarm, *sprites):
+        self.swarm = swarm
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if swarmable(sprite) and sprite.swarm_index is None:
+            self.swarm.add(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if getattr(sprite, "swarm_index", None) is not None:
+            self.swarm.discard(sprite)
+
+# Nearest-target lookups for homing and bouncing bullets. Target centres are
+# gathered once per frame, on the first lookup after invalidate(), and
+# searched with numpy when there are enough of them.
+class TargetIndex:
+    def __init__(self, groups, numpy_rows=48):
+        self.groups = groups
+        self.numpy_rows = numpy_rows if numpy is not None else None
+        self.targets = None
+
+    def invalidate(self):
+        # Positions have moved on; rebuild on the next lookup
+        self.targets = None
+
+    def refresh(self):
+        self.targets = [sprite for group in self.groups for sprite in group.sprites()]
+        self.centres = [sprite.rect.center for sprite in self.targets]
+        if self.numpy_rows is not None and len(self.targets) >= self.numpy_rows:
+            self.centre_array = numpy.array(self.centres, float)
+        else:
+            self.centre_array = None
+
+    def nearest(self, x, y):
+        """The target whose centre is closest to (x, y), or None."""
+        if self.targets is None:
+            self.refresh()
+        target = self.search(x, y)
+        if target is not None and not target.alive():
+            # Killed since the index was built
+            self.refresh()
+            target = self.search(x, y)
+        return target
+
+    def search(self, x, y):
+        if not self.targets:
+            return None
+        if self.centre_array is not None:
+            offsets = self.centre_array - (x, y)
+            return self.targets[int(numpy.einsum("ij,ij->i", offsets, offsets).argmin())]
+        closest = None
+        closest_distance = float('inf')
+        for target, (cx, cy) in zip(self.targets, self.centres):
+            distance = (cx - x) * (cx - x) + (cy - y) * (cy - y)
+            if distance < closest_distance:
+                closest_distance = distance
+                closest = target
+        return closest
@@ -0,0 +1,33 @@
+# Bookkeeping of the bullets a shooter has in flight.
+# Bullets point at their owner's tracker rather than the owner itself, so a
+# destroyed enemy isn't kept alive by its bullets. Each bullet remembers the
+# tracker generation it was fired in; despawn() bumps the generation, which
+# retires every bullet in flight at once, and each one removes itself on its
+# next update. Nothing is ever scanned or removed from a list.
+class BulletTracker:
+    def __init__(self):
+        self.generation = 0
+        self.count = 0  # Bullets of the current generation still alive
+
+    def track(self, bullets):
+        generation = self.generation
+        for bullet in bullets:
+            bullet.tracker = self
+            bullet.generation = generation
+        self.count += len(bullets)
+
+    def owns(self, bullet):
+        return bullet.tracker is self and bullet.generation == self.generation
+
+    def release(self, bullet):
+        # A tracked bullet left play on its own
+        if bullet.generation == self.generation:
+            self.count -= 1
+
+    def despawn(self):
+        """Retire every bullet in flight, e.g. when the owner is destroyed."""
+        self.generation += 1
+        self.count = 0
+
+    def __len__(self):
+        return self.count